@@ -2,18 +2,17 @@ import streamlit as st
 import streamlit.components.v1 as components
 import sys
 import os
+import uuid
 
 # Ensure the root directory is in sys.path for absolute imports
 root_path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 if root_path not in sys.path:
     sys.path.append(root_path)
 
-from streamlit_login_auth_ui.widgets import __login__
-import torch
-import torch.nn as nn
-from torchvision import transforms
-from PIL import Image
-import numpy as np
+# torch, torchvision and reportlab are deliberately NOT imported here: the services import
+# them on first use, so the login page renders without waiting for them
+from crop_disease_detector.services.metrics import StageMetrics, stage_timer
+from crop_disease_detector.services.session_store import StoredImage
 
 # Page Configuration
 st.set_page_config(
@@ -287,15 +286,54 @@ def init_session_state():
         st.session_state.prediction_made = False
     if 'current_prediction' not in st.session_state:
         st.session_state.current_prediction = None
-    if 'uploaded_image' not in st.session_state:
-        st.session_state.uploaded_image = None
+    if 'session_key' not in st.session_state:
+        # The uploaded image itself lives in the container's SessionImageStore under this key
+        st.session_state.session_key = uuid.uuid4().hex
+
+def stored_upload(uploaded_file, batch=False):
+    """
+    This session's StoredImage for `uploaded_file`. Hashing (and thumbnailing large photos)
+    happens only when a different file is selected, not on every rerun.
+    The batch drill-down uses its own store entry, so inspecting a batch image never
+    replaces the single-mode upload that its results and PDF report refer to.
+    """
+    from crop_disease_detector.services.container import DependencyContainer
+    session_store = DependencyContainer.get_instance().session_store
+    store_key = f"{st.session_state.session_key}:batch" if batch else st.session_state.session_key
+    file_id_key = 'batch_stored_file_id' if batch else 'stored_file_id'
+    stored = session_store.get(store_key)
+    if stored is None or st.session_state.get(file_id_key) != uploaded_file.file_id:
+        with stage_timer("decode"):
+            stored = StoredImage.from_bytes(uploaded_file.getvalue())
+        session_store.put(store_key, stored)
+        st.session_state[file_id_key] = uploaded_file.file_id
+    return stored
+
+# Analysis modes offered above the uploader
+SINGLE_MODE = "📷 Single Image"
+BATCH_MODE = "🗂️ Batch Analysis"
+# Images decoded and scored per step in batch mode; bounds memory for large uploads
+BATCH_CHUNK_SIZE = 16
+
+def display_export_buttons(results, handler, file_stem, key):
+    """JSON / CSV / HTML downloads of (name, PredictionResult) pairs, with the default disease_info fields"""
+    from crop_disease_detector.services.exporters import MIME_TYPES, export_results
+
+    classes = getattr(handler, 'classes', None) or sorted(results[0][1].probabilities)
+    columns = st.columns(3)
+    for column, (export_format, label) in zip(columns, [('json', "🧾 JSON"), ('csv', "📊 CSV"), ('html', "🌐 HTML")]):
+        column.download_button(
+            label=label,
+            data=export_results(results, export_format, classes, handler.get_disease_info),
+            file_name=f"{file_stem}.{export_format}",
+            mime=MIME_TYPES[export_format],
+            key=f"export_{key}_{export_format}",
+            use_container_width=True,
+        )
 
 # Logic for displaying results using handler data
-def display_prediction_results(result, handler):
+def display_prediction_results(result, handler, image=None, name=None):
     """Display prediction results in a professional format"""
-    # Import here to avoid circular dependencies if any, though likely fine at top
-    from crop_disease_detector.services.report_generator import ReportGenerator
-    
     info = handler.get_disease_info(result.predicted_class)
     
     # Result Header
@@ -325,35 +363,40 @@ def display_prediction_results(result, handler):
     st.progress(result.confidence_score / 100)
     
     # PDF Report Download
-    # Create the report
+    # Built only on request and cached, so reruns (widget toggles) never touch ReportLab
     try:
-        # Determine crop_type (it's not passed here directly, but we can infer or pass it. 
-        # For now, let's look at the result object or handler properties. 
-        # Handler is specialized, so we can check type(handler).
-        from crop_disease_detector.services.disease_handlers import RiceDiseaseHandler, PulseDiseaseHandler
-        if isinstance(handler, RiceDiseaseHandler):
-            crop_name = "Rice"
-        elif isinstance(handler, PulseDiseaseHandler):
-            crop_name = "Pulse"
-        else:
-            crop_name = "Crop"
+        from crop_disease_detector.services.container import DependencyContainer
+        container = DependencyContainer.get_instance()
+        # Every handler advertises its crop, so no type checks are needed here
+        crop_name = getattr(handler, 'crop_name', "Crop")
 
-        # Get uploaded image from session state if available
-        uploaded_img = st.session_state.get('uploaded_image') # We need to ensure this is set when uploading
-        
-        pdf_bytes = ReportGenerator.generate_pdf_report(result, info, crop_name, uploaded_img)
-        
-        st.download_button(
-            label="📄 Download Report as PDF",
-            data=pdf_bytes,
-            file_name=f"disease_report_{result.predicted_class.replace(' ', '_')}.pdf",
-            mime="application/pdf",
-            key="pdf_download_btn",
-            help="Download a detailed PDF report of this analysis"
-        )
+        # Use the explicitly passed image (batch drill-down), else this session's stored upload
+        if image is None:
+            image = container.session_store.get(st.session_state.session_key)
+
+        report_key = container.report_cache.key_for(result, crop_name, image)
+        pdf_bytes = container.report_cache.peek(report_key)
+        if pdf_bytes is None and st.button("📄 Prepare PDF Report", key=f"pdf_prepare_{report_key[:16]}",
+                                           help="Build a detailed PDF report of this analysis"):
+            with st.spinner("📄 Building report..."):
+                pdf_bytes = container.report_cache.get_or_generate(result, info, crop_name, image)
+
+        if pdf_bytes is not None:
+            st.download_button(
+                label="📄 Download Report as PDF",
+                data=pdf_bytes,
+                file_name=f"disease_report_{result.predicted_class.replace(' ', '_')}.pdf",
+                mime="application/pdf",
+                key="pdf_download_btn",
+                help="Download a detailed PDF report of this analysis"
+            )
     except Exception as e:
         st.error(f"Could not generate PDF report: {e}")
 
+    # Machine-readable exports: microseconds to build, so they are offered on every run
+    display_export_buttons([(name or "image", result)], handler,
+                           f"disease_result_{result.predicted_class.replace(' ', '_')}", key="single")
+
     
     # All Probabilities
     with st.expander("📈 View All Disease Probabilities", expanded=False):
@@ -425,6 +468,163 @@ def display_disease_info(predicted_class, handler):
         </div>
         """, unsafe_allow_html=True)
 
+def display_name_for(predicted_class):
+    """Human-friendly label for a class name"""
+    return "Healthy Plant" if predicted_class == "_Healthy" else predicted_class
+
+def run_batch_analysis(handler, uploaded_files, chunk_size=BATCH_CHUNK_SIZE):
+    """
+    Scores uploaded files chunk by chunk through the handler's batched API.
+    Only one chunk of decoded images is alive at a time, so memory stays bounded
+    no matter how many photos were uploaded.
+    """
+    results = []
+    progress = st.progress(0.0, text="🔄 Analyzing images...")
+    for start in range(0, len(uploaded_files), chunk_size):
+        chunk = uploaded_files[start:start + chunk_size]
+        for uploaded in chunk:
+            uploaded.seek(0)
+        # The handler decodes the raw uploads itself (reduced-size JPEG decoding),
+        # and reports unreadable files per item
+        chunk_results = handler.predict_batch(chunk, batch_size=chunk_size)
+        results.extend((uploaded.name, result) for uploaded, result in zip(chunk, chunk_results))
+        done = min(start + chunk_size, len(uploaded_files))
+        progress.progress(done / len(uploaded_files), text=f"🔄 Analyzed {done}/{len(uploaded_files)} images")
+    progress.empty()
+    return results
+
+# Name of the batch report file in the session store, which deletes it with abandoned sessions
+FIELD_REPORT_FILE = "field_report"
+
+def discard_field_report():
+    """Deletes this session's consolidated report file, if any."""
+    from crop_disease_detector.services.container import DependencyContainer
+    DependencyContainer.get_instance().session_store.discard_file(st.session_state.session_key, FIELD_REPORT_FILE)
+
+def display_field_report(handler, crop_type, uploaded_files, batch_results):
+    """One consolidated PDF for the whole batch, built on request into a temporary file"""
+    from crop_disease_detector.services.container import DependencyContainer
+    container = DependencyContainer.get_instance()
+    session_store = container.session_store
+    max_images = container.field_report_max_images
+    pages = sum(1 for _, result in batch_results if result.ok)
+    with st.expander("📑 Field Report (PDF)", expanded=False):
+        st.caption(f"Covers up to {max_images} images; the whole report is held in memory while it is built.")
+        too_large = pages > max_images
+        if too_large:
+            st.warning(f"⚠️ This batch has {pages} analyzed images. Split it into batches of at most "
+                       f"{max_images} images to build field reports.")
+        include_appendix = st.checkbox("Include disease reference appendix", value=True, key="field_report_appendix")
+        if st.button("📑 Build Field Report", key="field_report_btn", disabled=too_large,
+                     help="Summary page, one page per image and a reference appendix per disease"):
+            from crop_disease_detector.services.report_generator import ReportGenerator
+            discard_field_report()
+            # Uploads are handed over as file objects and read one at a time by the generator
+            entries = [(name, result, uploaded) for (name, result), uploaded in zip(batch_results, uploaded_files)]
+            with st.spinner(f"📑 Building report for {len(entries)} images..."), stage_timer("report"):
+                path = ReportGenerator.generate_field_report(
+                    entries, crop_type, handler.get_disease_info, include_appendix=include_appendix,
+                    max_images=max_images
+                )
+            session_store.put_file(st.session_state.session_key, FIELD_REPORT_FILE, path)
+
+        path = session_store.file(st.session_state.session_key, FIELD_REPORT_FILE)
+        if path and os.path.exists(path):
+            with open(path, 'rb') as report:
+                st.download_button(
+                    label="📄 Download Field Report",
+                    data=report,
+                    file_name=f"field_report_{crop_type.split()[-1].lower()}.pdf",
+                    mime="application/pdf",
+                    key="field_report_download_btn",
+                )
+
+def display_batch_analysis(handler, crop_type):
+    """Multi-image upload, batched scoring, results table and per-image drill-down"""
+    uploaded_files = st.file_uploader(
+        "📁 Choose leaf images",
+        type=["jpg", "jpeg", "png"],
+        accept_multiple_files=True,
+        key="batch_uploader",
+        help="Select all photos taken in the same field"
+    )
+    if not uploaded_files:
+        st.info("📂 Upload several images to analyze them together.")
+        return
+
+    # Results belong to a specific crop and file selection; anything else is stale
+    batch_key = (crop_type, tuple(f.file_id for f in uploaded_files))
+    if st.session_state.get('batch_key') != batch_key:
+        st.session_state.batch_key = None
+        st.session_state.batch_results = None
+        discard_field_report()
+
+    if st.button(f"🚀 Analyze {len(uploaded_files)} Images", type="primary", use_container_width=True):
+        st.session_state.batch_results = run_batch_analysis(handler, uploaded_files)
+        st.session_state.batch_key = batch_key
+        st.success("✅ Batch Analysis Complete!")
+
+    batch_results = st.session_state.get('batch_results')
+    if not batch_results:
+        return
+
+    st.markdown("### 📋 Batch Results")
+    rows = []
+    for name, result in batch_results:
+        info = handler.get_disease_info(result.predicted_class) if result.ok else {}
+        rows.append({
+            "Image": name,
+            "Prediction": display_name_for(result.predicted_class) if result.ok else "—",
+            "Confidence (%)": round(result.confidence_score, 1),
+            "Severity": info.get('severity', 'Unknown') if result.ok else "—",
+            "Status": "✅ OK" if result.ok else f"❌ {result.error}",
+        })
+    st.dataframe(rows, use_container_width=True, hide_index=True)
+
+    st.markdown("#### ⬇️ Export Results")
+    display_export_buttons(batch_results, handler, f"batch_results_{crop_type.split()[-1].lower()}", key="batch")
+    display_field_report(handler, crop_type, uploaded_files, batch_results)
+
+    # Results are in upload order, so an index identifies both the result and its file
+    scored = [i for i, (_, result) in enumerate(batch_results) if result.ok]
+    if not scored:
+        return
+
+    st.markdown("### 🔎 Image Details")
+    selected = st.selectbox("Select an image", scored, format_func=lambda i: batch_results[i][0], key="batch_detail_select")
+    name, result = batch_results[selected]
+
+    # Only the image being inspected is read; it is decoded only if its report is built
+    image = stored_upload(uploaded_files[selected], batch=True)
+    st.image(image.data, width=320, caption=name)
+    display_prediction_results(result, handler, image=image, name=name)
+    display_disease_info(result.predicted_class, handler)
+
+def display_metrics_panel():
+    """Sidebar panel with per-stage timings (process-wide, across all sessions)."""
+    metrics = StageMetrics.get_instance()
+    with st.expander("🐞 Performance Debug", expanded=False):
+        # Collection is a deployment setting: the timers are shared by every session of this process
+        if metrics.enabled:
+            st.caption("Collecting stage timings (decode, preprocess, forward, postprocess, report).")
+        else:
+            st.caption("Stage timings are off. Start the app with CROP_DETECTOR_METRICS=1 to collect them.")
+        summary = metrics.summary()
+        if not summary:
+            st.caption("No timings recorded yet.")
+            return
+        st.dataframe(
+            [{"Stage": stage, "Count": s["count"], "Mean (ms)": round(s["mean_ms"], 1),
+              "p95 (ms)": round(s["p95_ms"], 1), "Max (ms)": round(s["max_ms"], 1)}
+             for stage, s in summary.items()],
+            hide_index=True, use_container_width=True
+        )
+        col1, col2 = st.columns(2)
+        col1.download_button("JSON", metrics.to_json(), file_name="stage_metrics.json", mime="application/json")
+        col2.download_button("Prometheus", metrics.to_prometheus(), file_name="stage_metrics.prom", mime="text/plain")
+        if st.button("Reset timings"):
+            metrics.reset()
+
 # Main Application
 def main():
     # Load custom CSS
@@ -437,6 +637,8 @@ def main():
     # The App doesn't know HOW to create Auth or Handlers, it just asks the container.
     from crop_disease_detector.services.container import DependencyContainer
     container = DependencyContainer.get_instance()
+    # Load both models in the background while the user logs in (no-op after the first run)
+    container.preloader.start()
     
     # Auth Service Usage
     auth = container.auth_service
@@ -468,13 +670,28 @@ def main():
             st.markdown("---")
             st.markdown("### 📊 Model Status")
             
-            # Show status for BOTH crops
-            if crop_type == "🌾 Rice":
-                st.success("✅ Rice Model: Ready")
-                st.info("⏸️ Pulse Model: Standby")
-            else:
-                st.info("⏸️ Rice Model: Standby")
-                st.success("✅ Pulse Model: Ready")
+            # Show status for BOTH crops (live, from the background preloader)
+            for status in container.preloader.statuses():
+                if status.ready:
+                    st.success(f"✅ {status.crop_name} Model: Ready ({status.load_seconds:.1f}s)")
+                elif status.state == "failed":
+                    st.warning(f"⚠️ {status.crop_name} Model: Unavailable")
+                elif status.state == "loading":
+                    st.info(f"⏳ {status.crop_name} Model: Loading...")
+                else:
+                    st.info(f"⏸️ {status.crop_name} Model: Standby")
+
+            # Shared model cache counters (one load per model per process)
+            from crop_disease_detector.services.model_cache import ModelCache
+            cache_stats = ModelCache.get_instance().stats()
+            st.caption(f"🧠 Model cache: {cache_stats.entries} loaded · {cache_stats.hits} hits · {cache_stats.misses} misses")
+            prediction_stats = container.prediction_cache.stats()
+            st.caption(f"⚡ Prediction cache: {prediction_stats.entries} stored · {prediction_stats.hit_rate:.0%} hit rate")
+            report_stats = container.report_cache.stats()
+            st.caption(f"📄 Report cache: {report_stats.entries} built · {report_stats.hits} reused")
+            footprint = container.session_store.footprint()
+            st.caption(f"🖼️ Session images: {footprint.sessions} sessions · {footprint.bytes / 1e6:.1f} MB")
+            display_metrics_panel()
             
             st.markdown("---")
             st.markdown("### ℹ️ Quick Info")
@@ -573,84 +790,97 @@ def main():
             else:
                 st.markdown("## 🫘 Pulse Disease Detection")
         
-            # Load model via handler
-            success, error = handler.load_model()
+            # Load model via handler (waits for the background preload if it is still running)
+            with st.spinner("⏳ Loading model..."):
+                success, error = handler.load_model()
             
             if success:
                 st.success(f"🎯 {len(handler.classes) if hasattr(handler, 'classes') else 0} Diseases Support")
                 
-                # File uploader
-                uploaded_file = st.file_uploader(
-                    "📁 Choose a leaf image",
-                    type=["jpg", "jpeg", "png"],
-                    help="Upload a clear, well-lit image"
+                # Batch mode scores many field photos in one go; single mode is the classic flow
+                analysis_mode = st.radio(
+                    "🧭 Analysis Mode",
+                    [SINGLE_MODE, BATCH_MODE],
+                    horizontal=True,
+                    help="Batch mode analyzes many images from the same field at once"
                 )
+
+                if analysis_mode == BATCH_MODE:
+                    display_batch_analysis(handler, crop_type)
+                else:
+                    # File uploader
+                    uploaded_file = st.file_uploader(
+                        "📁 Choose a leaf image",
+                        type=["jpg", "jpeg", "png"],
+                        help="Upload a clear, well-lit image"
+                    )
                 
-                if uploaded_file is not None:
-                    col1, col2 = st.columns([1, 1])
+                    if uploaded_file is not None:
+                        col1, col2 = st.columns([1, 1])
                     
-                    with col1:
-                        st.markdown("### 📸 Uploaded Image")
-                        try:
-                            image = Image.open(uploaded_file).convert('RGB')
-                            st.session_state.uploaded_image = image
-                            st.image(image, use_container_width=True, caption="Your uploaded image")
-                        except Exception as e:
-                            st.error(f"Error loading image: {str(e)}")
-                            return
+                        with col1:
+                            st.markdown("### 📸 Uploaded Image")
+                            try:
+                                # Keep the compressed upload (or a bounded thumbnail), never decoded pixels
+                                data = uploaded_file.getvalue()
+                                stored_upload(uploaded_file)
+                                st.image(data, use_container_width=True, caption="Your uploaded image")
+                            except Exception as e:
+                                st.error(f"Error loading image: {str(e)}")
+                                return
                     
-                    with col2:
-                        st.markdown("### 🔬 Analysis")
-                        if st.button("🚀 Analyze Disease", type="primary", use_container_width=True):
-                            with st.spinner("🔄 Analyzing image... Please wait"):
-                                # LSP Correction: Handle PredictionResult object
-                                result = handler.predict(image)
+                        with col2:
+                            st.markdown("### 🔬 Analysis")
+                            if st.button("🚀 Analyze Disease", type="primary", use_container_width=True):
+                                with st.spinner("🔄 Analyzing image... Please wait"):
+                                    # LSP Correction: Handle PredictionResult object
+                                    result = handler.predict(data)
                                 
-                                if result is not None:
-                                    st.session_state.prediction_made = True
-                                    st.session_state.current_prediction = result
-                                    st.success("✅ Analysis Complete!")
+                                    if result is not None:
+                                        st.session_state.prediction_made = True
+                                        st.session_state.current_prediction = result
+                                        st.success("✅ Analysis Complete!")
                     
-                    # Display results if prediction was made
-                    if st.session_state.prediction_made and st.session_state.current_prediction:
-                        result = st.session_state.current_prediction
-                        # Passing result object instead of unpacked values
-                        display_prediction_results(result, handler)
-                        display_disease_info(result.predicted_class, handler)
+                        # Display results if prediction was made
+                        if st.session_state.prediction_made and st.session_state.current_prediction:
+                            result = st.session_state.current_prediction
+                            # Passing result object instead of unpacked values
+                            display_prediction_results(result, handler, name=uploaded_file.name)
+                            display_disease_info(result.predicted_class, handler)
                         
-                else:
-                    # Tips section
-                    st.markdown("---")
-                    st.markdown("## 📋 Getting Started")
+                    else:
+                        # Tips section
+                        st.markdown("---")
+                        st.markdown("## 📋 Getting Started")
                     
-                    col_tip1, col_tip2 = st.columns([1, 1], gap="large")
+                        col_tip1, col_tip2 = st.columns([1, 1], gap="large")
                     
-                    with col_tip1:
-                        st.markdown("""
-                        <div class="custom-card">
-                            <h3>💡 Tips for Best Results</h3>
-                            <ul>
-                                <li style='color: #4b5563; font-size: 1rem;'>📷 Use clear, well-lit images</li>
-                                <li style='color: #4b5563; font-size: 1rem;'>🎯 Focus on the affected leaf area</li>
-                                <li style='color: #4b5563; font-size: 1rem;'>❌ Avoid blurry or dark images</li>
-                                <li style='color: #4b5563; font-size: 1rem;'>🔍 Ensure the leaf fills most of the frame</li>
-                                <li style='color: #4b5563; font-size: 1rem;'>🌿 Capture multiple angles if possible</li>
-                            </ul>
-                        </div>
-                        """, unsafe_allow_html=True)
+                        with col_tip1:
+                            st.markdown("""
+                            <div class="custom-card">
+                                <h3>💡 Tips for Best Results</h3>
+                                <ul>
+                                    <li style='color: #4b5563; font-size: 1rem;'>📷 Use clear, well-lit images</li>
+                                    <li style='color: #4b5563; font-size: 1rem;'>🎯 Focus on the affected leaf area</li>
+                                    <li style='color: #4b5563; font-size: 1rem;'>❌ Avoid blurry or dark images</li>
+                                    <li style='color: #4b5563; font-size: 1rem;'>🔍 Ensure the leaf fills most of the frame</li>
+                                    <li style='color: #4b5563; font-size: 1rem;'>🌿 Capture multiple angles if possible</li>
+                                </ul>
+                            </div>
+                            """, unsafe_allow_html=True)
                     
-                    with col_tip2:
-                        st.markdown("""
-                        <div class="custom-card">
-                            <h3>🎯 System Status</h3>
-                            <ul>
-                                <li style='color: #10b981; font-size: 1rem;'>✅ AI Model Loaded</li>
-                                <li style='color: #10b981; font-size: 1rem;'>✅ Secure Login Active</li>
-                                <li style='color: #10b981; font-size: 1rem;'>✅ Database Connected</li>
-                                <li style='color: #10b981; font-size: 1rem;'>✅ Ready for Analysis</li>
-                            </ul>
-                        </div>
-                        """, unsafe_allow_html=True)
+                        with col_tip2:
+                            st.markdown("""
+                            <div class="custom-card">
+                                <h3>🎯 System Status</h3>
+                                <ul>
+                                    <li style='color: #10b981; font-size: 1rem;'>✅ AI Model Loaded</li>
+                                    <li style='color: #10b981; font-size: 1rem;'>✅ Secure Login Active</li>
+                                    <li style='color: #10b981; font-size: 1rem;'>✅ Database Connected</li>
+                                    <li style='color: #10b981; font-size: 1rem;'>✅ Ready for Analysis</li>
+                                </ul>
+                            </div>
+                            """, unsafe_allow_html=True)
             else:
                  # Handler exists but failed to load model
                  st.error(f"❌ Failed to load model: {error}")
@@ -0,0 +1,6 @@
+# Model input geometry and normalization, shared by training and inference.
+# Kept free of imports so models/ and services/ can share it without importing each other.
+INPUT_SIZE = 224
+# ImageNet statistics used when the models were trained
+IMAGENET_MEAN = (0.485, 0.456, 0.406)
+IMAGENET_STD = (0.229, 0.224, 0.225)
@@ -4,6 +4,6 @@ Models package - Neural network architectures and trained weights
 Contains CNN architecture definitions and pre-trained model files.
 """
 
-from crop_disease_detector.models.architecture import CNNModel
+from crop_disease_detector.models.architecture import CNNModel, HEAD_TYPES, make_checkpoint, split_checkpoint
 
-__all__ = ["CNNModel"]
+__all__ = ["CNNModel", "HEAD_TYPES", "make_checkpoint", "split_checkpoint"]
@@ -1,10 +1,21 @@
+import torch
 import torch.nn as nn
 
+# Classifier head variants
+# - "flatten": original head, flattens the 128x28x28 feature map into fc1
+#   (~51M parameters, ~197 MB checkpoints, input fixed to 224x224)
+# - "gap": adaptive global average pooling before fc1
+#   (a few MB, works with any input size)
+HEAD_TYPES = ("flatten", "gap")
+
 # Define CNN Model Architecture
 # Moved from app.py to follow Single Responsibility Principle (SRP)
 class CNNModel(nn.Module):
-    def __init__(self, num_classes):
+    def __init__(self, num_classes, head="flatten"):
         super(CNNModel, self).__init__()
+        if head not in HEAD_TYPES:
+            raise ValueError(f"Unknown head: {head!r} (expected one of {HEAD_TYPES})")
+        self.head = head
         self.conv1_1 = nn.Conv2d(3, 32, kernel_size=3, padding=1)
         self.conv1_2 = nn.Conv2d(32, 32, kernel_size=3, padding=1)
         self.conv2_1 = nn.Conv2d(32, 64, kernel_size=3, padding=1)
@@ -12,11 +23,15 @@ class CNNModel(nn.Module):
         self.conv3_1 = nn.Conv2d(64, 128, kernel_size=3, padding=1)
         self.conv3_2 = nn.Conv2d(128, 128, kernel_size=3, padding=1)
         self.pool = nn.MaxPool2d(2, 2)
-        self.fc1 = nn.Linear(128 * 28 * 28, 512)
+        if head == "gap":
+            self.global_pool = nn.AdaptiveAvgPool2d(1)
+            self.fc1 = nn.Linear(128, 512)
+        else:
+            self.fc1 = nn.Linear(128 * 28 * 28, 512)
         self.fc2 = nn.Linear(512, num_classes)
         self.dropout = nn.Dropout(0.5)
         self.relu = nn.ReLU()
-        
+
     def forward(self, x):
         x = self.relu(self.conv1_1(x))
         x = self.relu(self.conv1_2(x))
@@ -27,8 +42,31 @@ class CNNModel(nn.Module):
         x = self.relu(self.conv3_1(x))
         x = self.relu(self.conv3_2(x))
         x = self.pool(x)
-        x = x.view(-1, 128 * 28 * 28)
+        if self.head == "gap":
+            x = torch.flatten(self.global_pool(x), 1)
+        else:
+            x = x.view(-1, 128 * 28 * 28)
         x = self.relu(self.fc1(x))
         x = self.dropout(x)
         x = self.fc2(x)
         return x
+
+def make_checkpoint(model, classes):
+    """
+    Wraps a trained model's weights with the metadata needed to rebuild it.
+    Saved by the training scripts; read back with `split_checkpoint`.
+    """
+    return {
+        'state_dict': model.state_dict(),
+        'metadata': {'head': model.head, 'num_classes': len(classes), 'classes': list(classes)},
+    }
+
+def split_checkpoint(checkpoint):
+    """
+    Returns (state_dict, metadata) for both checkpoint layouts.
+    Older checkpoints are bare state dicts; their head is inferred from the width of fc1.
+    """
+    if 'state_dict' in checkpoint:
+        return checkpoint['state_dict'], dict(checkpoint.get('metadata', {}))
+    head = "gap" if checkpoint['fc1.weight'].shape[1] == 128 else "flatten"
+    return checkpoint, {'head': head, 'num_classes': checkpoint['fc2.weight'].shape[0]}
@@ -0,0 +1,192 @@
+import hashlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import torch
+from PIL import Image
+from torch.utils.data import Dataset
+
+from crop_disease_detector.input_spec import IMAGENET_MEAN, IMAGENET_STD, INPUT_SIZE
+
+# Preprocessed training data, decoded and resized once:
+#   images.npy     uint8 (N, 3, size, size), read through np.memmap
+#   labels.npy     int64 (N,)
+#   manifest.json  classes, size, and path/size/mtime/sha256 of every source file
+# The manifest is written last, so an interrupted build is never mistaken for a valid cache.
+CACHE_VERSION = 1
+IMAGES_FILE = "images.npy"
+LABELS_FILE = "labels.npy"
+MANIFEST_FILE = "manifest.json"
+
+def _file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+def _prepare(args: Tuple[str, int]) -> Tuple[np.ndarray, str]:
+    """
+    Worker task: one image as uint8 (3, size, size), resized exactly like
+    transforms.Resize((size, size)) on a PIL image, plus the SHA-256 of the file (read once).
+    """
+    path, size = args
+    with open(path, "rb") as f:
+        data = f.read()
+    with Image.open(BytesIO(data)) as image:
+        pixels = np.asarray(image.convert("RGB").resize((size, size), Image.BILINEAR))
+    return pixels.transpose(2, 0, 1), hashlib.sha256(data).hexdigest()
+
+def scan_image_folder(data_dir: str) -> Tuple[List[str], List[Tuple[str, int]]]:
+    """Classes and (path, label) samples in the same order as torchvision's ImageFolder."""
+    from torchvision.datasets.folder import find_classes, make_dataset, IMG_EXTENSIONS
+
+    classes, class_to_idx = find_classes(data_dir)
+    return classes, make_dataset(data_dir, class_to_idx, extensions=IMG_EXTENSIONS)
+
+def load_manifest(cache_dir: str) -> Optional[Dict]:
+    path = os.path.join(cache_dir, MANIFEST_FILE)
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+def cache_is_stale(data_dir: str, cache_dir: str, size: int = INPUT_SIZE, verify_hashes: bool = False) -> Optional[str]:
+    """
+    Returns why the cache in `cache_dir` does not match `data_dir` (None when it is current).
+    Files whose size and mtime are unchanged are trusted unless `verify_hashes` is set;
+    touched files are re-hashed, so a copy with new timestamps does not force a rebuild.
+    """
+    manifest = load_manifest(cache_dir)
+    if manifest is None:
+        return "no cache"
+    if manifest.get("version") != CACHE_VERSION or manifest.get("size") != size:
+        return "built with a different version or image size"
+    classes, samples = scan_image_folder(data_dir)
+    if classes != manifest["classes"]:
+        return "class folders changed"
+    entries = manifest["files"]
+    if [(os.path.relpath(path, data_dir), label) for path, label in samples] != [(e["path"], e["label"]) for e in entries]:
+        return "files added, removed or relabeled"
+    for entry in entries:
+        path = os.path.join(data_dir, entry["path"])
+        stat = os.stat(path)
+        unchanged = stat.st_size == entry["bytes"] and stat.st_mtime_ns == entry["mtime_ns"]
+        if (verify_hashes or not unchanged) and _file_sha256(path) != entry["sha256"]:
+            return f"{entry['path']} changed"
+    return None
+
+def build_dataset_cache(data_dir: str, cache_dir: str, size: int = INPUT_SIZE, workers: Optional[int] = None,
+                        progress=None) -> Dict:
+    """
+    Decodes and resizes every image of an ImageFolder tree once into a uint8 memmap.
+    Decoding runs on `workers` processes; rows are written in sample order.
+    Returns the manifest.
+    """
+    classes, samples = scan_image_folder(data_dir)
+    if not samples:
+        raise ValueError(f"No images found in {data_dir}")
+    os.makedirs(cache_dir, exist_ok=True)
+    manifest_path = os.path.join(cache_dir, MANIFEST_FILE)
+    if os.path.exists(manifest_path):
+        os.remove(manifest_path)
+
+    images = np.lib.format.open_memmap(os.path.join(cache_dir, IMAGES_FILE), mode="w+", dtype=np.uint8,
+                                       shape=(len(samples), 3, size, size))
+    files = []
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count() or 1) as pool:
+        prepared = pool.map(_prepare, [(path, size) for path, _ in samples], chunksize=16)
+        for index, ((path, label), (pixels, sha256)) in enumerate(zip(samples, prepared)):
+            images[index] = pixels
+            stat = os.stat(path)
+            files.append({"path": os.path.relpath(path, data_dir), "label": label, "bytes": stat.st_size,
+                          "mtime_ns": stat.st_mtime_ns, "sha256": sha256})
+            if progress is not None:
+                progress(index + 1, len(samples))
+    images.flush()
+    del images
+    np.save(os.path.join(cache_dir, LABELS_FILE), np.array([label for _, label in samples], dtype=np.int64))
+
+    manifest = {"version": CACHE_VERSION, "size": size, "classes": classes, "files": files}
+    with open(manifest_path + ".tmp", "w") as f:
+        json.dump(manifest, f, indent=1)
+    os.replace(manifest_path + ".tmp", manifest_path)
+    return manifest
+
+def ensure_dataset_cache(data_dir: str, cache_dir: str, size: int = INPUT_SIZE, workers: Optional[int] = None,
+                         verify_hashes: bool = False, force: bool = False, progress=None) -> Optional[str]:
+    """Builds the cache when it is missing or stale. Returns why it was (re)built, None if it was current."""
+    reason = "forced" if force else cache_is_stale(data_dir, cache_dir, size, verify_hashes)
+    if reason is not None:
+        build_dataset_cache(data_dir, cache_dir, size, workers, progress)
+    return reason
+
+class MemmapImageDataset(Dataset):
+    """
+    Training dataset backed by a prepared uint8 memmap cache (see build_dataset_cache).
+    Indexing with a list of indices returns a whole normalized batch, converted and
+    normalized in one vectorized step; use it with a BatchSampler and batch_size=None
+    (see `batch_loader_kwargs`). Indexing with an int returns a single sample.
+    """
+
+    def __init__(self, cache_dir: str, indices: Optional[Sequence[int]] = None,
+                 mean: Sequence[float] = IMAGENET_MEAN, std: Sequence[float] = IMAGENET_STD):
+        manifest = load_manifest(cache_dir)
+        if manifest is None:
+            raise FileNotFoundError(f"No dataset cache in {cache_dir}")
+        self.cache_dir = cache_dir
+        self.classes: List[str] = manifest["classes"]
+        self.labels = torch.from_numpy(np.load(os.path.join(cache_dir, LABELS_FILE)))
+        self.indices = np.arange(len(self.labels)) if indices is None else np.asarray(indices)
+        mean_t = torch.tensor(mean, dtype=torch.float32)
+        std_t = torch.tensor(std, dtype=torch.float32)
+        # (x / 255 - mean) / std  ==  x * scale + offset, as in ImagePreprocessor
+        self._scale = (1.0 / (255.0 * std_t)).view(1, 3, 1, 1)
+        self._offset = (-mean_t / std_t).view(1, 3, 1, 1)
+        # Opened lazily, so each DataLoader worker maps the file itself
+        self._images = None
+
+    @property
+    def images(self) -> np.ndarray:
+        if self._images is None:
+            self._images = np.load(os.path.join(self.cache_dir, IMAGES_FILE), mmap_mode="r")
+        return self._images
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["_images"] = None
+        return state
+
+    def __len__(self) -> int:
+        return len(self.indices)
+
+    def subset(self, positions: Sequence[int]) -> "MemmapImageDataset":
+        """Dataset over a subset of this one's samples (e.g. a train/val split)."""
+        subset = MemmapImageDataset.__new__(MemmapImageDataset)
+        subset.__dict__.update(self.__getstate__())
+        subset.indices = self.indices[np.asarray(positions)]
+        return subset
+
+    def __getitem__(self, index):
+        if isinstance(index, (int, np.integer)):
+            images, labels = self[[index]]
+            return images[0], labels[0]
+        rows = self.indices[np.asarray(index)]
+        # Sorted reads are sequential on disk; the batch is put back in sampler order after
+        order = np.argsort(rows)
+        pixels = np.empty((len(rows), *self.images.shape[1:]), dtype=np.uint8)
+        pixels[order] = self.images[rows[order]]
+        batch = torch.from_numpy(pixels).float()
+        batch.mul_(self._scale).add_(self._offset)
+        return batch, self.labels[torch.from_numpy(rows)]
+
+def batch_loader_kwargs(dataset: MemmapImageDataset, batch_size: int, shuffle: bool) -> Dict:
+    """DataLoader arguments that fetch whole batches from a MemmapImageDataset in one call."""
+    from torch.utils.data import BatchSampler, RandomSampler, SequentialSampler
+
+    sampler = RandomSampler(dataset) if shuffle else SequentialSampler(dataset)
+    return {"sampler": BatchSampler(sampler, batch_size=batch_size, drop_last=False), "batch_size": None}
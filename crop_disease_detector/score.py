@@ -0,0 +1,242 @@
+"""
+Bulk scoring of image directories and zip archives, without the Streamlit UI.
+
+Usage:
+    python -m crop_disease_detector.score --crop rice photos/ --output scores.jsonl
+    python -m crop_disease_detector.score --crop pulse field_2024.zip --output scores.csv
+    python -m crop_disease_detector.score --crop rice photos/ --output results.html --info-fields severity treatment
+
+The output format follows the extension: .jsonl, .csv, .json or .html. Re-running with
+the same .jsonl or .csv output resumes where the previous run stopped (.json and .html
+files are rewritten).
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from typing import Any, Callable, Iterable, Iterator, List, Optional, Sequence, Set, Tuple
+
+from crop_disease_detector.services.exporters import (
+    DEFAULT_INFO_FIELDS, RESUMABLE_FORMATS, csv_fieldnames, exporter_for, format_for_path,
+)
+from crop_disease_detector.services.interfaces import PredictionResult
+from crop_disease_detector.services.metrics import StageMetrics
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp', '.webp', '.tif', '.tiff')
+
+Source = Tuple[str, Callable[[], bytes]]
+
+def _is_image(name: str) -> bool:
+    return name.lower().endswith(IMAGE_EXTENSIONS)
+
+def _read_file(path: str) -> Callable[[], bytes]:
+    def read() -> bytes:
+        with open(path, 'rb') as f:
+            return f.read()
+    return read
+
+def iter_sources(input_path: str) -> Iterator[Source]:
+    """
+    Yields (name, reader) for every image in a directory tree or zip archive, in a stable order.
+    Readers are only called by the decode workers, so nothing is read ahead of need.
+    """
+    if zipfile.is_zipfile(input_path):
+        archive = zipfile.ZipFile(input_path)
+        for info in sorted(archive.infolist(), key=lambda i: i.filename):
+            if not info.is_dir() and _is_image(info.filename):
+                yield info.filename, (lambda name=info.filename: archive.read(name))
+        return
+    if os.path.isfile(input_path):
+        yield input_path, _read_file(input_path)
+        return
+    for root, dirs, files in os.walk(input_path):
+        dirs.sort()
+        for name in sorted(files):
+            if _is_image(name):
+                path = os.path.join(root, name)
+                yield os.path.relpath(path, input_path), _read_file(path)
+
+def _truncate_partial_line(path: str, block_size: int = 64 * 1024):
+    """
+    Drops a half-written last line left behind by an interrupted run.
+    Reads backwards from the end in fixed-size blocks, so only the tail of a large
+    output file is touched.
+    """
+    with open(path, 'rb+') as f:
+        end = f.seek(0, os.SEEK_END)
+        position = end
+        while position > 0:
+            start = max(0, position - block_size)
+            f.seek(start)
+            block = f.read(position - start)
+            if position == end and block.endswith(b'\n'):
+                return
+            newline = block.rfind(b'\n')
+            if newline >= 0:
+                f.truncate(start + newline + 1)
+                return
+            position = start
+        # No complete line at all
+        if end:
+            f.truncate(0)
+
+def completed_files(output_path: str) -> Set[str]:
+    """Names already present in an existing JSONL or CSV output file."""
+    if not os.path.exists(output_path) or format_for_path(output_path) not in RESUMABLE_FORMATS:
+        return set()
+    _truncate_partial_line(output_path)
+    with open(output_path, newline='', encoding='utf-8') as f:
+        if format_for_path(output_path) == 'csv':
+            return {row['file'] for row in csv.DictReader(f)}
+        return {json.loads(line)['file'] for line in f if line.strip()}
+
+class ResultWriter:
+    """
+    Writes one record per image to a JSON Lines, CSV, JSON or HTML file (by extension),
+    flushing after every batch. JSON Lines and CSV files are appended to, so runs resume;
+    a CSV file is only resumed with the columns it was started with (ValueError otherwise).
+    """
+
+    def __init__(self, output_path: str, classes: List[str], info_for=None,
+                 info_fields: Sequence[str] = DEFAULT_INFO_FIELDS):
+        self.format = format_for_path(output_path)
+        append = (self.format in RESUMABLE_FORMATS and os.path.exists(output_path)
+                  and os.path.getsize(output_path) > 0)
+        if append and self.format == 'csv':
+            with open(output_path, newline='', encoding='utf-8') as f:
+                header = next(csv.reader(f), [])
+            expected = csv_fieldnames(classes, info_fields, info_for is not None)
+            if header != expected:
+                raise ValueError(f"{output_path} has the columns {', '.join(header)}; this run would write "
+                                 f"{', '.join(expected)}. Resume with the same --info-fields or use --no-resume.")
+        self._file = open(output_path, 'a' if append else 'w', newline='', encoding='utf-8')
+        self._exporter = exporter_for(self.format, self._file, classes, info_for, info_fields, append=append)
+
+    def write(self, name: str, result: PredictionResult):
+        self._exporter.write(name, result)
+
+    def flush(self):
+        self._exporter.flush()
+
+    def close(self):
+        self._exporter.finish()
+        self._file.close()
+
+def _batches(items: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    iterator = iter(items)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+def score_sources(handler, sources: Iterable[Source], writer: ResultWriter, batch_size: int = 32,
+                  workers: Optional[int] = None, progress: Optional[Callable[[int, float], None]] = None) -> int:
+    """
+    Decodes images on `workers` threads and scores them with `handler.predict_batch`.
+    The next batch is decoded while the current one runs through the model, and only
+    those two batches are ever in memory, so memory stays flat for any input size.
+    Returns the number of images written.
+    """
+    workers = workers or os.cpu_count() or 1
+
+    def decode(source: Source):
+        name, read = source
+        try:
+            return name, handler.preprocessor.load(read())
+        except Exception as e:
+            return name, PredictionResult.failed(f"Error preprocessing image: {e}")
+
+    written = 0
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        chunks = _batches(sources, batch_size)
+
+        def submit_next():
+            chunk = next(chunks, None)
+            return None if chunk is None else [pool.submit(decode, source) for source in chunk]
+
+        pending = submit_next()
+        while pending is not None:
+            decoded = [future.result() for future in pending]
+            pending = submit_next()
+
+            images = [item for _, item in decoded if not isinstance(item, PredictionResult)]
+            scored = iter(handler.predict_batch(images, batch_size=batch_size))
+            for name, item in decoded:
+                writer.write(name, item if isinstance(item, PredictionResult) else next(scored))
+            writer.flush()
+
+            written += len(decoded)
+            if progress is not None:
+                progress(written, time.perf_counter() - started)
+    return written
+
+def _handler_for(crop: str):
+    from crop_disease_detector.services.container import DependencyContainer
+
+    container = DependencyContainer.get_instance()
+    for key, handler_class in container._handlers.items():
+        if handler_class.crop_name.lower() == crop:
+            return container.get_handler(key)
+    raise ValueError(f"Unknown crop: {crop!r}")
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Score a directory or zip archive of crop photos")
+    parser.add_argument('input', help='Image directory, zip archive or single image')
+    parser.add_argument('--crop', required=True, choices=['rice', 'pulse'])
+    parser.add_argument('--output', default='scores.jsonl', help='Results file (.jsonl, .csv, .json or .html)')
+    parser.add_argument('--info-fields', nargs='*', default=[],
+                        help=f'disease_info fields to add to every record (e.g. {" ".join(DEFAULT_INFO_FIELDS)})')
+    parser.add_argument('--batch-size', type=int, default=32, help='Images per forward pass')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='Parallel decode threads')
+    parser.add_argument('--no-resume', action='store_true', help='Overwrite the output instead of resuming')
+    parser.add_argument('--metrics', help='Record per-stage timings and write them here (.json, else Prometheus text)')
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.input):
+        print(f"Error: {args.input} does not exist", file=sys.stderr)
+        return 1
+    if args.no_resume and os.path.exists(args.output):
+        os.remove(args.output)
+
+    if args.metrics:
+        StageMetrics.get_instance().enabled = True
+
+    handler = _handler_for(args.crop)
+    success, error = handler.load_model()
+    if not success:
+        print(f"Error loading the {args.crop} model: {error}", file=sys.stderr)
+        return 1
+
+    done = completed_files(args.output)
+    if done:
+        print(f"Resuming: {len(done)} images already in {args.output}")
+    sources = (source for source in iter_sources(args.input) if source[0] not in done)
+
+    def progress(count: int, elapsed: float):
+        print(f"\r{count} images scored, {count / elapsed:.1f} images/s", end='', file=sys.stderr, flush=True)
+
+    info_for = handler.get_disease_info if args.info_fields else None
+    try:
+        writer = ResultWriter(args.output, handler.classes, info_for, args.info_fields)
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    started = time.perf_counter()
+    try:
+        count = score_sources(handler, sources, writer, args.batch_size, args.workers, progress)
+    finally:
+        writer.close()
+    elapsed = time.perf_counter() - started
+    rate = count / elapsed if elapsed else 0.0
+    print(f"\nScored {count} images in {elapsed:.1f}s ({rate:.1f} images/s) -> {args.output}")
+    if args.metrics:
+        StageMetrics.get_instance().dump(args.metrics)
+        print(f"Stage timings -> {args.metrics}")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,6 +1,12 @@
 from crop_disease_detector.services.auth_service import IAuthService, StreamlitAuthService
 from crop_disease_detector.services.disease_handlers import RiceDiseaseHandler, PulseDiseaseHandler, CropDiseaseHandler
-from typing import Dict, Type
+from crop_disease_detector.services.onnx_backend import OnnxDiseaseHandler, DEFAULT_ONNX_PATHS
+from crop_disease_detector.services.prediction_cache import PredictionCache
+from crop_disease_detector.services.preloader import ModelPreloader
+from crop_disease_detector.services.report_cache import ReportCache
+from crop_disease_detector.services.session_store import SessionImageStore
+from crop_disease_detector.services.settings import InferenceSettings
+from typing import Dict, Type, Union
 
 class DependencyContainer:
     """
@@ -20,6 +26,24 @@ class DependencyContainer:
             "🌾 Rice": RiceDiseaseHandler,
             "🫘 Pulse": PulseDiseaseHandler
         }
+        self._settings: Dict[str, InferenceSettings] = {}
+
+        # One prediction cache for all handlers and sessions (keys include the crop and model version)
+        shared = InferenceSettings.from_env()
+        self.prediction_cache = PredictionCache(
+            max_entries=shared.prediction_cache_size,
+            ttl_seconds=shared.prediction_cache_ttl,
+            disk_path=shared.prediction_cache_path or None,
+            max_disk_entries=shared.prediction_cache_disk_entries,
+        )
+        # Generated PDF reports, built on request and reused across reruns and sessions
+        self.report_cache = ReportCache()
+        # Uploaded images of all sessions, outside st.session_state (sessions keep only a key)
+        self.session_store = SessionImageStore(max_idle_seconds=shared.session_idle_seconds)
+        # Largest batch a field report is built for (the whole report is held in memory while building)
+        self.field_report_max_images = shared.field_report_max_images
+        # Background loading of every registered model (started by the app, not here)
+        self.preloader = ModelPreloader(self)
 
     # Singleton pattern (simplest for Streamlit session)
     @classmethod
@@ -28,10 +52,28 @@ class DependencyContainer:
             cls._instance = DependencyContainer()
         return cls._instance
 
-    def get_handler(self, crop_name: str) -> CropDiseaseHandler:
+    def settings_for(self, handler_class: Type[CropDiseaseHandler]) -> InferenceSettings:
+        """Inference settings for one handler (CROP_DETECTOR_<CROP>_* overrides the shared values)"""
+        crop = handler_class.crop_name
+        if crop not in self._settings:
+            self._settings[crop] = InferenceSettings.from_env(scope=crop)
+        return self._settings[crop]
+
+    def get_handler(self, crop_name: str) -> Union[CropDiseaseHandler, OnnxDiseaseHandler]:
         """Factory method to get the correct handler based on selection"""
         handler_class = self._handlers.get(crop_name)
         if handler_class:
-            return handler_class()
+            settings = self.settings_for(handler_class)
+            if settings.backend == "onnx":
+                # Same crop, same contracts, served by ONNX Runtime instead of PyTorch
+                return OnnxDiseaseHandler(
+                    crop_name=handler_class.crop_name,
+                    model_path=DEFAULT_ONNX_PATHS[handler_class.crop_name],
+                    intra_op_threads=settings.intra_op_threads,
+                    inter_op_threads=settings.inter_op_threads,
+                    execution_mode=settings.execution_mode,
+                    prediction_cache=self.prediction_cache,
+                )
+            return handler_class(settings=settings, prediction_cache=self.prediction_cache)
         # Default fallback or error handling could go here
         return None
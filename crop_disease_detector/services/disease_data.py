@@ -197,3 +197,7 @@ PULSE_DISEASE_INFO = {
         'icon': '✅'
     }
 }
+
+# Model output labels, in the order of the network's output units
+RICE_CLASSES = ['Bacterial leaf blight', 'Brown spot', 'Leaf smut', '_Healthy']
+PULSE_CLASSES = ['Angular-Leaf-Spot', 'Bacterial-Pathogen', 'Cercospora-Leaf-Spot', 'No-Disease-Bean', 'Potassium-Deficiency']
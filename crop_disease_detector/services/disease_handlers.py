@@ -1,13 +1,25 @@
 from abc import ABC, abstractmethod
-import torch
-from torchvision import transforms
+from functools import partial
+import logging
+import os
 from PIL import Image
 import streamlit as st
-from crop_disease_detector.models.architecture import CNNModel
 from crop_disease_detector.services.interfaces import IDiseasePredictor, IDiseaseInfoProvider, PredictionResult
-from typing import Optional, Dict, Any, Tuple
+from crop_disease_detector.services.metrics import stage_timer
+from crop_disease_detector.services.model_cache import ModelCache, weights_fingerprint
+from crop_disease_detector.services.prediction_cache import PredictionCache
+from crop_disease_detector.services.preprocessing import ImagePreprocessor
+from crop_disease_detector.services.settings import InferenceSettings
+from typing import TYPE_CHECKING, Optional, Dict, Any, List, Tuple
 
-from crop_disease_detector.services.disease_data import RICE_DISEASE_INFO, PULSE_DISEASE_INFO
+# PyTorch takes seconds to import; it is only imported once a model is loaded or used,
+# so the container (and the login page) never wait for it
+if TYPE_CHECKING:
+    import torch
+
+from crop_disease_detector.services.disease_data import RICE_DISEASE_INFO, PULSE_DISEASE_INFO, RICE_CLASSES, PULSE_CLASSES
+
+logger = logging.getLogger(__name__)
 
 class CropDiseaseHandler(IDiseasePredictor, IDiseaseInfoProvider):
     """
@@ -15,114 +27,222 @@ class CropDiseaseHandler(IDiseasePredictor, IDiseaseInfoProvider):
     - Implements ISP interfaces.
     - Provides common functionality.
     """
-    
-    def _preprocess_image(self, image) -> Optional[torch.Tensor]:
+    crop_name = "Crop"
+    # Stateless and built once, shared by every handler instance
+    preprocessor = ImagePreprocessor()
+
+    def _weights_source(self) -> Tuple[str, str]:
+        """Returns (weights path, cache variant) to load under the current settings."""
+        if self.settings.precision == "int8":
+            # The quantized artifact is derived from (and keyed on) the fp32 checkpoint
+            return self.model_path, "int8"
+        if self.settings.weights_format == "mmap":
+            from crop_disease_detector.services.model_loader import mmap_weights_path
+            mmap_path = mmap_weights_path(self.model_path)
+            if os.path.exists(mmap_path):
+                return mmap_path, "mmap"
+            logger.warning("%s not found (run scripts/convert_weights.py); loading %s instead", mmap_path, self.model_path)
+        return self.model_path, "default"
+
+    def _build_model(self, weights_path: str, variant: str) -> "torch.nn.Module":
+        """Returns the model for the configured backend, falling back to eager mode if compilation fails."""
+        if self.settings.backend == "torchscript":
+            from crop_disease_detector.services.model_loader import load_or_compile_torchscript
+            return load_or_compile_torchscript(
+                weights_path, variant, lambda: self._build_eager_model(weights_path, variant)
+            )
+        return self._build_eager_model(weights_path, variant)
+
+    def _build_eager_model(self, weights_path: str, variant: str) -> "torch.nn.Module":
+        """Constructs the network and reads the weights from disk (the expensive part of loading)."""
+        from crop_disease_detector.services.model_loader import build_eager_model, build_mmap_model, build_quantized_model
+
+        if variant == "int8":
+            return build_quantized_model(weights_path, num_classes=len(self.classes))
+        if variant == "mmap":
+            return build_mmap_model(weights_path, num_classes=len(self.classes))
+        return build_eager_model(weights_path, num_classes=len(self.classes))
+
+    def _prepare_worker_artifacts(self, weights_path: str, variant: str):
         """
-        Internal helper for preprocessing.
-        Marked as protected (_) to imply it's an implementation detail, not part of the public API (LSP).
+        Builds the int8 / TorchScript artifact once in this process before a pool starts,
+        so its workers load the saved file instead of all building and writing it at once.
         """
-        try:
-            transform = transforms.Compose([
-                transforms.Resize((224, 224)),
-                transforms.ToTensor(),
-                transforms.Normalize(mean=[0.485, 0.456, 0.406], std=[0.229, 0.224, 0.225])
-            ])
-            return transform(image).unsqueeze(0)
-        except Exception as e:
-            st.error(f"Error preprocessing image: {str(e)}")
-            return None
+        from crop_disease_detector.services import model_loader
 
-class RiceDiseaseHandler(CropDiseaseHandler):
-    def __init__(self, model_path='crop_disease_detector/models/best_model.pth'):
-        self.classes = ['Bacterial leaf blight', 'Brown spot', 'Leaf smut', '_Healthy']
-        self.model_path = model_path
-        self.model = None
+        if self.settings.backend == "torchscript":
+            if not model_loader.torchscript_artifact_is_current(weights_path, variant):
+                self._build_model(weights_path, variant)
+        elif variant == "int8" and not model_loader.quantized_artifact_is_current(weights_path):
+            self._build_eager_model(weights_path, variant)
+
+    def _cores_per_worker(self, cores: int) -> int:
+        """Thread budget per worker, or an even share of the host over every configured pool worker."""
+        if self.settings.intra_op_threads:
+            return self.settings.intra_op_threads
+        return max(1, cores // max(self.settings.workers, configured_pool_workers()))
 
     def load_model(self) -> Tuple[bool, Optional[str]]:
+        """
+        Loads the model through the process-wide ModelCache, so repeated calls
+        (e.g. on every Streamlit rerun) reuse the already-loaded weights.
+        With settings.workers > 0 the cached object is an InferencePool whose worker
+        processes own the model copies; predict/predict_batch work unchanged.
+        """
+        from crop_disease_detector.services.execution import InferencePool, configure_threads, core_allocator
+
         try:
-            self.model = CNNModel(num_classes=len(self.classes))
-            # Use map_location='cpu' for broad compatibility
-            self.model.load_state_dict(torch.load(self.model_path, map_location=torch.device('cpu')))
-            self.model.eval()
+            weights_path, variant = self._weights_source()
+            cache_variant = variant if self.settings.backend == "eager" else f"{variant}+{self.settings.backend}"
+            if self.settings.workers:
+                builder = partial(_build_worker_model, type(self), self.model_path, self.settings, weights_path, variant)
+
+                def start_pool():
+                    self._prepare_worker_artifacts(weights_path, variant)
+                    allocator = core_allocator()
+                    return InferencePool(builder, self.settings.workers, self.settings.intra_op_threads,
+                                         self.settings.dispatch, self._cores_per_worker(len(allocator.cores)),
+                                         allocator)
+
+                self.model = self.model_cache.get_or_load(
+                    weights_path, start_pool, f"{cache_variant}+pool{self.settings.workers}-{self.settings.dispatch}"
+                )
+            else:
+                configure_threads(self.settings.intra_op_threads, self.settings.inter_op_threads)
+                self.model = self.model_cache.get_or_load(
+                    weights_path, lambda: self._build_model(weights_path, variant), cache_variant
+                )
+            # Versions cached predictions: new weights or another variant never reuse old answers
+            self.fingerprint = f"{self.crop_name}:{weights_fingerprint(weights_path)}:{cache_variant}"
             return True, None
         except Exception as e:
             return False, str(e)
+    
+    def _transform_image(self, image) -> "torch.Tensor":
+        """
+        Converts one image (PIL image, path, bytes or file object) into a normalized
+        (3, 224, 224) tensor. Raises on invalid input.
+        """
+        import torch
+        return torch.from_numpy(self.preprocessor.to_array(image))
+
+    def _forward(self, batch: "torch.Tensor") -> "torch.Tensor":
+        """Runs one forward pass and returns the raw logits, shape (N, num_classes)."""
+        import torch
+        with torch.no_grad(), stage_timer("forward"):
+            return self.model(batch)
+
+    def _to_result(self, probabilities: "torch.Tensor") -> PredictionResult:
+        """Builds the standardized result object from one row of class probabilities."""
+        confidence, predicted = probabilities.max(0)
+        # Create dictionary of all probabilities
+        all_probs = {name: prob * 100 for name, prob in zip(self.classes, probabilities.tolist())}
+        return PredictionResult(
+            predicted_class=self.classes[predicted.item()],
+            confidence_score=confidence.item() * 100,
+            probabilities=all_probs
+        )
 
     def predict(self, image) -> Optional[PredictionResult]:
         if self.model is None:
             return None
-            
-        try:
-            img_tensor = self._preprocess_image(image)
-            if img_tensor is None:
-                return None
-                
-            with torch.no_grad():
-                outputs = self.model(img_tensor)
-                probabilities = torch.nn.functional.softmax(outputs, dim=1)
-                confidence, predicted = torch.max(probabilities, 1)
-                
-            predicted_class = self.classes[predicted.item()]
-            confidence_score = confidence.item() * 100
-            
-            # Create dictionary of all probabilities
-            all_probs = {self.classes[i]: probabilities[0][i].item() * 100 for i in range(len(self.classes))}
-            
-            # Return standardized result object (LSP Compliance)
-            return PredictionResult(
-                predicted_class=predicted_class,
-                confidence_score=confidence_score,
-                probabilities=all_probs
-            )
-        except Exception as e:
-            st.error(f"Error during prediction: {str(e)}")
+
+        # Return standardized result object (LSP Compliance)
+        result = self.predict_batch([image], batch_size=1)[0]
+        if not result.ok:
+            st.error(result.error)
             return None
+        return result
+
+    def predict_batch(self, images: List[Any], batch_size: int = 16) -> List[PredictionResult]:
+        """
+        Scores many images with one forward pass per chunk of `batch_size`.
+        Results keep the input order; an image that cannot be processed gets a
+        failed PredictionResult instead of aborting the rest of the batch.
+        With a PredictionCache injected, images seen before are answered without the model.
+        """
+        if self.model is None:
+            return [PredictionResult.failed("Model is not loaded") for _ in images]
+        if self.prediction_cache is not None and self.fingerprint:
+            return self.prediction_cache.predict_batch(
+                images, self.fingerprint, self.preprocessor,
+                lambda misses: self._predict_uncached(misses, batch_size), batch_size
+            )
+        return self._predict_uncached(images, batch_size)
+
+    def warm_up(self):
+        """Runs one dummy forward pass (bypassing the prediction cache) so the first real request is fast."""
+        self._predict_uncached([Image.new('RGB', self.preprocessor.size)], batch_size=1)
+
+    def _predict_uncached(self, images: List[Any], batch_size: int) -> List[PredictionResult]:
+        import torch
+
+        results: List[Optional[PredictionResult]] = [None] * len(images)
+        for start in range(0, len(images), batch_size):
+            tensors, positions = [], []
+            for index in range(start, min(start + batch_size, len(images))):
+                try:
+                    tensors.append(self._transform_image(images[index]))
+                    positions.append(index)
+                except Exception as e:
+                    results[index] = PredictionResult.failed(f"Error preprocessing image: {e}")
+
+            if not tensors:
+                continue
+            try:
+                logits = self._forward(torch.stack(tensors))
+            except Exception as e:
+                for index in positions:
+                    results[index] = PredictionResult.failed(f"Error during prediction: {e}")
+                continue
+            with stage_timer("postprocess"):
+                probabilities = torch.nn.functional.softmax(logits, dim=1)
+                for index, row in zip(positions, probabilities):
+                    results[index] = self._to_result(row)
+        return results
+
+def _build_worker_model(handler_class, model_path: str, settings: InferenceSettings,
+                        weights_path: str, variant: str) -> "torch.nn.Module":
+    """Runs inside an InferencePool worker: builds that worker's own copy of the handler's model."""
+    return handler_class(model_path=model_path, settings=settings)._build_model(weights_path, variant)
+
+class RiceDiseaseHandler(CropDiseaseHandler):
+    crop_name = "Rice"
+
+    def __init__(self, model_path='crop_disease_detector/models/best_model.pth', model_cache: Optional[ModelCache] = None,
+                 settings: Optional[InferenceSettings] = None, prediction_cache: Optional[PredictionCache] = None):
+        self.classes = list(RICE_CLASSES)
+        self.model_path = model_path
+        self.model = None
+        self.model_cache = model_cache or ModelCache.get_instance()
+        self.settings = settings or InferenceSettings()
+        self.prediction_cache = prediction_cache
+        self.fingerprint: Optional[str] = None
 
     def get_disease_info(self, predicted_class: str) -> Dict[str, Any]:
         return RICE_DISEASE_INFO.get(predicted_class, {})
 
 class PulseDiseaseHandler(CropDiseaseHandler):
-    def __init__(self, model_path='crop_disease_detector/models/pulse_disease_model.pth'):
-        self.classes = ['Angular-Leaf-Spot', 'Bacterial-Pathogen', 'Cercospora-Leaf-Spot', 'No-Disease-Bean', 'Potassium-Deficiency']
+    crop_name = "Pulse"
+
+    def __init__(self, model_path='crop_disease_detector/models/pulse_disease_model.pth', model_cache: Optional[ModelCache] = None,
+                 settings: Optional[InferenceSettings] = None, prediction_cache: Optional[PredictionCache] = None):
+        self.classes = list(PULSE_CLASSES)
         self.model_path = model_path
         self.model = None
+        self.model_cache = model_cache or ModelCache.get_instance()
+        self.settings = settings or InferenceSettings()
+        self.prediction_cache = prediction_cache
+        self.fingerprint: Optional[str] = None
 
-    def load_model(self) -> Tuple[bool, Optional[str]]:
-        try:
-            self.model = CNNModel(num_classes=len(self.classes))
-            self.model.load_state_dict(torch.load(self.model_path, map_location=torch.device('cpu')))
-            self.model.eval()
-            return True, None
-        except Exception as e:
-            return False, str(e)
-            
-    def predict(self, image) -> Optional[PredictionResult]:
-        if self.model is None:
-            return None
-
-        try:
-            img_tensor = self._preprocess_image(image)
-            if img_tensor is None:
-                return None
-            
-            with torch.no_grad():
-                outputs = self.model(img_tensor)
-                probabilities = torch.nn.functional.softmax(outputs, dim=1)
-                confidence, predicted = torch.max(probabilities, 1)
-
-            predicted_class = self.classes[predicted.item()]
-            confidence_score = confidence.item() * 100
-            
-            all_probs = {self.classes[i]: probabilities[0][i].item() * 100 for i in range(len(self.classes))}
-            
-            return PredictionResult(
-                predicted_class=predicted_class,
-                confidence_score=confidence_score,
-                probabilities=all_probs
-            )
-        except Exception as e:
-            st.error(f"Error during prediction: {str(e)}")
-            return None
-        
     def get_disease_info(self, predicted_class: str) -> Dict[str, Any]:
         return PULSE_DISEASE_INFO.get(predicted_class, {})
+
+def configured_pool_workers() -> int:
+    """Pool workers configured for all torch-served crops (CROP_DETECTOR_[<CROP>_]WORKERS)."""
+    total = 0
+    for handler_class in (RiceDiseaseHandler, PulseDiseaseHandler):
+        settings = InferenceSettings.from_env(scope=handler_class.crop_name)
+        if settings.backend != "onnx":
+            total += settings.workers
+    return total
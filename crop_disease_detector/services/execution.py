@@ -0,0 +1,191 @@
+import itertools
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+import torch
+
+logger = logging.getLogger(__name__)
+
+DISPATCH_POLICIES = ("round_robin", "least_loaded")
+
+_threads_lock = threading.Lock()
+_interop_configured = False
+
+def configure_threads(intra_op_threads: int = 0, inter_op_threads: int = 0):
+    """
+    Applies a torch thread budget to the current process (0 keeps torch's default).
+    torch only accepts the inter-op setting once per process, before any parallel work;
+    later requests to change it are logged and ignored.
+    """
+    global _interop_configured
+    with _threads_lock:
+        if intra_op_threads > 0 and torch.get_num_threads() != intra_op_threads:
+            torch.set_num_threads(intra_op_threads)
+        if inter_op_threads > 0 and not _interop_configured:
+            try:
+                torch.set_num_interop_threads(inter_op_threads)
+            except RuntimeError as e:
+                logger.warning("Could not set inter-op threads to %d: %s", inter_op_threads, e)
+            _interop_configured = True
+
+def available_cores() -> List[int]:
+    """CPU ids this process may run on (respects taskset/cgroup affinity where supported)."""
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+class CoreAllocator:
+    """
+    Hands out core sets to pool workers across every pool in the process.
+    Each request takes the least-reserved cores, so pools started one after another
+    (e.g. the rice and pulse pools) get disjoint cores while enough are free, and only
+    share the least busy ones once the host is fully booked. Released on pool close.
+    """
+
+    def __init__(self, cores: Optional[Sequence[int]] = None):
+        self._cores = list(cores) if cores is not None else available_cores()
+        self._reserved = {core: 0 for core in self._cores}
+        self._lock = threading.Lock()
+
+    @property
+    def cores(self) -> List[int]:
+        return list(self._cores)
+
+    def allocate(self, workers: int, cores_per_worker: int) -> List[List[int]]:
+        """`workers` core sets of `cores_per_worker` cores each (capped at the host's core count)."""
+        per_worker = max(1, min(cores_per_worker, len(self._cores)))
+        sets = []
+        with self._lock:
+            for _ in range(workers):
+                # Least reserved first; ties keep core order so sets stay contiguous
+                chosen = sorted(sorted(self._cores, key=self._reserved.__getitem__)[:per_worker])
+                for core in chosen:
+                    self._reserved[core] += 1
+                sets.append(chosen)
+        return sets
+
+    def release(self, sets: Sequence[Sequence[int]]):
+        with self._lock:
+            for core_set in sets:
+                for core in core_set:
+                    self._reserved[core] = max(0, self._reserved[core] - 1)
+
+    def reserved(self) -> Dict[int, int]:
+        with self._lock:
+            return dict(self._reserved)
+
+_allocator: Optional[CoreAllocator] = None
+_allocator_lock = threading.Lock()
+
+def core_allocator() -> CoreAllocator:
+    """The process-wide allocator shared by every InferencePool."""
+    global _allocator
+    with _allocator_lock:
+        if _allocator is None:
+            _allocator = CoreAllocator()
+        return _allocator
+
+# Worker-process state: each pool worker owns exactly one model copy
+_worker_model = None
+
+def _init_worker(cores: List[int], intra_op_threads: int, builder: Callable[[], torch.nn.Module]):
+    global _worker_model
+    if hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, cores)
+    configure_threads(intra_op_threads or len(cores))
+    _worker_model = builder()
+
+def _worker_forward(batch: np.ndarray) -> np.ndarray:
+    with torch.no_grad():
+        return _worker_model(torch.from_numpy(batch)).numpy()
+
+class InferencePool:
+    """
+    Process pool that owns the model copies, one per worker, each pinned to its own core set.
+    Core sets come from a CoreAllocator shared by all pools, so workers of different pools
+    do not compete for cores either (until there are more workers than cores).
+    `cores_per_worker` defaults to an even split of the allocator's cores over this pool.
+    Called like a model (batch tensor in, logits out), so it drops in under the handlers (LSP).
+    - round_robin: spread batches evenly across workers
+    - least_loaded: send each batch to the worker with the fewest batches in flight
+    A worker whose process dies (OOM kill, segfault) is restarted on the same cores and
+    the batch is retried once.
+    """
+
+    def __init__(self, builder: Callable[[], torch.nn.Module], workers: int, intra_op_threads: int = 0,
+                 dispatch: str = "round_robin", cores_per_worker: int = 0,
+                 allocator: Optional[CoreAllocator] = None):
+        if workers < 1:
+            raise ValueError(f"workers must be >= 1, got {workers}")
+        if dispatch not in DISPATCH_POLICIES:
+            raise ValueError(f"Unknown dispatch policy: {dispatch!r}")
+        self.dispatch = dispatch
+        self._allocator = allocator or core_allocator()
+        per_worker = cores_per_worker or intra_op_threads or len(self._allocator.cores) // workers
+        self.core_sets = self._allocator.allocate(workers, per_worker)
+        self._builder = builder
+        self._intra_op_threads = intra_op_threads
+        # spawn: forking a process that already runs torch threads can deadlock
+        self._context = multiprocessing.get_context("spawn")
+        self._workers = [self._start_worker(core_set) for core_set in self.core_sets]
+        self._in_flight = [0] * workers
+        self._lock = threading.Lock()
+        self._next = itertools.cycle(range(workers))
+        self._closed = False
+
+    def _start_worker(self, core_set: List[int]) -> ProcessPoolExecutor:
+        return ProcessPoolExecutor(max_workers=1, mp_context=self._context, initializer=_init_worker,
+                                   initargs=(core_set, self._intra_op_threads, self._builder))
+
+    def _restart(self, index: int, broken: ProcessPoolExecutor) -> ProcessPoolExecutor:
+        """Replaces a broken worker (once, however many callers saw it fail) and returns its successor."""
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("InferencePool is closed")
+            if self._workers[index] is broken:
+                logger.warning("Inference worker %d died; restarting it on cores %s", index, self.core_sets[index])
+                broken.shutdown(wait=False, cancel_futures=True)
+                self._workers[index] = self._start_worker(self.core_sets[index])
+            return self._workers[index]
+
+    def _pick(self) -> int:
+        with self._lock:
+            if self.dispatch == "least_loaded":
+                index = min(range(len(self._workers)), key=self._in_flight.__getitem__)
+            else:
+                index = next(self._next)
+            self._in_flight[index] += 1
+            return index
+
+    def __call__(self, batch: torch.Tensor) -> torch.Tensor:
+        index = self._pick()
+        data = batch.numpy()
+        try:
+            worker = self._workers[index]
+            try:
+                logits = worker.submit(_worker_forward, data).result()
+            except BrokenProcessPool:
+                logits = self._restart(index, worker).submit(_worker_forward, data).result()
+        finally:
+            with self._lock:
+                self._in_flight[index] -= 1
+        return torch.from_numpy(logits)
+
+    def in_flight(self) -> List[int]:
+        with self._lock:
+            return list(self._in_flight)
+
+    def close(self):
+        with self._lock:
+            self._closed = True
+        for worker in self._workers:
+            worker.shutdown(wait=True, cancel_futures=True)
+        if self.core_sets:
+            self._allocator.release(self.core_sets)
+            self.core_sets = []
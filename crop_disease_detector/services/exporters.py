@@ -0,0 +1,166 @@
+import csv
+import html
+import io
+import json
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, TextIO, Tuple
+
+from crop_disease_detector.services.interfaces import PredictionResult
+
+EXPORT_FORMATS = ('json', 'jsonl', 'csv', 'html')
+# Formats whose files can be appended to, so interrupted runs can resume
+RESUMABLE_FORMATS = ('jsonl', 'csv')
+RESULT_FIELDS = ['file', 'predicted_class', 'confidence_score', 'error']
+# disease_info fields included by default (the free-text sections stay in the PDF)
+DEFAULT_INFO_FIELDS = ('severity', 'treatment')
+
+MIME_TYPES = {'json': 'application/json', 'jsonl': 'application/x-ndjson', 'csv': 'text/csv', 'html': 'text/html'}
+_EXTENSIONS = {'.json': 'json', '.jsonl': 'jsonl', '.ndjson': 'jsonl', '.csv': 'csv', '.html': 'html', '.htm': 'html'}
+
+InfoLookup = Callable[[str], Dict[str, Any]]
+
+def format_for_path(path: str) -> str:
+    """Export format implied by a file name (JSON Lines when the extension is unknown)."""
+    for extension, export_format in _EXTENSIONS.items():
+        if path.lower().endswith(extension):
+            return export_format
+    return 'jsonl'
+
+def csv_fieldnames(classes: Sequence[str], info_fields: Sequence[str] = DEFAULT_INFO_FIELDS,
+                   with_info: bool = True) -> List[str]:
+    """CSV columns: result fields, then info fields (when looked up), then one probability per class."""
+    return RESULT_FIELDS + (list(info_fields) if with_info else []) + list(classes)
+
+def _flat(value: Any) -> Any:
+    """List-valued info fields (prevention tips, steps) as one cell for CSV and HTML."""
+    return "; ".join(map(str, value)) if isinstance(value, (list, tuple)) else value
+
+class ResultExporter:
+    """
+    Streams one record per image to a text stream: the record is written as soon as
+    it is passed in, so exports of any size keep memory flat. Subclasses add the
+    format-specific header, row and footer; `finish()` writes the footer.
+    """
+
+    def __init__(self, stream: TextIO, classes: Sequence[str], info_for: Optional[InfoLookup] = None,
+                 info_fields: Sequence[str] = DEFAULT_INFO_FIELDS, append: bool = False):
+        self.stream = stream
+        self.classes = list(classes)
+        self.info_for = info_for
+        self.info_fields = list(info_fields) if info_for is not None else []
+        self.count = 0
+        if not append:
+            self._header()
+
+    def record(self, name: str, result: PredictionResult) -> Dict[str, Any]:
+        record = {'file': name, 'predicted_class': result.predicted_class,
+                  'confidence_score': result.confidence_score, 'error': result.error}
+        info = self.info_for(result.predicted_class) if self.info_fields and result.ok else {}
+        for field in self.info_fields:
+            record[field] = info.get(field)
+        return record
+
+    def write(self, name: str, result: PredictionResult):
+        self._row(self.record(name, result), result)
+        self.count += 1
+
+    def flush(self):
+        self.stream.flush()
+
+    def finish(self):
+        self._footer()
+        self.flush()
+
+    def _header(self):
+        pass
+
+    def _row(self, record: Dict[str, Any], result: PredictionResult):
+        raise NotImplementedError
+
+    def _footer(self):
+        pass
+
+class JsonLinesExporter(ResultExporter):
+    def _row(self, record, result):
+        self.stream.write(json.dumps({**record, 'probabilities': result.probabilities}) + '\n')
+
+class JsonExporter(ResultExporter):
+    """A single JSON array, written element by element."""
+
+    def _header(self):
+        self.stream.write('[')
+
+    def _row(self, record, result):
+        separator = ',\n' if self.count else '\n'
+        self.stream.write(separator + json.dumps({**record, 'probabilities': result.probabilities}))
+
+    def _footer(self):
+        self.stream.write('\n]\n')
+
+class CsvExporter(ResultExporter):
+    """One column per result field and info field, then one probability column per class."""
+
+    def __init__(self, stream, classes, info_for=None, info_fields=DEFAULT_INFO_FIELDS, append=False):
+        self._csv = csv.DictWriter(stream, fieldnames=csv_fieldnames(classes, info_fields, info_for is not None),
+                                   extrasaction='ignore')
+        super().__init__(stream, classes, info_for, info_fields, append)
+
+    def _header(self):
+        self._csv.writeheader()
+
+    def _row(self, record, result):
+        self._csv.writerow({**{key: _flat(value) for key, value in record.items()}, **result.probabilities})
+
+class HtmlExporter(ResultExporter):
+    """Self-contained page (inline CSS, no scripts or external assets) with one table row per image."""
+
+    STYLE = (
+        "body{font-family:Helvetica,Arial,sans-serif;margin:2rem;color:#1f2937}"
+        "h1{color:#1e3a8a}table{border-collapse:collapse;width:100%}"
+        "th{background:#3b82f6;color:#fff;text-align:left}"
+        "th,td{padding:.4rem .6rem;border:1px solid #e5e7eb;vertical-align:top}"
+        "tr:nth-child(even) td{background:#f0f9ff}.error{color:#b91c1c}"
+    )
+
+    def _header(self):
+        columns = ['File', 'Prediction', 'Confidence'] + [f.replace('_', ' ').title() for f in self.info_fields]
+        self.stream.write(
+            "<!DOCTYPE html>\n<html><head><meta charset=\"utf-8\">"
+            f"<title>Disease Analysis Results</title><style>{self.STYLE}</style></head><body>\n"
+            "<h1>Agricultural Disease Analysis Results</h1>\n"
+            f"<p>Generated on: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}</p>\n"
+            "<table><thead><tr>" + "".join(f"<th>{html.escape(c)}</th>" for c in columns) + "</tr></thead><tbody>\n"
+        )
+
+    def _row(self, record, result):
+        if not result.ok:
+            span = 2 + len(self.info_fields)
+            cells = f"<td class=\"error\" colspan=\"{span}\">{html.escape(str(result.error))}</td>"
+        else:
+            values = [record['predicted_class'], f"{result.confidence_score:.1f}%"]
+            values += [_flat(record[field]) if record[field] is not None else '' for field in self.info_fields]
+            cells = "".join(f"<td>{html.escape(str(value))}</td>" for value in values)
+        self.stream.write(f"<tr><td>{html.escape(record['file'])}</td>{cells}</tr>\n")
+
+    def _footer(self):
+        self.stream.write(f"</tbody></table>\n<p>{self.count} images</p>\n</body></html>\n")
+
+EXPORTERS = {'json': JsonExporter, 'jsonl': JsonLinesExporter, 'csv': CsvExporter, 'html': HtmlExporter}
+
+def exporter_for(export_format: str, stream: TextIO, classes: Sequence[str], info_for: Optional[InfoLookup] = None,
+                 info_fields: Sequence[str] = DEFAULT_INFO_FIELDS, append: bool = False) -> ResultExporter:
+    if export_format not in EXPORTERS:
+        raise ValueError(f"Unknown export format: {export_format!r}")
+    if append and export_format not in RESUMABLE_FORMATS:
+        raise ValueError(f"{export_format} exports cannot be appended to")
+    return EXPORTERS[export_format](stream, classes, info_for, info_fields, append)
+
+def export_results(results: Iterable[Tuple[str, PredictionResult]], export_format: str, classes: Sequence[str],
+                   info_for: Optional[InfoLookup] = None, info_fields: Sequence[str] = DEFAULT_INFO_FIELDS) -> str:
+    """Whole export as a string (for download buttons); use exporter_for() to stream to a file."""
+    buffer = io.StringIO()
+    exporter = exporter_for(export_format, buffer, classes, info_for, info_fields)
+    for name, result in results:
+        exporter.write(name, result)
+    exporter.finish()
+    return buffer.getvalue()
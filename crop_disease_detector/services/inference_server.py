@@ -0,0 +1,246 @@
+import asyncio
+import dataclasses
+import json
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from crop_disease_detector.services.interfaces import IDiseasePredictor, PredictionResult
+from crop_disease_detector.services.metrics import StageMetrics
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8502
+DEFAULT_MAX_BATCH_SIZE = 16
+DEFAULT_MAX_WAIT_MS = 10.0
+# Uploads larger than this are rejected before reading the body
+MAX_BODY_BYTES = 20 * 1024 * 1024
+_REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+            413: "Payload Too Large", 422: "Unprocessable Entity", 500: "Internal Server Error"}
+
+def result_to_dict(result: PredictionResult) -> Dict[str, Any]:
+    """JSON-ready form of a PredictionResult (same field names)."""
+    return dataclasses.asdict(result)
+
+@dataclass
+class BatcherStats:
+    """Snapshot of a MicroBatcher's counters."""
+    requests: int
+    batches: int
+    largest_batch: int
+
+    @property
+    def mean_batch_size(self) -> float:
+        return self.requests / self.batches if self.batches else 0.0
+
+class MicroBatcher:
+    """
+    Groups concurrent requests for one predictor into batched forward passes.
+    The dispatcher takes the first queued request, then keeps collecting until either
+    `max_batch_size` requests are waiting or `max_wait_ms` has passed since that first
+    request, so latency is bounded while busy periods get few, large batches.
+    Inference runs on a dedicated worker thread, keeping the event loop responsive.
+    """
+
+    def __init__(self, predictor: IDiseasePredictor, max_batch_size: int = DEFAULT_MAX_BATCH_SIZE,
+                 max_wait_ms: float = DEFAULT_MAX_WAIT_MS):
+        if max_batch_size < 1:
+            raise ValueError(f"max_batch_size must be >= 1, got {max_batch_size}")
+        self.predictor = predictor
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self._queue: Optional[asyncio.Queue] = None
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="inference")
+        self._task: Optional[asyncio.Task] = None
+        self._requests = self._batches = self._largest = 0
+
+    def start(self):
+        """Starts the dispatcher on the running event loop."""
+        self._queue = asyncio.Queue()
+        self._task = asyncio.get_running_loop().create_task(self._dispatch())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._executor.shutdown(wait=False)
+
+    async def submit(self, image: Any) -> PredictionResult:
+        """Queues one image (bytes, path, file object or PIL image) and waits for its result."""
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((image, future))
+        return await future
+
+    async def _collect(self) -> List[Tuple[Any, asyncio.Future]]:
+        batch = [await self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _dispatch(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._collect()
+            images = [image for image, _ in batch]
+            try:
+                results = await loop.run_in_executor(
+                    self._executor, self.predictor.predict_batch, images, len(images)
+                )
+            except Exception as e:
+                logger.exception("Batch inference failed")
+                results = [PredictionResult.failed(f"Error during prediction: {e}") for _ in images]
+
+            self._requests += len(batch)
+            self._batches += 1
+            self._largest = max(self._largest, len(batch))
+            for (_, future), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+
+    def stats(self) -> BatcherStats:
+        return BatcherStats(requests=self._requests, batches=self._batches, largest_batch=self._largest)
+
+class InferenceServer:
+    """
+    Headless HTTP/JSON front end for the disease handlers (no Streamlit session needed).
+    Each crop's handler is hosted once behind its own MicroBatcher.
+    - POST /predict/<crop>  body: raw image bytes  ->  PredictionResult as JSON
+    - GET  /health          ->  loaded crops and batching counters
+    - GET  /metrics         ->  per-stage timing histograms (Prometheus text; /metrics.json for JSON)
+    """
+
+    def __init__(self, predictors: Dict[str, IDiseasePredictor], max_batch_size: int = DEFAULT_MAX_BATCH_SIZE,
+                 max_wait_ms: float = DEFAULT_MAX_WAIT_MS):
+        self.batchers = {
+            crop.lower(): MicroBatcher(predictor, max_batch_size, max_wait_ms)
+            for crop, predictor in predictors.items()
+        }
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    @classmethod
+    def from_container(cls, container, **kwargs) -> "InferenceServer":
+        """Builds and loads every handler registered in the DependencyContainer."""
+        predictors = {}
+        for key in container._handlers:
+            handler = container.get_handler(key)
+            success, error = handler.load_model()
+            if not success:
+                logger.error("Skipping %s: %s", handler.crop_name, error)
+                continue
+            predictors[handler.crop_name] = handler
+        return cls(predictors, **kwargs)
+
+    async def start(self, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT) -> asyncio.AbstractServer:
+        for batcher in self.batchers.values():
+            batcher.start()
+        self._server = await asyncio.start_server(self._handle_connection, host, port)
+        return self._server
+
+    async def stop(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        for batcher in self.batchers.values():
+            await batcher.stop()
+
+    async def serve_forever(self, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT):
+        server = await self.start(host, port)
+        logger.info("Serving %s on %s:%s", ", ".join(self.batchers), host, port)
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            await self.stop()
+
+    async def handle(self, method: str, path: str, body: bytes) -> Tuple[int, Union[Dict[str, Any], str]]:
+        """Routes one request; returns (HTTP status, JSON payload or plain-text body)."""
+        if method == "GET" and path == "/metrics":
+            return 200, StageMetrics.get_instance().to_prometheus()
+        if method == "GET" and path == "/metrics.json":
+            return 200, json.loads(StageMetrics.get_instance().to_json())
+        if method == "GET" and path == "/health":
+            return 200, {
+                "status": "ok",
+                "crops": {
+                    crop: {**dataclasses.asdict(stats), "mean_batch_size": stats.mean_batch_size}
+                    for crop, stats in ((crop, b.stats()) for crop, b in self.batchers.items())
+                },
+            }
+        if path.startswith("/predict/"):
+            if method != "POST":
+                return 405, {"error": "Use POST with the image bytes as the request body"}
+            batcher = self.batchers.get(path[len("/predict/"):].lower())
+            if batcher is None:
+                return 404, {"error": f"Unknown crop; available: {sorted(self.batchers)}"}
+            if not body:
+                return 400, {"error": "Empty request body"}
+            result = await batcher.submit(body)
+            return (200 if result.ok else 422), result_to_dict(result)
+        return 404, {"error": f"Not found: {path}"}
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            request_line = (await reader.readline()).decode("latin-1").split()
+            if len(request_line) < 2:
+                writer.close()
+                return
+            method, path = request_line[0].upper(), request_line[1].split("?", 1)[0]
+
+            headers = {}
+            while True:
+                line = (await reader.readline()).decode("latin-1").strip()
+                if not line:
+                    break
+                name, _, value = line.partition(":")
+                headers[name.strip().lower()] = value.strip()
+
+            length = int(headers.get("content-length", "0"))
+            if length > MAX_BODY_BYTES:
+                status, payload = 413, {"error": f"Body larger than {MAX_BODY_BYTES} bytes"}
+            else:
+                body = await reader.readexactly(length) if length else b""
+                status, payload = await self.handle(method, path, body)
+        except (ValueError, asyncio.IncompleteReadError) as e:
+            status, payload = 400, {"error": f"Malformed request: {e}"}
+        except Exception as e:
+            logger.exception("Request failed")
+            status, payload = 500, {"error": str(e)}
+
+        if isinstance(payload, str):
+            data, content_type = payload.encode(), "text/plain; version=0.0.4"
+        else:
+            data, content_type = json.dumps(payload).encode(), "application/json"
+        writer.write(
+            f"HTTP/1.1 {status} {_REASONS.get(status, 'Error')}\r\n"
+            f"Content-Type: {content_type}\r\nContent-Length: {len(data)}\r\nConnection: close\r\n\r\n".encode()
+            + data
+        )
+        try:
+            await writer.drain()
+        finally:
+            writer.close()
+
+def serve(host: str = DEFAULT_HOST, port: int = DEFAULT_PORT, max_batch_size: int = DEFAULT_MAX_BATCH_SIZE,
+          max_wait_ms: float = DEFAULT_MAX_WAIT_MS):
+    """Loads the handlers from the DependencyContainer and serves until interrupted."""
+    from crop_disease_detector.services.container import DependencyContainer
+
+    server = InferenceServer.from_container(
+        DependencyContainer.get_instance(), max_batch_size=max_batch_size, max_wait_ms=max_wait_ms
+    )
+    if not server.batchers:
+        raise RuntimeError("No model could be loaded; nothing to serve")
+    asyncio.run(server.serve_forever(host, port))
@@ -12,6 +12,17 @@ class PredictionResult:
     predicted_class: str
     confidence_score: float
     probabilities: Dict[str, float]
+    # Set only for items of a batch that could not be scored
+    error: Optional[str] = None
+
+    @classmethod
+    def failed(cls, error: str) -> "PredictionResult":
+        """Result placeholder for an input that could not be scored."""
+        return cls(predicted_class="", confidence_score=0.0, probabilities={}, error=error)
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
 
 class IDiseasePredictor(ABC):
     """
@@ -28,6 +39,14 @@ class IDiseasePredictor(ABC):
         """Predicts disease from an image."""
         pass
 
+    @abstractmethod
+    def predict_batch(self, images: List[Any], batch_size: int = 16) -> List[PredictionResult]:
+        """
+        Predicts diseases for many images at once.
+        Returns one result per image, in input order; failures are reported per item via `error`.
+        """
+        pass
+
 class IDiseaseInfoProvider(ABC):
     """
     Interface for providing details about diseases.
@@ -0,0 +1,156 @@
+import bisect
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+# Upper bounds in seconds, from 1 ms (small-image preprocessing) to 10 s (cold reports)
+DEFAULT_BUCKETS: Tuple[float, ...] = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+METRIC_NAME = "crop_detector_stage_duration_seconds"
+GAUGE_PREFIX = "crop_detector_"
+
+@dataclass
+class StageHistogram:
+    """Cumulative duration histogram for one pipeline stage (Prometheus-style buckets)."""
+    buckets: Tuple[float, ...] = DEFAULT_BUCKETS
+    counts: List[int] = field(default_factory=list)
+    count: int = 0
+    total: float = 0.0
+    max: float = 0.0
+
+    def __post_init__(self):
+        # One slot per bucket plus the +Inf overflow
+        self.counts = self.counts or [0] * (len(self.buckets) + 1)
+
+    def observe(self, seconds: float):
+        self.counts[bisect.bisect_left(self.buckets, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    def quantile(self, q: float) -> float:
+        """Upper bound of the bucket holding the q-quantile (the observed max for the overflow bucket)."""
+        if not self.count:
+            return 0.0
+        rank, seen = q * self.count, 0
+        for bound, bucket_count in zip(self.buckets, self.counts):
+            seen += bucket_count
+            if seen >= rank:
+                return min(bound, self.max)
+        return self.max
+
+    def summary(self) -> Dict[str, float]:
+        return {
+            "count": self.count,
+            "mean_ms": 1000 * self.total / self.count if self.count else 0.0,
+            "p50_ms": 1000 * self.quantile(0.5),
+            "p95_ms": 1000 * self.quantile(0.95),
+            "max_ms": 1000 * self.max,
+        }
+
+class StageMetrics:
+    """
+    Process-wide timers for the analysis pipeline (decode, preprocess, forward,
+    postprocess, report, ...), aggregated into histograms, plus a few gauges.
+    Disabled by default: `timer()` then returns a shared no-op context, so the hot path
+    pays one attribute check per stage. Enable with CROP_DETECTOR_METRICS=1 (the sidebar
+    debug panel only shows the state). Gauges are cheap point values and are always kept.
+    """
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self, enabled: bool = False, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.enabled = enabled
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self._stages: Dict[str, StageHistogram] = {}
+        self._gauges: Dict[str, float] = {}
+        self._noop = nullcontext()
+
+    # Singleton pattern (one registry per process, shared by all sessions and handlers)
+    @classmethod
+    def get_instance(cls) -> "StageMetrics":
+        if cls._instance is None:
+            with cls._instance_lock:
+                if cls._instance is None:
+                    cls._instance = StageMetrics(enabled=os.environ.get("CROP_DETECTOR_METRICS", "") in ("1", "true"))
+        return cls._instance
+
+    def observe(self, stage: str, seconds: float):
+        with self._lock:
+            histogram = self._stages.get(stage)
+            if histogram is None:
+                histogram = self._stages[stage] = StageHistogram(self.buckets)
+            histogram.observe(seconds)
+
+    @contextmanager
+    def _timed(self, stage: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - started)
+
+    def timer(self, stage: str):
+        """Context manager timing one execution of `stage` (no-op while disabled)."""
+        return self._timed(stage) if self.enabled else self._noop
+
+    def set_gauge(self, name: str, value: float):
+        with self._lock:
+            self._gauges[name] = value
+
+    def gauges(self) -> Dict[str, float]:
+        with self._lock:
+            return dict(self._gauges)
+
+    def reset(self):
+        """Clears the timing histograms (gauges describe current state and are kept)."""
+        with self._lock:
+            self._stages.clear()
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """Per-stage count, mean, approximate p50/p95 and max, in milliseconds."""
+        with self._lock:
+            return {stage: histogram.summary() for stage, histogram in sorted(self._stages.items())}
+
+    def to_json(self) -> str:
+        with self._lock:
+            payload: Dict[str, Any] = {
+                stage: {
+                    **histogram.summary(),
+                    "sum_seconds": histogram.total,
+                    "buckets": {str(bound): count for bound, count in zip(list(self.buckets) + ["+Inf"], histogram.counts)},
+                }
+                for stage, histogram in sorted(self._stages.items())
+            }
+            gauges = dict(self._gauges)
+        return json.dumps({"enabled": self.enabled, "stages": payload, "gauges": gauges}, indent=2)
+
+    def to_prometheus(self) -> str:
+        """Prometheus text exposition format (cumulative `le` buckets, seconds)."""
+        lines = [f"# HELP {METRIC_NAME} Time spent in each analysis pipeline stage.",
+                 f"# TYPE {METRIC_NAME} histogram"]
+        with self._lock:
+            for stage, histogram in sorted(self._stages.items()):
+                cumulative = 0
+                for bound, count in zip(list(self.buckets) + ["+Inf"], histogram.counts):
+                    cumulative += count
+                    lines.append(f'{METRIC_NAME}_bucket{{stage="{stage}",le="{bound}"}} {cumulative}')
+                lines.append(f'{METRIC_NAME}_sum{{stage="{stage}"}} {histogram.total}')
+                lines.append(f'{METRIC_NAME}_count{{stage="{stage}"}} {histogram.count}')
+            for name, value in sorted(self._gauges.items()):
+                lines.append(f"# TYPE {GAUGE_PREFIX}{name} gauge")
+                lines.append(f"{GAUGE_PREFIX}{name} {value}")
+        return "\n".join(lines) + "\n"
+
+    def dump(self, path: str):
+        """Writes the metrics to `path`: JSON for *.json, Prometheus text otherwise."""
+        with open(path, "w") as f:
+            f.write(self.to_json() if path.lower().endswith(".json") else self.to_prometheus())
+
+def stage_timer(stage: str, metrics: Optional[StageMetrics] = None):
+    """Shorthand for StageMetrics.get_instance().timer(stage)."""
+    return (metrics or StageMetrics.get_instance()).timer(stage)
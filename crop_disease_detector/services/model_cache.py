@@ -0,0 +1,138 @@
+import hashlib
+import logging
+import os
+import threading
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class ModelCacheStats:
+    """Snapshot of the model cache counters."""
+    hits: int
+    misses: int
+    entries: int
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+def _close_evicted(models: List[Any]):
+    """Shuts down evicted entries that own resources (e.g. an InferencePool's worker processes)."""
+    for model in models:
+        close = getattr(model, "close", None)
+        if not callable(close):
+            continue
+        try:
+            close()
+        except Exception:
+            logger.exception("Failed to close evicted model %r", model)
+
+class ModelCache:
+    """
+    Process-wide, thread-safe cache of loaded models.
+    Entries are keyed by (absolute model path, file mtime, variant), so every handler
+    and every Streamlit session shares one copy of the weights, and a checkpoint that
+    is replaced on disk is reloaded on the next request.
+    Evicted entries with a close() method are closed once they leave the cache.
+    """
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries: Dict[Tuple[str, int, str], Any] = {}
+        self._key_locks: Dict[Tuple[str, int, str], threading.Lock] = {}
+        self._hits = 0
+        self._misses = 0
+
+    # Singleton pattern (one cache per process, shared by all sessions)
+    @classmethod
+    def get_instance(cls) -> "ModelCache":
+        if cls._instance is None:
+            with cls._instance_lock:
+                if cls._instance is None:
+                    cls._instance = ModelCache()
+        return cls._instance
+
+    @staticmethod
+    def _make_key(model_path: str, variant: str) -> Tuple[str, int, str]:
+        path = os.path.abspath(model_path)
+        # Raises FileNotFoundError for missing weights; callers report it as a load failure
+        return path, os.stat(path).st_mtime_ns, variant
+
+    def get_or_load(self, model_path: str, loader: Callable[[], Any], variant: str = "default") -> Any:
+        """
+        Returns the cached model for `model_path`, calling `loader()` at most once per key.
+        Concurrent callers asking for the same key wait for the load already in progress.
+        """
+        key = self._make_key(model_path, variant)
+        with self._lock:
+            model = self._entries.get(key)
+            if model is not None:
+                self._hits += 1
+                return model
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+
+        with key_lock:
+            with self._lock:
+                model = self._entries.get(key)
+                if model is not None:
+                    self._hits += 1
+                    return model
+
+            model = loader()
+
+            with self._lock:
+                # Drop copies of the same model loaded from an older version of the file
+                stale = [k for k in self._entries if k[0] == key[0] and k[2] == key[2]]
+                evicted = [self._entries.pop(k) for k in stale]
+                self._entries[key] = model
+                self._key_locks.pop(key, None)
+                self._misses += 1
+        _close_evicted(evicted)
+        return model
+
+    def invalidate(self, model_path: Optional[str] = None) -> int:
+        """
+        Evicts every variant of `model_path`, or the whole cache when no path is given.
+        Returns the number of evicted entries.
+        """
+        with self._lock:
+            if model_path is None:
+                stale = list(self._entries)
+            else:
+                path = os.path.abspath(model_path)
+                stale = [k for k in self._entries if k[0] == path]
+            evicted = [self._entries.pop(k) for k in stale]
+        _close_evicted(evicted)
+        return len(evicted)
+
+    def stats(self) -> ModelCacheStats:
+        with self._lock:
+            return ModelCacheStats(hits=self._hits, misses=self._misses, entries=len(self._entries))
+
+_fingerprints: Dict[Tuple[str, int, int], str] = {}
+_fingerprints_lock = threading.Lock()
+
+def weights_fingerprint(model_path: str) -> str:
+    """
+    SHA-256 of a weights file, used to tell whether derived artifacts and cached
+    predictions belong to the current model.
+    Memoized per (path, size, mtime) so the file is hashed once per process.
+    """
+    path = os.path.abspath(model_path)
+    stat = os.stat(path)
+    key = (path, stat.st_size, stat.st_mtime_ns)
+    with _fingerprints_lock:
+        if key in _fingerprints:
+            return _fingerprints[key]
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(block)
+    with _fingerprints_lock:
+        _fingerprints[key] = digest.hexdigest()
+    return _fingerprints[key]
@@ -0,0 +1,210 @@
+import logging
+import os
+import tempfile
+import zipfile
+from typing import Any, Callable, Dict, Tuple
+
+import torch
+import torch.nn as nn
+import torch.ao.nn.quantized.dynamic as nnqd
+from crop_disease_detector.models.architecture import CNNModel, split_checkpoint
+from crop_disease_detector.services.model_cache import weights_fingerprint
+
+logger = logging.getLogger(__name__)
+
+MMAP_SUFFIX = ".mmap.pt"
+QUANTIZED_SUFFIX = ".int8.pt"
+TORCHSCRIPT_SUFFIX = ".torchscript.pt"
+
+def mmap_weights_path(model_path: str) -> str:
+    """Returns where the memory-mappable copy of `model_path` lives (next to the original)."""
+    return os.path.splitext(model_path)[0] + MMAP_SUFFIX
+
+def load_checkpoint(model_path: str, mmap: bool = False) -> Tuple[Dict[str, torch.Tensor], Dict[str, Any]]:
+    """
+    Reads a checkpoint onto the CPU and returns (state_dict, metadata).
+    With mmap=True the tensors are backed by a private file mapping instead of
+    being unpickled into process memory.
+    """
+    checkpoint = torch.load(model_path, map_location=torch.device('cpu'), mmap=mmap, weights_only=True)
+    return split_checkpoint(checkpoint)
+
+def _check_classes(model_path: str, metadata: Dict[str, Any], num_classes: int):
+    """Rejects checkpoints trained for a different set of classes than the handler expects."""
+    if metadata.get('num_classes', num_classes) != num_classes:
+        raise ValueError(f"{model_path} was trained for {metadata['num_classes']} classes, expected {num_classes}")
+
+def build_eager_model(model_path: str, num_classes: int) -> CNNModel:
+    """Constructs CNNModel and copies the checkpoint weights into freshly allocated parameters."""
+    state_dict, metadata = load_checkpoint(model_path)
+    _check_classes(model_path, metadata, num_classes)
+    model = CNNModel(num_classes=num_classes, head=metadata['head'])
+    model.load_state_dict(state_dict)
+    model.eval()
+    return model
+
+def build_mmap_model(model_path: str, num_classes: int) -> CNNModel:
+    """
+    Constructs CNNModel whose parameters point directly at the memory-mapped file.
+    The module is created on the meta device, so no memory is allocated or randomly
+    initialised, and `assign=True` adopts the mapped tensors instead of copying them.
+    Pages are faulted in on first use and shared across processes by the OS page cache.
+    """
+    state_dict, metadata = load_checkpoint(model_path, mmap=True)
+    _check_classes(model_path, metadata, num_classes)
+    with torch.device('meta'):
+        model = CNNModel(num_classes=num_classes, head=metadata['head'])
+    model.load_state_dict(state_dict, assign=True)
+    model.eval()
+    return model
+
+def convert_to_mmap(model_path: str, output_path: str = None) -> str:
+    """
+    Re-saves a checkpoint in an uncompressed, memory-mappable layout.
+    Every tensor gets its own contiguous storage so each one is a single aligned
+    record in torch's zip format (legacy pickled checkpoints are upgraded as well).
+    """
+    output_path = output_path or mmap_weights_path(model_path)
+    state_dict, metadata = load_checkpoint(model_path)
+    state_dict = {name: tensor.detach().contiguous().clone() for name, tensor in state_dict.items()}
+    torch.save({'state_dict': state_dict, 'metadata': metadata}, output_path)
+    logger.info("Converted %s -> %s", model_path, output_path)
+    return output_path
+
+def save_atomically(save: Callable[[str], None], path: str):
+    """
+    Runs `save(temp_path)` on a temporary file next to `path`, then renames it into place.
+    Readers see the old file or the complete new one, never a partial write, even when
+    several processes build the same artifact at once.
+    """
+    fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path) or ".", prefix=os.path.basename(path) + ".",
+                                     suffix=".tmp")
+    os.close(fd)
+    try:
+        save(temp_path)
+        os.replace(temp_path, path)
+    except BaseException:
+        os.remove(temp_path)
+        raise
+
+def quantized_weights_path(model_path: str) -> str:
+    """Returns where the cached int8 artifact for `model_path` lives (next to the original)."""
+    return os.path.splitext(model_path)[0] + QUANTIZED_SUFFIX
+
+def quantize_model(model: nn.Module) -> nn.Module:
+    """Applies int8 dynamic quantization to the linear layers (fc1 holds ~99% of the parameters)."""
+    return torch.ao.quantization.quantize_dynamic(model, {nn.Linear}, dtype=torch.qint8)
+
+def _quantized_skeleton(num_classes: int, head: str) -> CNNModel:
+    """
+    CNNModel with dynamic-quantized linear layers and uninitialised conv weights,
+    ready to receive a saved quantized state dict without quantizing anything.
+    """
+    with torch.device('meta'):
+        model = CNNModel(num_classes=num_classes, head=head)
+    model = model.to_empty(device='cpu')
+    for name, module in list(model.named_children()):
+        if isinstance(module, nn.Linear):
+            setattr(model, name, nnqd.Linear(module.in_features, module.out_features, dtype=torch.qint8))
+    return model
+
+def quantized_artifact_is_current(model_path: str) -> bool:
+    """True when the int8 artifact exists, is readable and was built from the current weights."""
+    try:
+        # mmap: only the small metadata is read, not the quantized tensors
+        artifact = torch.load(quantized_weights_path(model_path), map_location=torch.device('cpu'),
+                              mmap=True, weights_only=True)
+        return artifact.get('source_fingerprint') == weights_fingerprint(model_path)
+    except Exception:
+        return False
+
+def build_quantized_model(model_path: str, num_classes: int) -> nn.Module:
+    """
+    Returns the int8 dynamic-quantized model for `model_path`.
+    The quantized weights are cached on disk next to the checkpoint together with the
+    fingerprint of the fp32 source; they are rebuilt only when that file changes.
+    """
+    artifact_path = quantized_weights_path(model_path)
+    fingerprint = weights_fingerprint(model_path)
+
+    if os.path.exists(artifact_path):
+        try:
+            artifact = torch.load(artifact_path, map_location=torch.device('cpu'), weights_only=True)
+            if artifact.get('source_fingerprint') == fingerprint:
+                model = _quantized_skeleton(num_classes, artifact.get('head', 'flatten'))
+                model.load_state_dict(artifact['state_dict'])
+                model.eval()
+                return model
+            logger.info("Quantized artifact %s is stale, re-quantizing", artifact_path)
+        except Exception as e:
+            # A truncated or corrupt artifact is treated like a stale one and rebuilt
+            logger.warning("Could not load quantized artifact %s: %s", artifact_path, e)
+
+    model = quantize_model(build_eager_model(model_path, num_classes))
+    model.eval()
+    try:
+        artifact = {'source_fingerprint': fingerprint, 'head': model.head, 'state_dict': model.state_dict()}
+        save_atomically(lambda path: torch.save(artifact, path), artifact_path)
+    except OSError as e:
+        # A read-only model directory only costs a re-quantization on the next start
+        logger.warning("Could not cache quantized model at %s: %s", artifact_path, e)
+    return model
+
+def torchscript_path(weights_path: str, variant: str) -> str:
+    """Returns where the compiled artifact for `weights_path` lives (next to the source weights)."""
+    # int8 models are derived from the fp32 file, so they need their own artifact name
+    tag = ".int8" if variant == "int8" else ""
+    return os.path.splitext(weights_path)[0] + tag + TORCHSCRIPT_SUFFIX
+
+def compile_torchscript(model: nn.Module) -> torch.jit.ScriptModule:
+    """
+    Traces the model and freezes it: parameters become constants, so the JIT can fold
+    them and fuse conv+ReLU chains. The batch dimension stays dynamic.
+    """
+    with torch.no_grad():
+        traced = torch.jit.trace(model.eval(), torch.zeros(1, 3, 224, 224))
+    return torch.jit.freeze(traced)
+
+def torchscript_artifact_is_current(weights_path: str, variant: str) -> bool:
+    """True when the compiled artifact exists and records the fingerprint of the current weights."""
+    try:
+        with zipfile.ZipFile(torchscript_path(weights_path, variant)) as archive:
+            name = next(n for n in archive.namelist() if n.endswith('/extra/source_fingerprint'))
+            return archive.read(name).decode() == weights_fingerprint(weights_path)
+    except Exception:
+        return False
+
+def load_or_compile_torchscript(weights_path: str, variant: str, build_eager: Callable[[], nn.Module]) -> nn.Module:
+    """
+    Returns a TorchScript model for `weights_path`.
+    A compiled artifact saved with the SHA-256 of the source weights is loaded directly,
+    skipping Python module construction; otherwise the eager model is built, compiled
+    and saved for the next start. Any compilation failure falls back to the eager model.
+    """
+    artifact_path = torchscript_path(weights_path, variant)
+    fingerprint = weights_fingerprint(weights_path)
+
+    if os.path.exists(artifact_path):
+        try:
+            extra_files = {'source_fingerprint': ''}
+            compiled = torch.jit.load(artifact_path, map_location=torch.device('cpu'), _extra_files=extra_files)
+            stored = extra_files['source_fingerprint']
+            if (stored.decode() if isinstance(stored, bytes) else stored) == fingerprint:
+                return compiled
+            logger.info("Compiled artifact %s is stale, recompiling", artifact_path)
+        except Exception as e:
+            logger.warning("Could not load compiled artifact %s: %s", artifact_path, e)
+
+    model = build_eager()
+    try:
+        compiled = compile_torchscript(model)
+    except Exception as e:
+        logger.warning("TorchScript compilation failed for %s, using eager mode: %s", weights_path, e)
+        return model
+
+    try:
+        save_atomically(lambda path: torch.jit.save(compiled, path, _extra_files={'source_fingerprint': fingerprint}),
+                        artifact_path)
+    except OSError as e:
+        logger.warning("Could not cache compiled model at %s: %s", artifact_path, e)
+    return compiled
@@ -0,0 +1,187 @@
+import logging
+import os
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from PIL import Image
+from crop_disease_detector.services.interfaces import IDiseasePredictor, IDiseaseInfoProvider, PredictionResult
+from crop_disease_detector.services.metrics import stage_timer
+from crop_disease_detector.services.model_cache import ModelCache, weights_fingerprint
+from crop_disease_detector.services.prediction_cache import PredictionCache
+from crop_disease_detector.services.preprocessing import ImagePreprocessor
+from crop_disease_detector.services.disease_data import (
+    RICE_DISEASE_INFO, PULSE_DISEASE_INFO, RICE_CLASSES, PULSE_CLASSES
+)
+
+logger = logging.getLogger(__name__)
+
+ONNX_SUFFIX = ".onnx"
+INPUT_NAME = "image"
+OUTPUT_NAME = "logits"
+
+CROP_CLASSES = {"Rice": RICE_CLASSES, "Pulse": PULSE_CLASSES}
+CROP_DISEASE_INFO = {"Rice": RICE_DISEASE_INFO, "Pulse": PULSE_DISEASE_INFO}
+DEFAULT_ONNX_PATHS = {
+    "Rice": 'crop_disease_detector/models/best_model.onnx',
+    "Pulse": 'crop_disease_detector/models/pulse_disease_model.onnx',
+}
+
+def onnx_model_path(model_path: str) -> str:
+    """Returns where the exported ONNX model for `model_path` lives (next to the checkpoint)."""
+    return os.path.splitext(model_path)[0] + ONNX_SUFFIX
+
+def export_to_onnx(model_path: str, num_classes: int, output_path: Optional[str] = None, opset_version: int = 17) -> str:
+    """
+    Exports a CNNModel checkpoint to ONNX with a dynamic batch axis.
+    PyTorch is only needed here, not by OnnxDiseaseHandler.
+    """
+    import torch
+    from crop_disease_detector.services.model_loader import build_eager_model
+
+    output_path = output_path or onnx_model_path(model_path)
+    model = build_eager_model(model_path, num_classes)
+    torch.onnx.export(
+        model,
+        (torch.zeros(1, 3, 224, 224),),
+        output_path,
+        input_names=[INPUT_NAME],
+        output_names=[OUTPUT_NAME],
+        dynamic_axes={INPUT_NAME: {0: "batch"}, OUTPUT_NAME: {0: "batch"}},
+        opset_version=opset_version,
+        dynamo=False,
+    )
+    logger.info("Exported %s -> %s", model_path, output_path)
+    return output_path
+
+def verify_onnx_export(model_path: str, onnx_path: str, num_classes: int,
+                       batch_sizes: Sequence[int] = (1, 4), atol: float = 1e-4, rtol: float = 1e-3) -> float:
+    """
+    Checks that ONNX Runtime reproduces the torch logits on random inputs of several batch sizes.
+    Returns the largest absolute difference; raises AssertionError when outside tolerance.
+    """
+    import onnxruntime as ort
+    import torch
+    from crop_disease_detector.services.model_loader import build_eager_model
+
+    model = build_eager_model(model_path, num_classes)
+    session = ort.InferenceSession(onnx_path, providers=["CPUExecutionProvider"])
+    max_diff = 0.0
+    for batch_size in batch_sizes:
+        inputs = np.random.default_rng(batch_size).standard_normal((batch_size, 3, 224, 224), dtype=np.float32)
+        with torch.no_grad():
+            expected = model(torch.from_numpy(inputs)).numpy()
+        actual = session.run([OUTPUT_NAME], {INPUT_NAME: inputs})[0]
+        np.testing.assert_allclose(actual, expected, rtol=rtol, atol=atol)
+        max_diff = max(max_diff, float(np.abs(actual - expected).max()))
+    return max_diff
+
+def _softmax(logits: np.ndarray) -> np.ndarray:
+    shifted = np.exp(logits - logits.max(axis=1, keepdims=True))
+    return shifted / shifted.sum(axis=1, keepdims=True)
+
+class OnnxDiseaseHandler(IDiseasePredictor, IDiseaseInfoProvider):
+    """
+    Predictor backed by ONNX Runtime instead of PyTorch.
+    Reuses the class lists and disease information of the torch handlers, so it can be
+    swapped in for RiceDiseaseHandler/PulseDiseaseHandler anywhere (LSP).
+    """
+    # Same numpy pipeline as the torch handlers, so both backends see identical inputs
+    preprocessor = ImagePreprocessor()
+
+    def __init__(self, crop_name: str = "Rice", model_path: Optional[str] = None,
+                 intra_op_threads: int = 0, inter_op_threads: int = 0, execution_mode: str = "sequential",
+                 model_cache: Optional[ModelCache] = None, prediction_cache: Optional[PredictionCache] = None):
+        if crop_name not in CROP_CLASSES:
+            raise ValueError(f"Unknown crop: {crop_name!r}")
+        self.crop_name = crop_name
+        self.classes = list(CROP_CLASSES[crop_name])
+        self.model_path = model_path or DEFAULT_ONNX_PATHS[crop_name]
+        self.intra_op_threads = intra_op_threads
+        self.inter_op_threads = inter_op_threads
+        self.execution_mode = execution_mode
+        self.model_cache = model_cache or ModelCache.get_instance()
+        self.prediction_cache = prediction_cache
+        self.fingerprint: Optional[str] = None
+        self.model = None
+
+    def _create_session(self):
+        import onnxruntime as ort
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        options.intra_op_num_threads = self.intra_op_threads
+        options.inter_op_num_threads = self.inter_op_threads
+        options.execution_mode = (ort.ExecutionMode.ORT_PARALLEL if self.execution_mode == "parallel"
+                                  else ort.ExecutionMode.ORT_SEQUENTIAL)
+        return ort.InferenceSession(self.model_path, sess_options=options, providers=["CPUExecutionProvider"])
+
+    def load_model(self) -> Tuple[bool, Optional[str]]:
+        try:
+            variant = f"onnx-{self.intra_op_threads}-{self.inter_op_threads}-{self.execution_mode}"
+            self.model = self.model_cache.get_or_load(self.model_path, self._create_session, variant)
+            # Thread settings do not change the outputs, so all sessions of one export share cache entries
+            self.fingerprint = f"{self.crop_name}:{weights_fingerprint(self.model_path)}:onnx"
+            return True, None
+        except ImportError:
+            return False, "onnxruntime is not installed (pip install onnxruntime)"
+        except Exception as e:
+            return False, str(e)
+
+    def _to_result(self, probabilities: np.ndarray) -> PredictionResult:
+        predicted = int(probabilities.argmax())
+        return PredictionResult(
+            predicted_class=self.classes[predicted],
+            confidence_score=float(probabilities[predicted]) * 100,
+            probabilities={name: float(p) * 100 for name, p in zip(self.classes, probabilities)}
+        )
+
+    def predict(self, image) -> Optional[PredictionResult]:
+        if self.model is None:
+            return None
+        result = self.predict_batch([image], batch_size=1)[0]
+        if not result.ok:
+            logger.warning("ONNX prediction failed: %s", result.error)
+            return None
+        return result
+
+    def predict_batch(self, images: List[Any], batch_size: int = 16) -> List[PredictionResult]:
+        if self.model is None:
+            return [PredictionResult.failed("Model is not loaded") for _ in images]
+        if self.prediction_cache is not None and self.fingerprint:
+            return self.prediction_cache.predict_batch(
+                images, self.fingerprint, self.preprocessor,
+                lambda misses: self._predict_uncached(misses, batch_size), batch_size
+            )
+        return self._predict_uncached(images, batch_size)
+
+    def warm_up(self):
+        """Runs one dummy inference (bypassing the prediction cache) so the first real request is fast."""
+        self._predict_uncached([Image.new('RGB', self.preprocessor.size)], batch_size=1)
+
+    def _predict_uncached(self, images: List[Any], batch_size: int) -> List[PredictionResult]:
+        results: List[Optional[PredictionResult]] = [None] * len(images)
+        for start in range(0, len(images), batch_size):
+            arrays, positions = [], []
+            for index in range(start, min(start + batch_size, len(images))):
+                try:
+                    arrays.append(self.preprocessor.to_array(images[index]))
+                    positions.append(index)
+                except Exception as e:
+                    results[index] = PredictionResult.failed(f"Error preprocessing image: {e}")
+
+            if not arrays:
+                continue
+            try:
+                with stage_timer("forward"):
+                    logits = self.model.run([OUTPUT_NAME], {INPUT_NAME: np.stack(arrays)})[0]
+            except Exception as e:
+                for index in positions:
+                    results[index] = PredictionResult.failed(f"Error during prediction: {e}")
+                continue
+            with stage_timer("postprocess"):
+                for index, row in zip(positions, _softmax(logits)):
+                    results[index] = self._to_result(row)
+        return results
+
+    def get_disease_info(self, predicted_class: str) -> Dict[str, Any]:
+        return CROP_DISEASE_INFO[self.crop_name].get(predicted_class, {})
@@ -0,0 +1,194 @@
+import dataclasses
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Iterable, List, Optional, Tuple
+
+from crop_disease_detector.services.interfaces import PredictionResult
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class PredictionCacheStats:
+    """Snapshot of the prediction cache counters, used to size the cache."""
+    hits: int
+    disk_hits: int
+    misses: int
+    evictions: int
+    expirations: int
+    entries: int
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+def _copy(result: PredictionResult) -> PredictionResult:
+    """Copy of a result that shares nothing mutable with the cached one."""
+    return dataclasses.replace(result, probabilities=dict(result.probabilities))
+
+class PredictionCache:
+    """
+    Content-addressed cache of PredictionResults.
+    Keys combine a hash of the decoded image pixels with a model fingerprint (crop,
+    weights hash, variant), so re-clicks, re-uploads and shared photos skip the CNN,
+    while a retrained model never serves stale answers.
+    - Memory tier: LRU bounded by `max_entries` (0 disables it), entries expire after `ttl_seconds`.
+    - Disk tier (optional): SQLite file that survives restarts, with the same TTL and at
+      most `max_disk_entries` rows (oldest dropped first). Written once per scored chunk,
+      under its own lock, so disk I/O never holds up memory hits of other sessions.
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl_seconds: float = 3600.0, disk_path: Optional[str] = None,
+                 clock: Callable[[], float] = time.time, max_disk_entries: int = 100_000):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.max_disk_entries = max_disk_entries
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, Tuple[float, PredictionResult]]" = OrderedDict()
+        self._hits = self._disk_hits = self._misses = self._evictions = self._expirations = 0
+        self._db = None
+        # Serializes use of the shared SQLite connection; never taken while holding _lock
+        self._db_lock = threading.Lock()
+        if disk_path:
+            self._db = sqlite3.connect(disk_path, check_same_thread=False)
+            self._db.execute("CREATE TABLE IF NOT EXISTS predictions (key TEXT PRIMARY KEY, created REAL, result TEXT)")
+            self._db.execute("CREATE INDEX IF NOT EXISTS predictions_created ON predictions (created)")
+            self._disk_rows = self._prune_disk()
+
+    @staticmethod
+    def image_digest(image) -> str:
+        """Hash of the decoded pixels (mode and size included), independent of file name or encoding."""
+        digest = hashlib.blake2b(digest_size=20)
+        digest.update(f"{image.mode}:{image.size}".encode())
+        digest.update(image.tobytes())
+        return digest.hexdigest()
+
+    def _expired(self, created: float) -> bool:
+        return self._clock() - created > self.ttl_seconds
+
+    def _prune_disk(self) -> int:
+        """Drops expired rows and the oldest rows beyond max_disk_entries; returns the rows left."""
+        self._db.execute("DELETE FROM predictions WHERE created < ?", (self._clock() - self.ttl_seconds,))
+        self._db.execute("DELETE FROM predictions WHERE key IN "
+                         "(SELECT key FROM predictions ORDER BY created DESC LIMIT -1 OFFSET ?)",
+                         (self.max_disk_entries,))
+        self._db.commit()
+        return self._db.execute("SELECT COUNT(*) FROM predictions").fetchone()[0]
+
+    def get(self, key: str) -> Optional[PredictionResult]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if not self._expired(entry[0]):
+                    self._entries.move_to_end(key)
+                    self._hits += 1
+                    return _copy(entry[1])
+                del self._entries[key]
+                self._expirations += 1
+            if self._db is None:
+                self._misses += 1
+                return None
+
+        with self._db_lock:
+            row = self._db.execute("SELECT created, result FROM predictions WHERE key = ?", (key,)).fetchone()
+        with self._lock:
+            if row is not None and not self._expired(row[0]):
+                result = PredictionResult(**json.loads(row[1]))
+                self._store(key, row[0], result)
+                self._hits += 1
+                self._disk_hits += 1
+                return _copy(result)
+            self._misses += 1
+            return None
+
+    def put(self, key: str, result: PredictionResult):
+        """Stores a successful result; failed results are never cached."""
+        self.put_many([(key, result)])
+
+    def put_many(self, items: Iterable[Tuple[str, PredictionResult]]):
+        """Stores successful results; the disk tier gets them in one transaction."""
+        items = [(key, result) for key, result in items if result.ok]
+        if not items:
+            return
+        created = self._clock()
+        with self._lock:
+            for key, result in items:
+                self._store(key, created, _copy(result))
+        if self._db is None:
+            return
+
+        rows = [(key, created, json.dumps(dataclasses.asdict(result))) for key, result in items]
+        with self._db_lock:
+            try:
+                self._db.executemany("INSERT OR REPLACE INTO predictions VALUES (?, ?, ?)", rows)
+                self._db.commit()
+                # Replaced keys are over-counted; pruning recounts
+                self._disk_rows += len(rows)
+                if self._disk_rows > self.max_disk_entries:
+                    self._disk_rows = self._prune_disk()
+            except sqlite3.Error as e:
+                # The memory tier still has the entries; a full or locked disk only costs restarts
+                logger.warning("Could not persist cached predictions: %s", e)
+
+    def _store(self, key: str, created: float, result: PredictionResult):
+        if self.max_entries <= 0:
+            return
+        self._entries[key] = (created, result)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self._evictions += 1
+
+    def predict_batch(self, images: List[Any], fingerprint: str, preprocessor,
+                      score: Callable[[List[Any]], List[PredictionResult]], batch_size: int = 16) -> List[PredictionResult]:
+        """
+        Answers what it can from the cache and sends only the misses to `score`.
+        Images are decoded `batch_size` at a time, so memory stays bounded for long lists.
+        """
+        results: List[Optional[PredictionResult]] = [None] * len(images)
+        for start in range(0, len(images), batch_size):
+            pending, keys = [], []
+            for index in range(start, min(start + batch_size, len(images))):
+                try:
+                    image = preprocessor.load(images[index])
+                except Exception as e:
+                    results[index] = PredictionResult.failed(f"Error preprocessing image: {e}")
+                    continue
+                key = f"{fingerprint}:{self.image_digest(image)}"
+                cached = self.get(key)
+                if cached is not None:
+                    results[index] = cached
+                else:
+                    pending.append((index, image))
+                    keys.append(key)
+
+            if pending:
+                scored = score([image for _, image in pending])
+                for (index, _), result in zip(pending, scored):
+                    results[index] = result
+                # One disk transaction per chunk rather than per image
+                self.put_many(zip(keys, scored))
+        return results
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+        if self._db is not None:
+            with self._db_lock:
+                self._db.execute("DELETE FROM predictions")
+                self._db.commit()
+                self._disk_rows = 0
+
+    def stats(self) -> PredictionCacheStats:
+        with self._lock:
+            return PredictionCacheStats(
+                hits=self._hits, disk_hits=self._disk_hits, misses=self._misses,
+                evictions=self._evictions, expirations=self._expirations, entries=len(self._entries),
+            )
@@ -0,0 +1,86 @@
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+PENDING, LOADING, READY, FAILED = "pending", "loading", "ready", "failed"
+
+@dataclass
+class ModelStatus:
+    """Readiness of one crop model, as shown in the sidebar."""
+    crop_name: str
+    state: str = PENDING
+    load_seconds: Optional[float] = None
+    warmup_seconds: Optional[float] = None
+    error: Optional[str] = None
+
+    @property
+    def ready(self) -> bool:
+        return self.state == READY
+
+class ModelPreloader:
+    """
+    Loads and warms up every handler registered in the DependencyContainer on background
+    threads, so the first user of a crop does not pay the cold-load cost.
+    Loading goes through the shared ModelCache: a session that needs a model while it is
+    still loading waits for that same load instead of starting a second one.
+    """
+
+    def __init__(self, container):
+        self._container = container
+        self._lock = threading.Lock()
+        self._statuses: Dict[str, ModelStatus] = {}
+        self._done: Dict[str, threading.Event] = {}
+        self._started = False
+
+    def start(self) -> "ModelPreloader":
+        """Starts one daemon thread per model and returns immediately. Safe to call on every rerun."""
+        with self._lock:
+            if self._started:
+                return self
+            self._started = True
+            for key, handler_class in self._container._handlers.items():
+                crop = handler_class.crop_name
+                self._statuses[crop] = ModelStatus(crop)
+                self._done[crop] = threading.Event()
+                threading.Thread(target=self._load, args=(key, crop), name=f"preload-{crop}", daemon=True).start()
+        return self
+
+    def _set(self, crop: str, **changes):
+        with self._lock:
+            for name, value in changes.items():
+                setattr(self._statuses[crop], name, value)
+
+    def _load(self, key: str, crop: str):
+        self._set(crop, state=LOADING)
+        try:
+            handler = self._container.get_handler(key)
+            started = time.perf_counter()
+            success, error = handler.load_model()
+            loaded = time.perf_counter()
+            if not success:
+                self._set(crop, state=FAILED, error=error)
+                return
+            # First forward pass allocates buffers and picks kernels; pay it here, not on a user's click
+            handler.warm_up()
+            self._set(crop, state=READY, load_seconds=loaded - started,
+                      warmup_seconds=time.perf_counter() - loaded)
+            logger.info("Preloaded %s model in %.2fs", crop, loaded - started)
+        except Exception as e:
+            logger.exception("Preloading the %s model failed", crop)
+            self._set(crop, state=FAILED, error=str(e))
+        finally:
+            self._done[crop].set()
+
+    def wait(self, crop_name: str, timeout: Optional[float] = None) -> bool:
+        """Blocks until the crop's preload finished (successfully or not); False on timeout."""
+        event = self._done.get(crop_name)
+        return event.wait(timeout) if event is not None else True
+
+    def statuses(self) -> List[ModelStatus]:
+        """Snapshot of every model's status, in registration order."""
+        with self._lock:
+            return [ModelStatus(**vars(status)) for status in self._statuses.values()]
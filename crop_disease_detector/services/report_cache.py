@@ -0,0 +1,120 @@
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional
+
+from crop_disease_detector.services.interfaces import PredictionResult
+from crop_disease_detector.services.metrics import stage_timer
+from crop_disease_detector.services.prediction_cache import PredictionCache
+from crop_disease_detector.services.session_store import StoredImage
+
+# Bump whenever the PDF layout in report_generator.py changes, so cached reports are rebuilt
+REPORT_TEMPLATE_VERSION = 2
+
+@dataclass
+class ReportCacheStats:
+    hits: int
+    misses: int
+    evictions: int
+    entries: int
+    bytes: int
+
+class ReportCache:
+    """
+    Cache of generated PDF reports, keyed by (prediction, crop, image hash, template version).
+    Reports are built only when requested and at most once per key, so Streamlit reruns
+    (widget toggles, sidebar clicks) never touch ReportLab. Bounded by total PDF bytes.
+    """
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024,
+                 generate: Optional[Callable[..., bytes]] = None):
+        self.max_bytes = max_bytes
+        self._generate = generate
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, bytes]" = OrderedDict()
+        self._size = 0
+        self._hits = self._misses = self._evictions = 0
+
+    @staticmethod
+    def key(result: PredictionResult, crop_name: str, image_digest: Optional[str]) -> str:
+        # disease_info is looked up from (crop, predicted class), so it needs no place in the key
+        payload = json.dumps({
+            "class": result.predicted_class,
+            "confidence": round(result.confidence_score, 4),
+            "probabilities": sorted(result.probabilities.items()),
+            "crop": crop_name,
+            "image": image_digest or "",
+            "template": REPORT_TEMPLATE_VERSION,
+        })
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Cached PDF for `key`, or None (counts as a miss)."""
+        with self._lock:
+            pdf = self._entries.get(key)
+            if pdf is None:
+                self._misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return pdf
+
+    def peek(self, key: str) -> Optional[bytes]:
+        """Like get(), without touching the counters or LRU order (for rendering checks)."""
+        with self._lock:
+            return self._entries.get(key)
+
+    def key_for(self, result: PredictionResult, crop_name: str, image: Any = None) -> str:
+        """Cache key for a report on `image` (a StoredImage, a PIL image or None)."""
+        if isinstance(image, StoredImage):
+            digest = image.digest
+        else:
+            digest = PredictionCache.image_digest(image) if image is not None else None
+        return self.key(result, crop_name, digest)
+
+    def put(self, key: str, pdf: bytes):
+        if len(pdf) > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            self._size -= len(previous) if previous is not None else 0
+            self._entries[key] = pdf
+            self._size += len(pdf)
+            while self._size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= len(evicted)
+                self._evictions += 1
+
+    def get_or_generate(self, result: PredictionResult, disease_info: Dict[str, Any], crop_name: str,
+                        image: Any = None) -> bytes:
+        """
+        Returns the report for this prediction, building it on a miss.
+        `image` may be a StoredImage or a PIL image.
+        """
+        key = self.key_for(result, crop_name, image)
+        pdf = self.get(key)
+        if pdf is not None:
+            return pdf
+
+        generate = self._generate
+        if generate is None:
+            # ReportLab is imported only when a report is actually built
+            from crop_disease_detector.services.report_generator import ReportGenerator
+            generate = ReportGenerator.generate_pdf_report
+        with stage_timer("report"):
+            # StoredImages are passed as-is: the generator decodes them at print resolution
+            pdf = generate(result, disease_info, crop_name, image)
+        self.put(key, pdf)
+        return pdf
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def stats(self) -> ReportCacheStats:
+        with self._lock:
+            return ReportCacheStats(hits=self._hits, misses=self._misses, evictions=self._evictions,
+                                    entries=len(self._entries), bytes=self._size)
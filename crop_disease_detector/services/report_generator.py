@@ -1,17 +1,130 @@
-from reportlab.lib import colors
 from reportlab.lib.pagesizes import letter
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, Image as ReportLabImage, ListFlowable, ListItem
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, PageBreak, Image as ReportLabImage
 from reportlab.lib.units import inch
+from collections import Counter, OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor
 from io import BytesIO
 from datetime import datetime
+from xml.sax.saxutils import escape
 from PIL import Image
+import copy
+import multiprocessing
 import os
+import tempfile
+import threading
+
+from crop_disease_detector.services.prediction_cache import PredictionCache
+from crop_disease_detector.services.report_templates import (
+    BODY_STYLE, DATE_STYLE, DISCLAIMER, HEADING_STYLE, SUMMARY_COLUMN_WIDTHS, SUMMARY_TABLE_STYLE, TITLE,
+    TITLE_STYLE, disease_sections,
+)
+from crop_disease_detector.services.session_store import StoredImage
+
+# Box the photo is fitted into on the page, and the print resolution it is sampled to
+REPORT_IMAGE_BOX = (4 * inch, 3 * inch)
+REPORT_IMAGE_DPI = 200
+# Encoded report JPEGs kept for reuse (one per recent image, each well under 200 KB)
+IMAGE_CACHE_SIZE = 64
+# Field reports hold every page image until the PDF is saved, so they use a lower resolution
+FIELD_REPORT_IMAGE_DPI = 150
+# Below this many images, starting worker processes costs more than it saves
+FIELD_REPORT_MIN_PARALLEL = 8
+SEVERITY_ORDER = ('High', 'Medium', 'Low', 'None', 'Unknown')
+
+def _fit(image_size, box=REPORT_IMAGE_BOX):
+    """Display size in points of an image fitted into `box`, keeping its aspect ratio."""
+    ratio = min(box[0] / image_size[0], box[1] / image_size[1])
+    return image_size[0] * ratio, image_size[1] * ratio
+
+def encode_for_print(image, dpi=REPORT_IMAGE_DPI, box=REPORT_IMAGE_BOX):
+    """
+    JPEG bytes of `image` (StoredImage, encoded bytes or PIL image) sampled at `dpi` for
+    its size when fitted into `box`, plus that size in points. Never upscales.
+    """
+    # Aspect ratio from the original upload; thumbnails keep it
+    if isinstance(image, StoredImage):
+        source_size, pil_image = image.original_size, Image.open(BytesIO(image.data))
+    elif isinstance(image, (bytes, bytearray)):
+        pil_image = Image.open(BytesIO(image))
+        source_size = pil_image.size
+    else:
+        source_size, pil_image = image.size, image
+    display_size = _fit(source_size, box)
+    pixels = (max(1, round(display_size[0] / inch * dpi)), max(1, round(display_size[1] / inch * dpi)))
+
+    if pil_image is not image:
+        # Opened here: let a JPEG decoder skip straight to the nearest scale above the target
+        pil_image.draft('RGB', pixels)
+    if pil_image.mode != 'RGB':
+        pil_image = pil_image.convert('RGB')
+    if pil_image.width > pixels[0] or pil_image.height > pixels[1]:
+        pil_image = pil_image.resize(pixels, Image.LANCZOS, reducing_gap=3.0)
+
+    img_io = BytesIO()
+    pil_image.save(img_io, format='JPEG', quality=85)
+    return img_io.getvalue(), display_size
+
+def _prepare_field_image(image):
+    """Process-pool task: print-ready JPEG for one field report image, or the error message."""
+    try:
+        return encode_for_print(image, FIELD_REPORT_IMAGE_DPI), None
+    except Exception as e:
+        return None, str(e)
+
+def _usable_cores():
+    # Same rule as execution.available_cores(), without importing torch
+    return len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else os.cpu_count() or 1
+
+def _read_upload(image):
+    if hasattr(image, 'read'):
+        image.seek(0)
+        return image.read()
+    return image
+
+def _in_order(executor, fn, items, window):
+    """executor.map() that keeps at most `window` tasks (and their inputs) in flight."""
+    pending = deque()
+    for item in items:
+        pending.append(executor.submit(fn, item))
+        if len(pending) >= window:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
 
 class ReportGenerator:
     """
     Service for generating PDF reports for disease detection results.
     """
+    _image_cache: "OrderedDict[str, tuple]" = OrderedDict()
+    _image_cache_lock = threading.Lock()
+
+    @classmethod
+    def encode_report_image(cls, image, dpi=REPORT_IMAGE_DPI):
+        """
+        JPEG bytes of `image` (StoredImage or PIL image) sampled at `dpi` for its printed size,
+        plus that size in points. Cached per image content, so repeated reports skip the
+        decode, resize and encode entirely.
+        """
+        key = image.digest if isinstance(image, StoredImage) else PredictionCache.image_digest(image)
+        key = f"{key}:{dpi}"
+        with cls._image_cache_lock:
+            cached = cls._image_cache.get(key)
+            if cached is not None:
+                cls._image_cache.move_to_end(key)
+                return cached
+
+        encoded = encode_for_print(image, dpi)
+        with cls._image_cache_lock:
+            cls._image_cache[key] = encoded
+            while len(cls._image_cache) > IMAGE_CACHE_SIZE:
+                cls._image_cache.popitem(last=False)
+        return encoded
+
+    @classmethod
+    def clear_image_cache(cls):
+        with cls._image_cache_lock:
+            cls._image_cache.clear()
+
     
     @staticmethod
     def generate_pdf_report(prediction_result, disease_info, crop_type, uploaded_image=None):
@@ -22,76 +135,33 @@ class ReportGenerator:
             prediction_result: The result object from the prediction handler.
             disease_info (dict): Dictionary containing details about the disease.
             crop_type (str): Type of crop (e.g., "Rice", "Pulse").
-            uploaded_image (PIL.Image): The image uploaded by the user.
+            uploaded_image (PIL.Image or StoredImage): The image uploaded by the user.
             
         Returns:
             bytes: The generated PDF content.
         """
         buffer = BytesIO()
         doc = SimpleDocTemplate(buffer, pagesize=letter, rightMargin=72, leftMargin=72, topMargin=72, bottomMargin=72)
-        
-        styles = getSampleStyleSheet()
-        # Custom styles
-        title_style = ParagraphStyle(
-            'CustomTitle',
-            parent=styles['Heading1'],
-            fontSize=24,
-            textColor=colors.HexColor('#1e3a8a'),
-            alignment=1, # Center
-            spaceAfter=30
-        )
-        
-        heading_style = ParagraphStyle(
-            'CustomHeading',
-            parent=styles['Heading2'],
-            fontSize=16,
-            textColor=colors.HexColor('#2563eb'),
-            spaceBefore=15,
-            spaceAfter=10
-        )
-        
-        body_style = ParagraphStyle(
-            'CustomBody',
-            parent=styles['Normal'],
-            fontSize=11,
-            leading=14
-        )
-        
+
+        # Styles and the per-disease sections come pre-built from report_templates;
+        # only the header, image and summary table are created per report
         story = []
         
         # 1. Title
-        story.append(Paragraph("Agricultural Disease Analysis Report", title_style))
-        story.append(Paragraph(f"Generated on: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}", 
-                             ParagraphStyle('Date', parent=body_style, alignment=1)))
+        story.append(copy.copy(TITLE))
+        story.append(Paragraph(f"Generated on: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}", DATE_STYLE))
         story.append(Spacer(1, 20))
         
         # 2. Image (if available)
-        if uploaded_image:
+        if uploaded_image is not None:
             try:
-                # Save PIL image to bytes to use in ReportLab
-                img_io = BytesIO()
-                # Ensure image is RGB
-                if uploaded_image.mode != 'RGB':
-                    uploaded_image = uploaded_image.convert('RGB')
-                    
-                # Resize for report if too large, keeping aspect ratio
-                max_width = 4 * inch
-                max_height = 3 * inch
-                img_width, img_height = uploaded_image.size
-                ratio = min(max_width/img_width, max_height/img_height)
-                new_size = (int(img_width * ratio), int(img_height * ratio))
-                
-                # We don't necessarily need to resize the actual bits, ReportLab can scale,
-                # but let's be safe with memory
-                
-                uploaded_image.save(img_io, format='JPEG', quality=85)
-                img_io.seek(0)
-                
-                rl_image = ReportLabImage(img_io, width=new_size[0], height=new_size[1])
+                # Downsampled to print resolution (not the full upload) and reused across reports
+                jpeg, (width, height) = ReportGenerator.encode_report_image(uploaded_image)
+                rl_image = ReportLabImage(BytesIO(jpeg), width=width, height=height)
                 story.append(rl_image)
                 story.append(Spacer(1, 20))
             except Exception as e:
-                story.append(Paragraph(f"[Process Image Error: {str(e)}]", body_style))
+                story.append(Paragraph(f"[Process Image Error: {str(e)}]", BODY_STYLE))
         
         # 3. Diagnosis Summary Table
         data = [
@@ -102,85 +172,165 @@ class ReportGenerator:
             ["Severity", disease_info.get('severity', 'Unknown')]
         ]
         
-        table = Table(data, colWidths=[2.5*inch, 3*inch])
-        table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (1, 0), colors.HexColor('#3b82f6')),
-            ('TEXTCOLOR', (0, 0), (1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, 0), 12),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-            ('BACKGROUND', (0, 1), (-1, -1), colors.HexColor('#f0f9ff')),
-            ('GRID', (0, 0), (-1, -1), 1, colors.white),
-            ('PADDING', (0, 0), (-1, -1), 10),
-        ]))
+        table = Table(data, colWidths=SUMMARY_COLUMN_WIDTHS)
+        table.setStyle(SUMMARY_TABLE_STYLE)
         story.append(table)
         story.append(Spacer(1, 20))
         
-        # 4. Detailed Information
-        story.append(Paragraph("Disease Details", heading_style))
-        
-        # Overview
-        story.append(Paragraph("<b>Overview:</b>", body_style))
-        overview_text = disease_info.get('overview', disease_info.get('description', 'N/A'))
-        story.append(Paragraph(overview_text, body_style))
-        story.append(Spacer(1, 10))
-
-        # Symptoms
-        story.append(Paragraph("<b>Symptoms:</b>", body_style))
-        story.append(Paragraph(disease_info.get('symptoms', 'N/A'), body_style))
-        story.append(Spacer(1, 10))
-        
-        # Quick Treatment
-        story.append(Paragraph("<b>Quick Treatment:</b>", body_style))
-        story.append(Paragraph(disease_info.get('treatment', 'N/A'), body_style))
-        story.append(Spacer(1, 15))
-
-        # 5. Prevention Tips
-        prevention_tips = disease_info.get('prevention', [])
-        if prevention_tips:
-            story.append(Paragraph("Prevention Tips", heading_style))
-            list_items = [ListItem(Paragraph(tip, body_style)) for tip in prevention_tips]
-            t_list = ListFlowable(
-                list_items,
-                bulletType='bullet',
-                start='circle',
-                leftIndent=20,
-                spaceAfter=10
-            )
-            story.append(t_list)
-            story.append(Spacer(1, 15))
-            
-        # 6. Practical Treatment Guidance
-        treatment_steps = disease_info.get('treatment_guidance', disease_info.get('cure_steps', []))
-        if treatment_steps:
-            story.append(Paragraph("Practical Treatment Guidance", heading_style))
-            list_items = [ListItem(Paragraph(step, body_style)) for step in treatment_steps]
-            t_list = ListFlowable(
-                list_items,
-                bulletType='bullet',
-                start='circle',
-                leftIndent=20,
-                spaceAfter=10
-            )
-            story.append(t_list)
-            story.append(Spacer(1, 20))
+        # 4-6. Disease details, prevention tips and treatment guidance (cached per disease)
+        story.extend(disease_sections(disease_info))
 
         story.append(Spacer(1, 30))
         
-        # 5. Disclaimer
-        disclaimer_style = ParagraphStyle(
-            'Disclaimer',
-            parent=body_style,
-            fontSize=8,
-            textColor=colors.gray,
-            alignment=1 # Center
-        )
-        story.append(Paragraph(" "
-                               "", 
-                               disclaimer_style))
+        # 7. Disclaimer
+        story.append(copy.copy(DISCLAIMER))
         
         # Build PDF
         doc.build(story)
         buffer.seek(0)
         return buffer.getvalue()
+
+    @staticmethod
+    def generate_field_report(entries, crop_type, disease_info_for, output_path=None,
+                              include_appendix=True, workers=None, max_images=None):
+        """
+        Generates one consolidated PDF for a batch of photos from the same field.
+
+        Layout: a summary page (condition counts, severity breakdown, unreadable files),
+        one page per scored image, and optionally an appendix with the reference
+        sections of each distinct disease found, included once.
+
+        Images are decoded, downsampled and JPEG-encoded in a process pool (the
+        expensive part of each page) and written to a temporary directory; pages refer
+        to them by path, so ReportLab embeds the JPEG bytes without decoding them again.
+        ReportLab keeps every page's JPEG in memory until it writes the file, so memory
+        still grows with the page count: the peak is about three times the size of the
+        finished PDF (roughly 0.5 MB per page for noisy 150 dpi photos). `max_images`
+        bounds that peak: larger batches raise ValueError before any work is done.
+
+        Args:
+            entries: Iterable of (name, PredictionResult, image) in page order; image may be
+                encoded bytes, a file object, a StoredImage, a PIL image or None.
+            crop_type (str): Type of crop (e.g., "Rice", "Pulse").
+            disease_info_for (callable): Maps a predicted class to its disease info dict.
+            output_path (str): Where to write the PDF; a new temporary file by default.
+            include_appendix (bool): Add the per-disease reference appendix.
+            workers (int): Worker processes (default: usable cores); 0 or 1 works in-process.
+            max_images (int): Most scored images (pages) allowed; None for no limit.
+
+        Returns:
+            str: Path of the written PDF (the caller owns and deletes it).
+        """
+        entries = list(entries)
+        crop = crop_type.replace("🌾 ", "").replace("🫘 ", "")
+        scored = [(name, result, image) for name, result, image in entries if result.ok]
+        failed = [(name, result) for name, result, _ in entries if not result.ok]
+        if max_images is not None and len(scored) > max_images:
+            raise ValueError(f"Field reports cover at most {max_images} images, got {len(scored)}")
+        infos = {result.predicted_class: disease_info_for(result.predicted_class) for _, result, _ in scored}
+
+        created = output_path is None
+        if created:
+            handle, output_path = tempfile.mkstemp(prefix="field_report_", suffix=".pdf")
+            os.close(handle)
+        doc = SimpleDocTemplate(output_path, pagesize=letter, rightMargin=72, leftMargin=72, topMargin=72, bottomMargin=72)
+
+        # 1. Summary page
+        story = [
+            Paragraph("Field Disease Analysis Report", TITLE_STYLE),
+            Paragraph(f"Generated on: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}", DATE_STYLE),
+            Spacer(1, 20),
+        ]
+        overview = Table([
+            ["Field Summary", ""],
+            ["Crop Type", crop],
+            ["Images Analyzed", str(len(scored))],
+            ["Unreadable Images", str(len(failed))],
+        ], colWidths=SUMMARY_COLUMN_WIDTHS)
+        overview.setStyle(SUMMARY_TABLE_STYLE)
+        story += [overview, Spacer(1, 20)]
+
+        if scored:
+            counts = Counter(result.predicted_class for _, result, _ in scored)
+            confidence = {name: 0.0 for name in counts}
+            for _, result, _ in scored:
+                confidence[result.predicted_class] += result.confidence_score / counts[result.predicted_class]
+            conditions = [["Condition", "Images", "Share", "Severity", "Mean Confidence"]]
+            for condition, count in counts.most_common():
+                conditions.append([condition, str(count), f"{count / len(scored):.0%}",
+                                   infos[condition].get('severity', 'Unknown'), f"{confidence[condition]:.1f}%"])
+            table = Table(conditions, colWidths=[1.9 * inch, 0.8 * inch, 0.8 * inch, 0.9 * inch, 1.3 * inch])
+            table.setStyle(SUMMARY_TABLE_STYLE)
+            story += [Paragraph("Detected Conditions", HEADING_STYLE), table, Spacer(1, 20)]
+
+            severities = Counter(infos[result.predicted_class].get('severity', 'Unknown') for _, result, _ in scored)
+            rank = {level: position for position, level in enumerate(SEVERITY_ORDER)}
+            rows = [["Severity", "Images"]]
+            rows += [[level, str(severities[level])] for level in sorted(severities, key=lambda l: rank.get(l, len(rank)))]
+            table = Table(rows, colWidths=SUMMARY_COLUMN_WIDTHS)
+            table.setStyle(SUMMARY_TABLE_STYLE)
+            story += [Paragraph("Severity Breakdown", HEADING_STYLE), table]
+
+        if failed:
+            story.append(Paragraph("Unreadable Images", HEADING_STYLE))
+            story += [Paragraph(f"{escape(name)}: {escape(result.error)}", BODY_STYLE) for name, result in failed]
+
+        # 2. One page per scored image (images prepared in parallel, consumed in page order)
+        workers = _usable_cores() if workers is None else workers
+        # File objects (e.g. Streamlit uploads) are read only when their image is submitted
+        images = (_read_upload(image) for _, _, image in scored)
+        executor = None
+        if workers > 1 and len(scored) >= FIELD_REPORT_MIN_PARALLEL:
+            # spawn: forking a process that may be running torch threads can deadlock
+            executor = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+            prepared = _in_order(executor, _prepare_field_image, images, window=4 * workers)
+        else:
+            prepared = map(_prepare_field_image, images)
+
+        # Removed once the document is built
+        image_dir = tempfile.TemporaryDirectory(prefix="field_report_")
+        try:
+            for index, ((name, result, image), (encoded, error)) in enumerate(zip(scored, prepared), start=1):
+                story += [PageBreak(), Paragraph(f"Image {index} of {len(scored)}: {escape(name)}", HEADING_STYLE)]
+                if encoded is not None:
+                    jpeg, (width, height) = encoded
+                    # A file path makes ReportLab name the image by path; an in-memory image
+                    # would be decoded to RGB just to hash it, and that copy kept until the end
+                    image_path = os.path.join(image_dir.name, f"{index}.jpg")
+                    with open(image_path, 'wb') as f:
+                        f.write(jpeg)
+                    story += [ReportLabImage(image_path, width=width, height=height), Spacer(1, 20)]
+                elif image is not None:
+                    story.append(Paragraph(f"[Process Image Error: {escape(error)}]", BODY_STYLE))
+                info = infos[result.predicted_class]
+                table = Table([
+                    ["Analysis Parameter", "Result"],
+                    ["Detected Condition", result.predicted_class],
+                    ["Confidence Score", f"{result.confidence_score:.1f}%"],
+                    ["Severity", info.get('severity', 'Unknown')],
+                ], colWidths=SUMMARY_COLUMN_WIDTHS)
+                table.setStyle(SUMMARY_TABLE_STYLE)
+                story.append(table)
+            if executor is not None:
+                executor.shutdown(cancel_futures=True)
+                executor = None
+
+            # 3. Appendix: reference sections of every distinct disease (healthy classes have severity "None")
+            diseases = sorted(condition for condition, info in infos.items() if info.get('severity') != 'None')
+            if include_appendix and diseases:
+                story += [PageBreak(), Paragraph("Appendix: Disease Reference", TITLE_STYLE)]
+                for condition in diseases:
+                    story.append(Paragraph(escape(condition), HEADING_STYLE))
+                    story += disease_sections(infos[condition])
+
+            story += [Spacer(1, 30), copy.copy(DISCLAIMER)]
+            doc.build(story)
+        except BaseException:
+            if created:
+                os.remove(output_path)
+            raise
+        finally:
+            if executor is not None:
+                executor.shutdown(cancel_futures=True)
+            image_dir.cleanup()
+        return output_path
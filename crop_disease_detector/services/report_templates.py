@@ -0,0 +1,143 @@
+import copy
+import hashlib
+import json
+import threading
+from typing import Any, Dict, List, Tuple, Union
+
+from reportlab import rl_config
+from reportlab.lib import colors
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.lib.units import inch
+from reportlab.platypus import Flowable, Paragraph, Spacer, TableStyle, ListFlowable, ListItem
+
+# Embedded JPEGs are already binary-safe; without ReportLab's C accelerator the ASCII85 pass
+# over them is pure Python and dominated report generation
+rl_config.useA85 = 0
+
+# Styles are immutable once built, so every report shares one set
+_SAMPLE_STYLES = getSampleStyleSheet()
+
+TITLE_STYLE = ParagraphStyle(
+    'CustomTitle',
+    parent=_SAMPLE_STYLES['Heading1'],
+    fontSize=24,
+    textColor=colors.HexColor('#1e3a8a'),
+    alignment=1, # Center
+    spaceAfter=30
+)
+
+HEADING_STYLE = ParagraphStyle(
+    'CustomHeading',
+    parent=_SAMPLE_STYLES['Heading2'],
+    fontSize=16,
+    textColor=colors.HexColor('#2563eb'),
+    spaceBefore=15,
+    spaceAfter=10
+)
+
+BODY_STYLE = ParagraphStyle(
+    'CustomBody',
+    parent=_SAMPLE_STYLES['Normal'],
+    fontSize=11,
+    leading=14
+)
+
+DATE_STYLE = ParagraphStyle('Date', parent=BODY_STYLE, alignment=1)
+
+DISCLAIMER_STYLE = ParagraphStyle(
+    'Disclaimer',
+    parent=BODY_STYLE,
+    fontSize=8,
+    textColor=colors.gray,
+    alignment=1 # Center
+)
+
+SUMMARY_TABLE_STYLE = TableStyle([
+    ('BACKGROUND', (0, 0), (1, 0), colors.HexColor('#3b82f6')),
+    ('TEXTCOLOR', (0, 0), (1, 0), colors.whitesmoke),
+    ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, 0), 12),
+    ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+    ('BACKGROUND', (0, 1), (-1, -1), colors.HexColor('#f0f9ff')),
+    ('GRID', (0, 0), (-1, -1), 1, colors.white),
+    ('PADDING', (0, 0), (-1, -1), 10),
+])
+SUMMARY_COLUMN_WIDTHS = [2.5 * inch, 3 * inch]
+
+TITLE = Paragraph("Agricultural Disease Analysis Report", TITLE_STYLE)
+DISCLAIMER = Paragraph(" ", DISCLAIMER_STYLE)
+
+# A parsed flowable, or the parsed items of a bullet list
+_Part = Union[Flowable, Tuple[Paragraph, ...]]
+
+class DiseaseSections:
+    """
+    The static part of a report for one disease (details, prevention tips, treatment
+    guidance), parsed once. `render()` hands out fresh copies, because ReportLab stores
+    layout state on flowables while building and reports may be built concurrently.
+    """
+
+    def __init__(self, parts: List[_Part]):
+        self._parts = parts
+
+    @staticmethod
+    def _bullets(items: Tuple[Paragraph, ...]) -> ListFlowable:
+        return ListFlowable(
+            [ListItem(copy.copy(item)) for item in items],
+            bulletType='bullet',
+            start='circle',
+            leftIndent=20,
+            spaceAfter=10
+        )
+
+    def render(self) -> List[Flowable]:
+        return [self._bullets(part) if isinstance(part, tuple) else copy.copy(part) for part in self._parts]
+
+    @classmethod
+    def build(cls, disease_info: Dict[str, Any]) -> "DiseaseSections":
+        parts: List[_Part] = [Paragraph("Disease Details", HEADING_STYLE)]
+
+        # Overview
+        parts.append(Paragraph("<b>Overview:</b>", BODY_STYLE))
+        parts.append(Paragraph(disease_info.get('overview', disease_info.get('description', 'N/A')), BODY_STYLE))
+        parts.append(Spacer(1, 10))
+
+        # Symptoms
+        parts.append(Paragraph("<b>Symptoms:</b>", BODY_STYLE))
+        parts.append(Paragraph(disease_info.get('symptoms', 'N/A'), BODY_STYLE))
+        parts.append(Spacer(1, 10))
+
+        # Quick Treatment
+        parts.append(Paragraph("<b>Quick Treatment:</b>", BODY_STYLE))
+        parts.append(Paragraph(disease_info.get('treatment', 'N/A'), BODY_STYLE))
+        parts.append(Spacer(1, 15))
+
+        # Prevention Tips
+        prevention_tips = disease_info.get('prevention', [])
+        if prevention_tips:
+            parts.append(Paragraph("Prevention Tips", HEADING_STYLE))
+            parts.append(tuple(Paragraph(tip, BODY_STYLE) for tip in prevention_tips))
+            parts.append(Spacer(1, 15))
+
+        # Practical Treatment Guidance
+        treatment_steps = disease_info.get('treatment_guidance', disease_info.get('cure_steps', []))
+        if treatment_steps:
+            parts.append(Paragraph("Practical Treatment Guidance", HEADING_STYLE))
+            parts.append(tuple(Paragraph(step, BODY_STYLE) for step in treatment_steps))
+            parts.append(Spacer(1, 20))
+        return cls(parts)
+
+_sections_cache: Dict[str, DiseaseSections] = {}
+_sections_lock = threading.Lock()
+
+def disease_sections(disease_info: Dict[str, Any]) -> List[Flowable]:
+    """Fresh flowables for the static sections of `disease_info`, parsed once per distinct content."""
+    key = hashlib.sha1(json.dumps(disease_info, sort_keys=True, default=str).encode()).hexdigest()
+    with _sections_lock:
+        sections = _sections_cache.get(key)
+    if sections is None:
+        sections = DiseaseSections.build(disease_info)
+        with _sections_lock:
+            _sections_cache[key] = sections
+    return sections.render()
@@ -0,0 +1,171 @@
+import hashlib
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from io import BytesIO
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from PIL import Image
+from crop_disease_detector.services.metrics import StageMetrics
+
+# Uploads up to this size are kept as-is; larger ones are replaced by a JPEG thumbnail
+MAX_ORIGINAL_BYTES = 2 * 1024 * 1024
+# Longest side of the thumbnail: enough for a 4-inch report image at 300 dpi
+THUMBNAIL_SIZE = 1600
+FOOTPRINT_GAUGE = "session_image_bytes"
+
+@dataclass(frozen=True)
+class StoredImage:
+    """
+    Compact stand-in for an uploaded image: compressed bytes plus a content hash.
+    Decoded only when pixels are actually needed (prediction, PDF report).
+    """
+    data: bytes
+    digest: str
+    original_size: Tuple[int, int]
+    is_thumbnail: bool = False
+
+    @classmethod
+    def from_bytes(cls, data: bytes, max_bytes: int = MAX_ORIGINAL_BYTES,
+                   thumbnail_size: int = THUMBNAIL_SIZE) -> "StoredImage":
+        """Validates the upload (header only) and keeps it, or a bounded thumbnail when it is large."""
+        digest = hashlib.sha256(data).hexdigest()
+        with Image.open(BytesIO(data)) as image:
+            original_size = image.size
+            if len(data) <= max_bytes:
+                image.verify()
+                return cls(data, digest, original_size)
+            image.draft('RGB', (thumbnail_size, thumbnail_size))
+            thumbnail = image.convert('RGB')
+        thumbnail.thumbnail((thumbnail_size, thumbnail_size))
+        buffer = BytesIO()
+        thumbnail.save(buffer, format='JPEG', quality=90)
+        return cls(buffer.getvalue(), digest, original_size, is_thumbnail=True)
+
+    @property
+    def nbytes(self) -> int:
+        return len(self.data)
+
+    def decode(self) -> Image.Image:
+        return Image.open(BytesIO(self.data)).convert('RGB')
+
+@dataclass
+class SessionFootprint:
+    sessions: int
+    bytes: int
+
+@dataclass
+class _Session:
+    seen: float
+    image: Optional[StoredImage] = None
+    # Temporary files owned by the session (e.g. a field report PDF), by name
+    files: Dict[str, str] = field(default_factory=dict)
+
+def _remove_files(paths: Iterable[str]):
+    for path in paths:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+class SessionImageStore:
+    """
+    Holds the uploaded image of every Streamlit session outside st.session_state.
+    Sessions keep only a key; the store enforces one image per session, evicts sessions
+    idle for longer than `max_idle_seconds` (closed tabs never say goodbye), and
+    publishes the total footprint as a gauge. Temporary files handed to a session
+    are deleted when it is evicted or discarded. Files are removed outside the lock.
+    """
+
+    def __init__(self, max_idle_seconds: float = 1800.0, clock: Callable[[], float] = time.monotonic,
+                 metrics: Optional[StageMetrics] = None):
+        self.max_idle_seconds = max_idle_seconds
+        self._clock = clock
+        self._metrics = metrics
+        self._lock = threading.Lock()
+        self._sessions: Dict[str, _Session] = {}
+
+    def _evict_idle_locked(self, now: float) -> Tuple[List[str], List[str]]:
+        """Drops idle sessions; returns (their keys, their files to delete)."""
+        idle = [key for key, session in self._sessions.items() if now - session.seen > self.max_idle_seconds]
+        files = [path for key in idle for path in self._sessions.pop(key).files.values()]
+        if idle:
+            self._publish_locked()
+        return idle, files
+
+    def _publish_locked(self):
+        metrics = self._metrics or StageMetrics.get_instance()
+        metrics.set_gauge(FOOTPRINT_GAUGE, self._bytes_locked())
+
+    def _bytes_locked(self) -> int:
+        return sum(session.image.nbytes for session in self._sessions.values() if session.image is not None)
+
+    def put(self, session_key: str, image: StoredImage):
+        """Stores the session's current image, replacing its previous one."""
+        with self._lock:
+            now = self._clock()
+            _, orphans = self._evict_idle_locked(now)
+            session = self._sessions.setdefault(session_key, _Session(now))
+            session.seen, session.image = now, image
+            self._publish_locked()
+        _remove_files(orphans)
+
+    def get(self, session_key: str) -> Optional[StoredImage]:
+        """Returns the session's image (None once evicted) and marks the session active."""
+        with self._lock:
+            now = self._clock()
+            _, orphans = self._evict_idle_locked(now)
+            session = self._sessions.get(session_key)
+            if session is not None:
+                session.seen = now
+        _remove_files(orphans)
+        return session.image if session is not None else None
+
+    def put_file(self, session_key: str, name: str, path: str):
+        """Hands a temporary file over to the session; its previous file under `name` is deleted."""
+        with self._lock:
+            now = self._clock()
+            _, orphans = self._evict_idle_locked(now)
+            session = self._sessions.setdefault(session_key, _Session(now))
+            session.seen = now
+            previous = session.files.get(name)
+            session.files[name] = path
+        _remove_files(orphans + ([previous] if previous not in (None, path) else []))
+
+    def file(self, session_key: str, name: str) -> Optional[str]:
+        """Path of the session's file `name` (None if there is none); marks the session active."""
+        with self._lock:
+            now = self._clock()
+            _, orphans = self._evict_idle_locked(now)
+            session = self._sessions.get(session_key)
+            if session is not None:
+                session.seen = now
+        _remove_files(orphans)
+        return session.files.get(name) if session is not None else None
+
+    def discard_file(self, session_key: str, name: str):
+        """Deletes the session's file `name`, if any."""
+        with self._lock:
+            session = self._sessions.get(session_key)
+            path = session.files.pop(name, None) if session is not None else None
+        _remove_files([path] if path else [])
+
+    def discard(self, session_key: str):
+        """Drops the session: its image and its files."""
+        with self._lock:
+            session = self._sessions.pop(session_key, None)
+            if session is not None:
+                self._publish_locked()
+        _remove_files(session.files.values() if session is not None else [])
+
+    def evict_idle(self) -> List[str]:
+        """Drops idle sessions now (deleting their files); returns their keys."""
+        with self._lock:
+            evicted, orphans = self._evict_idle_locked(self._clock())
+        _remove_files(orphans)
+        return evicted
+
+    def footprint(self) -> SessionFootprint:
+        with self._lock:
+            return SessionFootprint(sessions=len(self._sessions), bytes=self._bytes_locked())
@@ -0,0 +1,108 @@
+import os
+from dataclasses import dataclass
+from typing import Mapping, Optional
+
+ENV_PREFIX = "CROP_DETECTOR_"
+
+@dataclass
+class InferenceSettings:
+    """
+    Runtime options for the inference stack.
+    Handlers receive an instance from the DependencyContainer, so deployments can tune
+    loading and execution through CROP_DETECTOR_* environment variables without code changes.
+    """
+    # "pth": private copy of the weights per process (default)
+    # "mmap": weights memory-mapped from the converted *.mmap.pt file, shared via the OS page cache
+    weights_format: str = "pth"
+    # "fp32": full-precision weights (default)
+    # "int8": dynamic int8 quantization of the linear layers, cached on disk as *.int8.pt
+    precision: str = "fp32"
+    # "eager": plain PyTorch modules (default)
+    # "torchscript": traced + frozen model, saved as *.torchscript.pt and loaded directly on later starts
+    # "onnx": ONNX Runtime session over the exported *.onnx model (no PyTorch needed at inference)
+    backend: str = "eager"
+    # Thread budget per model (0 = runtime default). Applies to torch and ONNX Runtime; in-process torch
+    # models share one process-wide budget, so use `workers` to give each model its own cores.
+    intra_op_threads: int = 0
+    inter_op_threads: int = 0
+    # ONNX Runtime graph execution: "sequential"/"parallel"
+    execution_mode: str = "sequential"
+    # Torch backends only: 0 runs the model in-process (default); N > 0 serves it from N worker
+    # processes, each pinned to its own core set (disjoint across all pools) and owning one model copy
+    workers: int = 0
+    # How batches are spread over the workers: "round_robin" or "least_loaded"
+    dispatch: str = "round_robin"
+    # Prediction cache: max in-memory entries (0 disables it), entry lifetime in seconds,
+    # an optional SQLite file so cached predictions survive restarts ("" = memory only),
+    # and the most rows kept in that file (oldest dropped first)
+    prediction_cache_size: int = 1024
+    prediction_cache_ttl: float = 3600.0
+    prediction_cache_path: str = ""
+    prediction_cache_disk_entries: int = 100_000
+    # Uploaded images of sessions idle for longer than this many seconds are dropped
+    session_idle_seconds: float = 1800.0
+    # Most photos in one field report: ReportLab holds every page image until the PDF is
+    # written (peak ~1.5 MB per page at 150 dpi), so larger batches must be split
+    field_report_max_images: int = 100
+
+    def __post_init__(self):
+        if self.weights_format not in ("pth", "mmap"):
+            raise ValueError(f"Unknown weights_format: {self.weights_format!r}")
+        if self.precision not in ("fp32", "int8"):
+            raise ValueError(f"Unknown precision: {self.precision!r}")
+        if self.backend not in ("eager", "torchscript", "onnx"):
+            raise ValueError(f"Unknown backend: {self.backend!r}")
+        if self.intra_op_threads < 0:
+            raise ValueError(f"intra_op_threads must be >= 0, got {self.intra_op_threads}")
+        if self.inter_op_threads < 0:
+            raise ValueError(f"inter_op_threads must be >= 0, got {self.inter_op_threads}")
+        if self.workers < 0:
+            raise ValueError(f"workers must be >= 0, got {self.workers}")
+        if self.dispatch not in ("round_robin", "least_loaded"):
+            raise ValueError(f"Unknown dispatch: {self.dispatch!r}")
+        if self.execution_mode not in ("sequential", "parallel"):
+            raise ValueError(f"Unknown execution_mode: {self.execution_mode!r}")
+        if self.prediction_cache_size < 0:
+            raise ValueError(f"prediction_cache_size must be >= 0, got {self.prediction_cache_size}")
+        if self.prediction_cache_ttl <= 0:
+            raise ValueError(f"prediction_cache_ttl must be > 0, got {self.prediction_cache_ttl}")
+        if self.prediction_cache_disk_entries <= 0:
+            raise ValueError(f"prediction_cache_disk_entries must be > 0, got {self.prediction_cache_disk_entries}")
+        if self.session_idle_seconds <= 0:
+            raise ValueError(f"session_idle_seconds must be > 0, got {self.session_idle_seconds}")
+        if self.field_report_max_images <= 0:
+            raise ValueError(f"field_report_max_images must be > 0, got {self.field_report_max_images}")
+
+    @classmethod
+    def from_env(cls, environ: Optional[Mapping[str, str]] = None, scope: Optional[str] = None) -> "InferenceSettings":
+        """
+        Builds settings from CROP_DETECTOR_* variables, falling back to the defaults.
+        With a scope (e.g. "Rice"), CROP_DETECTOR_RICE_<NAME> overrides CROP_DETECTOR_<NAME>,
+        so each handler can be configured separately.
+        """
+        environ = os.environ if environ is None else environ
+
+        def get(name: str, default: str) -> str:
+            if scope:
+                scoped = environ.get(f"{ENV_PREFIX}{scope.upper()}_{name}")
+                if scoped is not None:
+                    return scoped
+            return environ.get(f"{ENV_PREFIX}{name}", default)
+
+        return cls(
+            weights_format=get("WEIGHTS_FORMAT", "pth").lower(),
+            precision=get("PRECISION", "fp32").lower(),
+            backend=get("BACKEND", "eager").lower(),
+            intra_op_threads=int(get("INTRA_OP_THREADS", "0")),
+            inter_op_threads=int(get("INTER_OP_THREADS", "0")),
+            execution_mode=get("EXECUTION_MODE", "sequential").lower(),
+            workers=int(get("WORKERS", "0")),
+            dispatch=get("DISPATCH", "round_robin").lower(),
+            prediction_cache_size=int(get("PREDICTION_CACHE_SIZE", "1024")),
+            prediction_cache_ttl=float(get("PREDICTION_CACHE_TTL", "3600")),
+            # Paths keep their case
+            prediction_cache_path=get("PREDICTION_CACHE_PATH", ""),
+            prediction_cache_disk_entries=int(get("PREDICTION_CACHE_DISK_ENTRIES", "100000")),
+            session_idle_seconds=float(get("SESSION_IDLE_SECONDS", "1800")),
+            field_report_max_images=int(get("FIELD_REPORT_MAX_IMAGES", "100")),
+        )
@@ -2,14 +2,41 @@
 Convenience script to run the Crop Disease Detector application.
 
 Usage:
-    python run.py
+    python run.py                     # Streamlit UI
+    python run.py --serve [--port N]  # Headless JSON inference server
 """
+import argparse
+import logging
 import subprocess
 import sys
 import os
 
 def main():
-    """Run the Streamlit application."""
+    """Run the Streamlit application, or the inference server with --serve."""
+    parser = argparse.ArgumentParser(description="Run the Crop Disease Detector")
+    parser.add_argument("--serve", action="store_true",
+                        help="Start the headless inference server instead of the Streamlit UI")
+    parser.add_argument("--host", default="127.0.0.1", help="Server bind address (with --serve)")
+    parser.add_argument("--port", type=int, default=8502, help="Server port (with --serve)")
+    parser.add_argument("--max-batch-size", type=int, default=16,
+                        help="Largest number of requests scored in one forward pass (with --serve)")
+    parser.add_argument("--max-wait-ms", type=float, default=10.0,
+                        help="Longest time a request waits for others to join its batch (with --serve)")
+    args = parser.parse_args()
+
+    if args.serve:
+        from crop_disease_detector.services.inference_server import serve
+
+        logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+        print(f"Starting inference server on http://{args.host}:{args.port}")
+        print("POST image bytes to /predict/rice or /predict/pulse; GET /health for batching stats")
+        print("-" * 50)
+        try:
+            serve(args.host, args.port, args.max_batch_size, args.max_wait_ms)
+        except KeyboardInterrupt:
+            pass
+        return
+
     app_path = os.path.join("crop_disease_detector", "app.py")
     
     if not os.path.exists(app_path):
@@ -0,0 +1,326 @@
+"""
+Inference benchmark suite: CNNModel with random weights, so no checkpoint is needed.
+
+For every available backend (eager, int8, torchscript, onnx) it measures, each in a fresh
+process so peak RSS and thread settings do not leak between backends:
+  - single-image latency p50/p95/p99
+  - throughput (images/s) for every batch size x thread count combination
+  - peak RSS of the process
+Preprocessing (JPEG decode, resize + normalize) is measured separately, on synthetic photos.
+The "handler" configuration times CropDiseaseHandler.predict_batch on JPEG bytes end to end
+(decode, preprocessing, forward pass and the prediction cache), once with every image a
+cache miss and once with every image a hit.
+
+Usage:
+    python scripts/benchmark_inference.py --save benchmark_baseline.json
+    python scripts/benchmark_inference.py --compare benchmark_baseline.json [--threshold 0.15]
+    python scripts/benchmark_inference.py --backends eager int8 --batch-sizes 1 16 --threads 1 4
+    python scripts/benchmark_inference.py --no-handler
+
+--compare exits with status 1 when any metric is worse than the baseline by more than
+the threshold (latency and RSS: higher is worse; throughput: lower is worse).
+"""
+import argparse
+import gc
+import importlib.util
+import io
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import statistics
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+# Add parent directory to path to import the package
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+BACKENDS = ('eager', 'int8', 'torchscript', 'onnx')
+PHOTO_SIZES = ((640, 480), (1920, 1080), (4000, 3000))
+
+def available_backends():
+    """Backends that can run in this environment (others are skipped, not failed)."""
+    import torch
+    available = ['eager', 'torchscript']
+    if torch.backends.quantized.supported_engines != ['none']:
+        available.insert(1, 'int8')
+    if importlib.util.find_spec('onnxruntime') and importlib.util.find_spec('onnx'):
+        available.append('onnx')
+    return available
+
+def build_runner(backend, head, num_classes, threads, workdir):
+    """Returns a callable mapping a float32 (N, 3, 224, 224) array to logits for `backend`."""
+    import torch
+    from crop_disease_detector.models.architecture import CNNModel, make_checkpoint
+
+    torch.manual_seed(0)
+    model = CNNModel(num_classes=num_classes, head=head).eval()
+
+    if backend == 'onnx':
+        import onnxruntime as ort
+        from crop_disease_detector.services.onnx_backend import INPUT_NAME, OUTPUT_NAME, export_to_onnx
+
+        checkpoint = os.path.join(workdir, 'random.pth')
+        torch.save(make_checkpoint(model, [str(i) for i in range(num_classes)]), checkpoint)
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = threads
+        session = ort.InferenceSession(export_to_onnx(checkpoint, num_classes), sess_options=options,
+                                       providers=['CPUExecutionProvider'])
+        return lambda batch: session.run([OUTPUT_NAME], {INPUT_NAME: batch})[0]
+
+    from crop_disease_detector.services.model_loader import compile_torchscript, quantize_model
+
+    torch.set_num_threads(threads)
+    if backend == 'int8':
+        model = quantize_model(model)
+    elif backend == 'torchscript':
+        model = compile_torchscript(model)
+
+    def run(batch):
+        with torch.no_grad():
+            return model(torch.from_numpy(batch)).numpy()
+    return run
+
+def percentiles(timings_ms):
+    cuts = statistics.quantiles(timings_ms, n=100, method='inclusive')
+    return {'p50': cuts[49], 'p95': cuts[94], 'p99': cuts[98]}
+
+def benchmark_backend(backend, head, num_classes, batch_sizes, thread_counts, runs, seconds):
+    """Runs inside a fresh process; returns latency, throughput and peak RSS for one backend."""
+    rng = np.random.default_rng(0)
+    result = {'throughput': {}}
+    with tempfile.TemporaryDirectory() as workdir:
+        for threads in thread_counts:
+            run = build_runner(backend, head, num_classes, threads, workdir)
+            for batch_size in batch_sizes:
+                batch = rng.standard_normal((batch_size, 3, 224, 224), dtype=np.float32)
+                run(batch)  # warm-up
+                calls, started = 0, time.perf_counter()
+                while calls < 3 or time.perf_counter() - started < seconds:
+                    run(batch)
+                    calls += 1
+                elapsed = time.perf_counter() - started
+                result['throughput'][f'batch{batch_size}_threads{threads}'] = calls * batch_size / elapsed
+
+            if threads == max(thread_counts):
+                single = rng.standard_normal((1, 3, 224, 224), dtype=np.float32)
+                timings = []
+                for _ in range(runs):
+                    started = time.perf_counter()
+                    run(single)
+                    timings.append((time.perf_counter() - started) * 1000)
+                result['latency_ms'] = percentiles(timings)
+
+            # Free this model before building the next, so peak RSS reflects one model at a time
+            del run
+            gc.collect()
+
+    result['peak_rss_mb'] = peak_rss_mb()
+    return result
+
+def build_handler(head, threads, workdir):
+    """RiceDiseaseHandler over a random checkpoint, with its own model and prediction caches."""
+    import torch
+    from crop_disease_detector.models.architecture import CNNModel, make_checkpoint
+    from crop_disease_detector.services.disease_handlers import RiceDiseaseHandler
+    from crop_disease_detector.services.model_cache import ModelCache
+    from crop_disease_detector.services.prediction_cache import PredictionCache
+    from crop_disease_detector.services.settings import InferenceSettings
+
+    handler = RiceDiseaseHandler(model_path=os.path.join(workdir, 'random.pth'), model_cache=ModelCache(),
+                                 settings=InferenceSettings(intra_op_threads=threads),
+                                 prediction_cache=PredictionCache())
+    torch.manual_seed(0)
+    model = CNNModel(num_classes=len(handler.classes), head=head)
+    torch.save(make_checkpoint(model, handler.classes), handler.model_path)
+    del model
+    loaded, error = handler.load_model()
+    if not loaded:
+        raise RuntimeError(error)
+    return handler
+
+def benchmark_handler(head, batch_sizes, thread_counts, runs, seconds):
+    """
+    Runs inside a fresh process; times predict_batch on JPEG bytes through the whole handler.
+    Misses clear the prediction cache before every call (outside the timed region); hits
+    repeat a batch that is already cached, so they measure decode + hashing only.
+    """
+    photo = synthetic_photo(PHOTO_SIZES[1])
+    result = {'throughput': {}}
+
+    def timed(call, prepare=None):
+        if prepare:
+            prepare()
+        started = time.perf_counter()
+        call()
+        return time.perf_counter() - started
+
+    with tempfile.TemporaryDirectory() as workdir:
+        for threads in thread_counts:
+            handler = build_handler(head, threads, workdir)
+            cache = handler.prediction_cache
+            for batch_size in batch_sizes:
+                images = [photo] * batch_size
+                handler.predict_batch(images)  # warm-up
+                for mode, prepare in (('miss', cache.clear), ('hit', None)):
+                    handler.predict_batch(images)  # a hit run starts from a cached batch
+                    calls, elapsed = 0, 0.0
+                    while calls < 3 or elapsed < seconds:
+                        elapsed += timed(lambda: handler.predict_batch(images), prepare)
+                        calls += 1
+                    result['throughput'][f'batch{batch_size}_threads{threads}_{mode}'] = calls * batch_size / elapsed
+
+            if threads == max(thread_counts):
+                timings = [timed(lambda: handler.predict_batch([photo]), cache.clear) * 1000 for _ in range(runs)]
+                result['latency_ms'] = percentiles(timings)
+
+            del handler, cache
+            gc.collect()
+
+    result['peak_rss_mb'] = peak_rss_mb()
+    return result
+
+def peak_rss_mb():
+    """Peak resident memory of this process in MB."""
+    # On Linux ru_maxrss survives fork+exec (it would report the parent's peak), VmHWM does not
+    if os.path.exists('/proc/self/status'):
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) / 1024
+    # ru_maxrss is in KB on Linux, bytes on macOS
+    scale = 1024 * 1024 if platform.system() == 'Darwin' else 1024
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale
+
+def synthetic_photo(size):
+    """JPEG bytes of a textured image (noise keeps the decoder honest, unlike flat colours)."""
+    from PIL import Image
+    width, height = size
+    rng = np.random.default_rng(width)
+    gradient = np.linspace(0, 255, width, dtype=np.float32)[None, :, None]
+    pixels = np.clip(gradient + rng.normal(0, 40, (height, width, 3)), 0, 255).astype(np.uint8)
+    buffer = io.BytesIO()
+    Image.fromarray(pixels).save(buffer, format='JPEG', quality=90)
+    return buffer.getvalue()
+
+def benchmark_preprocessing(runs):
+    """Decode and resize+normalize latencies (p50/p95/p99, ms) per photo size."""
+    from crop_disease_detector.services.preprocessing import ImagePreprocessor
+    preprocessor = ImagePreprocessor()
+    results = {}
+    for size in PHOTO_SIZES:
+        data = synthetic_photo(size)
+        decode, normalize = [], []
+        for _ in range(runs):
+            started = time.perf_counter()
+            image = preprocessor.load(data)
+            decoded = time.perf_counter()
+            preprocessor.to_array(image)
+            decode.append((decoded - started) * 1000)
+            normalize.append((time.perf_counter() - decoded) * 1000)
+        results[f'{size[0]}x{size[1]}'] = {'decode_ms': percentiles(decode), 'normalize_ms': percentiles(normalize)}
+    return results
+
+def flatten(metrics, prefix=''):
+    """{'a': {'b': 1}} -> {'a.b': 1} for numeric leaves."""
+    flat = {}
+    for key, value in metrics.items():
+        path = f'{prefix}{key}'
+        if isinstance(value, dict):
+            flat.update(flatten(value, path + '.'))
+        elif isinstance(value, (int, float)):
+            flat[path] = float(value)
+    return flat
+
+def compare(result, baseline, threshold):
+    """Returns (metric, baseline, current, change) for every metric worse than `threshold`."""
+    current, previous = flatten(result['results']), flatten(baseline['results'])
+    regressions = []
+    for path in sorted(current.keys() & previous.keys()):
+        if previous[path] <= 0:
+            continue
+        change = (current[path] - previous[path]) / previous[path]
+        # Throughput should go up; latency and memory should go down
+        worse = -change if '.throughput.' in path else change
+        if worse > threshold:
+            regressions.append((path, previous[path], current[path], change))
+    return regressions
+
+def print_summary(name, result):
+    latency = result['latency_ms']
+    best = max(result['throughput'].items(), key=lambda item: item[1])
+    print(f"{name:>11}: p50 {latency['p50']:6.1f} ms | p95 {latency['p95']:6.1f} ms | "
+          f"p99 {latency['p99']:6.1f} ms | best {best[1]:7.1f} img/s ({best[0]}) | "
+          f"peak RSS {result['peak_rss_mb']:.0f} MB")
+
+def main():
+    cpu_count = os.cpu_count() or 1
+    parser = argparse.ArgumentParser(description="Benchmark CNNModel inference across backends")
+    parser.add_argument('--backends', nargs='+', choices=BACKENDS, help='Backends to run (default: all available)')
+    parser.add_argument('--head', choices=['flatten', 'gap'], default='flatten', help='Classifier head to benchmark')
+    parser.add_argument('--num-classes', type=int, default=4)
+    parser.add_argument('--batch-sizes', nargs='+', type=int, default=[1, 8, 32])
+    parser.add_argument('--threads', nargs='+', type=int, default=sorted({1, cpu_count}))
+    parser.add_argument('--runs', type=int, default=50, help='Timed calls for latency percentiles')
+    parser.add_argument('--seconds', type=float, default=2.0, help='Time budget per throughput measurement')
+    parser.add_argument('--save', help='Write the results to this JSON baseline file')
+    parser.add_argument('--handler', action=argparse.BooleanOptionalAction, default=True,
+                        help='Also benchmark the full handler path (preprocessing + prediction cache)')
+    parser.add_argument('--compare', help='Baseline JSON file to check the results against')
+    parser.add_argument('--threshold', type=float, default=0.15, help='Allowed regression (0.15 = 15%%)')
+    args = parser.parse_args()
+
+    available = available_backends()
+    backends = [b for b in (args.backends or BACKENDS) if b in available]
+    for skipped in sorted(set(args.backends or BACKENDS) - set(available)):
+        print(f"Skipping {skipped}: not available in this environment")
+
+    results = {'preprocessing': benchmark_preprocessing(args.runs), 'backends': {}}
+    for size, timings in results['preprocessing'].items():
+        print(f"Preprocess {size:>9}: decode p50 {timings['decode_ms']['p50']:6.1f} ms | "
+              f"resize+normalize p50 {timings['normalize_ms']['p50']:5.1f} ms")
+
+    # One fresh process per backend: isolates peak RSS and torch's process-wide thread settings
+    context = multiprocessing.get_context('spawn')
+    for backend in backends:
+        with context.Pool(1) as pool:
+            result = pool.apply(benchmark_backend, (backend, args.head, args.num_classes,
+                                                    args.batch_sizes, args.threads, args.runs, args.seconds))
+        results['backends'][backend] = result
+        print_summary(backend, result)
+
+    if args.handler:
+        with context.Pool(1) as pool:
+            results['handler'] = pool.apply(benchmark_handler, (args.head, args.batch_sizes, args.threads,
+                                                                args.runs, args.seconds))
+        print_summary('handler', results['handler'])
+
+    report = {
+        'config': {'head': args.head, 'num_classes': args.num_classes, 'batch_sizes': args.batch_sizes,
+                   'threads': args.threads, 'runs': args.runs, 'handler': args.handler},
+        'machine': {'python': platform.python_version(), 'platform': platform.platform(), 'cpus': cpu_count},
+        'results': results,
+    }
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Saved baseline to {args.save}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if baseline.get('config') != report['config']:
+            print("Warning: baseline was recorded with a different configuration")
+        regressions = compare(report, baseline, args.threshold)
+        for path, before, after, change in regressions:
+            print(f"REGRESSION {path}: {before:.2f} -> {after:.2f} ({change:+.0%})")
+        if regressions:
+            sys.exit(1)
+        print(f"No regressions beyond {args.threshold:.0%}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Compares the int8 dynamic-quantized model against the fp32 model.
+
+Reports on-disk size, single-image latency and top-1 agreement. Agreement is measured
+on images from --images (any folder of leaf photos) or on random inputs otherwise.
+
+Usage:
+    python scripts/benchmark_quantization.py --crop rice [--images data/rice] [--runs 50]
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+import torch
+
+# Add parent directory to path to import the package
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from crop_disease_detector.services.disease_handlers import RiceDiseaseHandler, PulseDiseaseHandler
+from crop_disease_detector.services.model_loader import (
+    build_eager_model, build_quantized_model, quantized_weights_path
+)
+
+HANDLERS = {'rice': RiceDiseaseHandler, 'pulse': PulseDiseaseHandler}
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png')
+
+def load_inputs(handler, image_dir, count):
+    """Preprocessed tensors from an image folder, or random inputs when none is given."""
+    if not image_dir:
+        return [torch.randn(1, 3, 224, 224) for _ in range(count)]
+    from PIL import Image
+    paths = []
+    for root, _, files in os.walk(image_dir):
+        paths.extend(os.path.join(root, f) for f in sorted(files) if f.lower().endswith(IMAGE_EXTENSIONS))
+    return [handler._transform_image(Image.open(p).convert('RGB')).unsqueeze(0) for p in paths[:count]]
+
+def measure_latency(model, inputs, runs):
+    """Per-call latencies in milliseconds for batch-of-one forward passes."""
+    timings = []
+    with torch.no_grad():
+        model(inputs[0])  # warm-up
+        for i in range(runs):
+            start = time.perf_counter()
+            model(inputs[i % len(inputs)])
+            timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark int8 dynamic quantization against fp32")
+    parser.add_argument('--crop', choices=HANDLERS, default='rice')
+    parser.add_argument('--model-path', help="Checkpoint to use (defaults to the crop's model)")
+    parser.add_argument('--images', help="Folder of images for the agreement check")
+    parser.add_argument('--samples', type=int, default=200, help="Inputs used for the agreement check")
+    parser.add_argument('--runs', type=int, default=50, help="Timed forward passes per model")
+    args = parser.parse_args()
+
+    handler = HANDLERS[args.crop]() if not args.model_path else HANDLERS[args.crop](model_path=args.model_path)
+    num_classes = len(handler.classes)
+
+    fp32 = build_eager_model(handler.model_path, num_classes)
+    start = time.perf_counter()
+    int8 = build_quantized_model(handler.model_path, num_classes)
+    int8_load = time.perf_counter() - start
+
+    inputs = load_inputs(handler, args.images, args.samples)
+    with torch.no_grad():
+        agree = sum(int(fp32(x).argmax(1).item() == int8(x).argmax(1).item()) for x in inputs)
+
+    fp32_ms = measure_latency(fp32, inputs, args.runs)
+    int8_ms = measure_latency(int8, inputs, args.runs)
+    fp32_mb = os.path.getsize(handler.model_path) / (1024 * 1024)
+    int8_mb = os.path.getsize(quantized_weights_path(handler.model_path)) / (1024 * 1024)
+
+    print(f"Model:            {handler.model_path} ({num_classes} classes)")
+    print(f"Size (disk):      fp32 {fp32_mb:.1f} MB | int8 {int8_mb:.1f} MB ({fp32_mb / int8_mb:.1f}x smaller)")
+    print(f"Latency p50:      fp32 {statistics.median(fp32_ms):.1f} ms | int8 {statistics.median(int8_ms):.1f} ms")
+    print(f"Latency mean:     fp32 {statistics.mean(fp32_ms):.1f} ms | int8 {statistics.mean(int8_ms):.1f} ms")
+    print(f"int8 load time:   {int8_load:.2f}s")
+    print(f"Top-1 agreement:  {agree}/{len(inputs)} ({100 * agree / len(inputs):.1f}%)"
+          f"{' on random inputs' if not args.images else ''}")
+
+if __name__ == "__main__":
+    main()
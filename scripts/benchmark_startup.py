@@ -0,0 +1,112 @@
+"""
+Measures cold-start cost of the Streamlit app, to catch import-time regressions.
+
+Each run uses a fresh interpreter (nothing cached in sys.modules) and records:
+  - import_s:  importing everything app.py needs before the login page can render
+  - render_s:  first full script run of app.py (login page) via Streamlit's AppTest
+  - heavy:     which of torch / torchvision / reportlab were imported by the app's own imports
+
+Usage:
+    python scripts/benchmark_startup.py [--runs 5] [--save startup_baseline.json]
+    python scripts/benchmark_startup.py --compare startup_baseline.json [--tolerance 0.25]
+
+--compare exits with status 1 when a median is slower than the baseline by more than
+the tolerance, or when a heavy module is imported eagerly again.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+HEAVY_MODULES = ('torch', 'torchvision', 'reportlab')
+
+IMPORT_PROBE = f"""
+import json, sys, time
+start = time.perf_counter()
+import streamlit
+import crop_disease_detector.services.container
+elapsed = time.perf_counter() - start
+print(json.dumps({{"seconds": elapsed, "heavy": [m for m in {HEAVY_MODULES!r} if m in sys.modules]}}))
+"""
+
+RENDER_PROBE = """
+import json, time
+start = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+app = AppTest.from_file("crop_disease_detector/app.py", default_timeout=120)
+app.run()
+elapsed = time.perf_counter() - start
+print(json.dumps({"seconds": elapsed, "errors": [e.message for e in app.exception]}))
+"""
+
+def run_probe(code):
+    """Runs `code` in a fresh interpreter from the repository root and returns its JSON output."""
+    output = subprocess.run(
+        [sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True,
+        env={**os.environ, "PYTHONPATH": ROOT},
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+def measure(runs):
+    imports, renders, heavy = [], [], set()
+    for _ in range(runs):
+        probe = run_probe(IMPORT_PROBE)
+        imports.append(probe["seconds"])
+        heavy.update(probe["heavy"])
+
+        probe = run_probe(RENDER_PROBE)
+        if probe["errors"]:
+            raise RuntimeError(f"app.py raised during the first render: {probe['errors'][0]}")
+        renders.append(probe["seconds"])
+    return {
+        "import_s": statistics.median(imports),
+        "render_s": statistics.median(renders),
+        "heavy": sorted(heavy),
+        "runs": runs,
+        "python": sys.version.split()[0],
+    }
+
+def compare(result, baseline, tolerance):
+    """Returns a list of regressions relative to `baseline` (empty when none)."""
+    problems = []
+    for key in ("import_s", "render_s"):
+        limit = baseline[key] * (1 + tolerance)
+        if result[key] > limit:
+            problems.append(f"{key}: {result[key]:.3f}s > {limit:.3f}s (baseline {baseline[key]:.3f}s)")
+    if result["heavy"]:
+        problems.append(f"eagerly imported: {', '.join(result['heavy'])}")
+    return problems
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark app import time and time to first render")
+    parser.add_argument('--runs', type=int, default=5, help='Fresh interpreters per measurement (median is reported)')
+    parser.add_argument('--save', help='Write the results to this JSON baseline file')
+    parser.add_argument('--compare', help='Baseline JSON file to check the results against')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='Allowed slowdown vs. the baseline (0.25 = 25%%)')
+    args = parser.parse_args()
+
+    result = measure(args.runs)
+    print(f"Import time:             {result['import_s'] * 1000:8.1f} ms")
+    print(f"Time to first render:    {result['render_s'] * 1000:8.1f} ms")
+    print(f"Heavy modules at import: {', '.join(result['heavy']) or 'none'}")
+
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump(result, f, indent=2)
+        print(f"Saved baseline to {args.save}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        problems = compare(result, baseline, args.tolerance)
+        for problem in problems:
+            print(f"REGRESSION {problem}")
+        if problems:
+            sys.exit(1)
+        print("No regressions")
+
+if __name__ == "__main__":
+    main()
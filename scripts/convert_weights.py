@@ -0,0 +1,44 @@
+"""
+Converts trained .pth checkpoints into the memory-mappable *.mmap.pt layout.
+
+Run the app with CROP_DETECTOR_WEIGHTS_FORMAT=mmap afterwards so every worker
+process maps the same file pages instead of holding a private copy of the weights.
+
+Usage:
+    python scripts/convert_weights.py [model.pth ...]
+"""
+import argparse
+import os
+import sys
+import time
+
+# Add parent directory to path to import the package
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from crop_disease_detector.services.model_loader import convert_to_mmap
+
+DEFAULT_MODELS = [
+    'crop_disease_detector/models/best_model.pth',
+    'crop_disease_detector/models/pulse_disease_model.pth',
+]
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert .pth checkpoints for memory-mapped loading")
+    parser.add_argument('models', nargs='*', default=DEFAULT_MODELS, help="Checkpoint files to convert")
+    args = parser.parse_args()
+
+    failed = False
+    for model_path in args.models:
+        if not os.path.exists(model_path):
+            print(f"Skipping {model_path}: file not found")
+            failed = True
+            continue
+        start = time.perf_counter()
+        output_path = convert_to_mmap(model_path)
+        size_mb = os.path.getsize(output_path) / (1024 * 1024)
+        print(f"{model_path} -> {output_path} ({size_mb:.1f} MB, {time.perf_counter() - start:.2f}s)")
+
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()
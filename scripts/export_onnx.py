@@ -0,0 +1,56 @@
+"""
+Exports the trained CNNModel checkpoints to ONNX and checks them against PyTorch.
+
+Run the app with CROP_DETECTOR_BACKEND=onnx afterwards to serve predictions
+through ONNX Runtime (requires `pip install onnx onnxruntime`).
+
+Usage:
+    python scripts/export_onnx.py [--crop rice|pulse|all] [--skip-verify]
+"""
+import argparse
+import os
+import sys
+import time
+
+# Add parent directory to path to import the package
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from crop_disease_detector.services.disease_handlers import RiceDiseaseHandler, PulseDiseaseHandler
+from crop_disease_detector.services.onnx_backend import DEFAULT_ONNX_PATHS, export_to_onnx, verify_onnx_export
+
+HANDLERS = {'rice': RiceDiseaseHandler, 'pulse': PulseDiseaseHandler}
+
+def main():
+    parser = argparse.ArgumentParser(description="Export CNNModel checkpoints to ONNX")
+    parser.add_argument('--crop', choices=[*HANDLERS, 'all'], default='all')
+    parser.add_argument('--opset', type=int, default=17)
+    parser.add_argument('--atol', type=float, default=1e-4, help="Absolute tolerance for the torch/ONNX comparison")
+    parser.add_argument('--skip-verify', action='store_true', help="Do not compare ONNX outputs with PyTorch")
+    args = parser.parse_args()
+
+    crops = list(HANDLERS) if args.crop == 'all' else [args.crop]
+    failed = False
+    for crop in crops:
+        handler = HANDLERS[crop]()
+        if not os.path.exists(handler.model_path):
+            print(f"Skipping {crop}: {handler.model_path} not found")
+            failed = True
+            continue
+
+        start = time.perf_counter()
+        onnx_path = export_to_onnx(handler.model_path, len(handler.classes),
+                                   DEFAULT_ONNX_PATHS[handler.crop_name], opset_version=args.opset)
+        print(f"{handler.model_path} -> {onnx_path} ({time.perf_counter() - start:.2f}s)")
+
+        if not args.skip_verify:
+            try:
+                max_diff = verify_onnx_export(handler.model_path, onnx_path, len(handler.classes), atol=args.atol)
+                print(f"  Verified: outputs match PyTorch (max abs diff {max_diff:.2e})")
+            except AssertionError as e:
+                print(f"  Verification FAILED: {e}")
+                failed = True
+
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()
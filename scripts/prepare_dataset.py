@@ -0,0 +1,54 @@
+"""
+Decodes and resizes a training image folder once into a memory-mapped uint8 cache,
+so training epochs read pixels instead of re-decoding JPEGs.
+
+Writes images.npy (uint8 N x 3 x 224 x 224), labels.npy and manifest.json (classes and
+per-file size, mtime and SHA-256) to the cache directory. An existing cache is reused
+when the manifest still matches the source folder.
+
+Usage:
+    python scripts/prepare_dataset.py --data-dir data/pulse_leaf_diseases --cache-dir data/pulse_cache
+    python scripts/prepare_dataset.py ... --verify      # re-hash every file instead of trusting mtimes
+    python scripts/prepare_dataset.py ... --force       # rebuild even if the cache is current
+"""
+import argparse
+import os
+import sys
+import time
+
+# Add parent directory to path to import the package
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from crop_disease_detector.models.dataset_cache import ensure_dataset_cache, load_manifest
+from crop_disease_detector.input_spec import INPUT_SIZE
+
+def progress(done, total):
+    if done % 100 == 0 or done == total:
+        print(f"\r{done}/{total} images", end='', file=sys.stderr, flush=True)
+
+def main():
+    parser = argparse.ArgumentParser(description="Prepare a memory-mapped training image cache")
+    parser.add_argument('--data-dir', default='data/pulse_leaf_diseases', help='ImageFolder-style source directory')
+    parser.add_argument('--cache-dir', default='data/pulse_cache', help='Where to write the cache')
+    parser.add_argument('--size', type=int, default=INPUT_SIZE, help='Square image size in pixels')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='Decode processes')
+    parser.add_argument('--verify', action='store_true', help='Re-hash every source file when checking the cache')
+    parser.add_argument('--force', action='store_true', help='Rebuild even if the cache is up to date')
+    args = parser.parse_args()
+
+    if not os.path.isdir(args.data_dir):
+        print(f"Error: Data directory '{args.data_dir}' not found.")
+        sys.exit(1)
+    started = time.perf_counter()
+    reason = ensure_dataset_cache(args.data_dir, args.cache_dir, args.size, args.workers,
+                                  verify_hashes=args.verify, force=args.force, progress=progress)
+    if reason is None:
+        print(f"Dataset cache in {args.cache_dir} is up to date")
+        return
+    manifest = load_manifest(args.cache_dir)
+    count = len(manifest['files'])
+    print(f"\nRebuilt ({reason}): {count} images of {len(manifest['classes'])} classes in "
+          f"{time.perf_counter() - started:.1f}s ({count * 3 * args.size ** 2 / 1e6:.0f} MB)")
+
+if __name__ == "__main__":
+    main()
@@ -1,37 +1,131 @@
-import sys
+"""
+PDF report benchmark: generation time and output size per photo size.
+
+Every photo size is reported twice:
+  - cold: first report for that image (decode, downscale and JPEG encode included)
+  - warm: further reports for the same image, which reuse the cached encoded JPEG
+For comparison, the JSON / CSV / HTML exporters are timed on the same result.
+
+Usage:
+    python scripts/test_pdf_gen.py [--runs 10] [--output test_report.pdf]
+    python scripts/test_pdf_gen.py --save pdf_baseline.json
+    python scripts/test_pdf_gen.py --compare pdf_baseline.json [--tolerance 0.25]
+
+--compare exits with status 1 when a median time or a PDF size is worse than the
+baseline by more than the tolerance.
+"""
+import argparse
+import io
+import json
 import os
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import statistics
+import sys
+import time
 
-from services.report_generator import ReportGenerator
-from services.interfaces import PredictionResult
+import numpy as np
 from PIL import Image
 
-# Mock data
-class MockHandler:
-    pass
-
-result = PredictionResult(
-    predicted_class="Brown spot",
-    confidence_score=95.5,
-    probabilities={"Brown spot": 95.5, "Healthy": 4.5}
-)
-
-disease_info = {
-    'description': 'Test Description',
-    'symptoms': 'Test Symptoms',
-    'treatment': 'Test Treatment',
-    'severity': 'Medium'
-}
-
-# Create a dummy image
-img = Image.new('RGB', (100, 100), color = 'red')
-
-print("Generating PDF...")
-try:
-    pdf_bytes = ReportGenerator.generate_pdf_report(result, disease_info, "Rice", img)
-    with open("test_report.pdf", "wb") as f:
-        f.write(pdf_bytes)
-    print("PDF generated successfully: test_report.pdf")
-    print(f"Size: {len(pdf_bytes)} bytes")
-except Exception as e:
-    print(f"Error: {e}")
+# Add parent directory to path to import the package
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from crop_disease_detector.services.disease_data import RICE_CLASSES, RICE_DISEASE_INFO
+from crop_disease_detector.services.exporters import export_results
+from crop_disease_detector.services.interfaces import PredictionResult
+from crop_disease_detector.services.report_generator import ReportGenerator
+from crop_disease_detector.services.session_store import StoredImage
+
+PHOTO_SIZES = ((640, 480), (1920, 1080), (4000, 3000))
+
+def synthetic_photo(size):
+    """StoredImage of a textured JPEG (noise keeps the encoder honest, unlike flat colours)."""
+    width, height = size
+    rng = np.random.default_rng(width)
+    gradient = np.linspace(0, 255, width, dtype=np.float32)[None, :, None]
+    pixels = np.clip(gradient + rng.normal(0, 40, (height, width, 3)), 0, 255).astype(np.uint8)
+    buffer = io.BytesIO()
+    Image.fromarray(pixels).save(buffer, format='JPEG', quality=90)
+    # Keep the full upload so the generator sees the original resolution
+    return StoredImage.from_bytes(buffer.getvalue(), max_bytes=len(buffer.getvalue()))
+
+def measure(runs):
+    predicted_class = "Brown spot"
+    result = PredictionResult(predicted_class=predicted_class, confidence_score=95.5,
+                              probabilities={predicted_class: 95.5, "_Healthy": 4.5})
+    info = RICE_DISEASE_INFO.get(predicted_class, {})
+    results = {}
+    for size in PHOTO_SIZES:
+        image = synthetic_photo(size)
+        ReportGenerator.clear_image_cache()
+        started = time.perf_counter()
+        pdf = ReportGenerator.generate_pdf_report(result, info, "Rice", image)
+        cold = time.perf_counter() - started
+
+        warm = []
+        for _ in range(runs):
+            started = time.perf_counter()
+            ReportGenerator.generate_pdf_report(result, info, "Rice", image)
+            warm.append(time.perf_counter() - started)
+        results[f'{size[0]}x{size[1]}'] = {
+            'cold_ms': cold * 1000,
+            'warm_ms': statistics.median(warm) * 1000,
+            'pdf_kb': len(pdf) / 1024,
+        }
+
+    exports = {}
+    for export_format in ('json', 'csv', 'html'):
+        started = time.perf_counter()
+        for _ in range(runs):
+            export_results([("photo.jpg", result)], export_format, RICE_CLASSES, RICE_DISEASE_INFO.get)
+        exports[f'{export_format}_us'] = (time.perf_counter() - started) / runs * 1e6
+    results['exports'] = exports
+    return results, pdf
+
+def compare(results, baseline, tolerance):
+    """Returns a list of regressions relative to `baseline` (empty when none)."""
+    problems = []
+    for size, metrics in results.items():
+        for key, value in metrics.items():
+            previous = baseline.get(size, {}).get(key)
+            if previous and value > previous * (1 + tolerance):
+                problems.append(f"{size} {key}: {value:.1f} > {previous:.1f} (+{value / previous - 1:.0%})")
+    return problems
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark PDF report generation time and size")
+    parser.add_argument('--runs', type=int, default=10, help='Warm reports per photo size (median is reported)')
+    parser.add_argument('--output', help='Also write the last generated report to this file')
+    parser.add_argument('--save', help='Write the results to this JSON baseline file')
+    parser.add_argument('--compare', help='Baseline JSON file to check the results against')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='Allowed regression (0.25 = 25%%)')
+    args = parser.parse_args()
+
+    results, pdf = measure(args.runs)
+    for size, metrics in results.items():
+        if size == 'exports':
+            print("  exports: " + " | ".join(f"{key[:-3].upper()} {value:.0f} us" for key, value in metrics.items()))
+            continue
+        print(f"{size:>9}: cold {metrics['cold_ms']:7.1f} ms | warm {metrics['warm_ms']:6.1f} ms | "
+              f"PDF {metrics['pdf_kb']:7.1f} KB")
+
+    if args.output:
+        with open(args.output, 'wb') as f:
+            f.write(pdf)
+        print(f"Wrote {args.output}")
+
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"Saved baseline to {args.save}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        problems = compare(results, baseline, args.tolerance)
+        for problem in problems:
+            print(f"REGRESSION {problem}")
+        if problems:
+            sys.exit(1)
+        print("No regressions")
+
+if __name__ == "__main__":
+    main()
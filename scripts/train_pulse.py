@@ -3,6 +3,7 @@ import torch.nn as nn
 import torch.optim as optim
 from torchvision import datasets, transforms
 from torch.utils.data import DataLoader
+import argparse
 import os
 import json
 import sys
@@ -11,14 +12,99 @@ import time
 # Add parent directory to path to import models
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-from models.architecture import CNNModel
+from crop_disease_detector.models.architecture import CNNModel, HEAD_TYPES, make_checkpoint
+
+BATCH_SIZE = 32
+PREFETCH_FACTOR = 2
+
+def usable_cores():
+    """Cores this process may run on (respects taskset/cgroup affinity where supported)."""
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+def default_loader_workers():
+    """One loader worker per core, leaving one core for the training step (at most 8)."""
+    return min(8, usable_cores() - 1)
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Train the pulse disease CNN")
+    parser.add_argument('--head', choices=HEAD_TYPES, default='flatten',
+                        help="Classifier head: 'flatten' (original, ~197 MB) or 'gap' (global average pooling, a few MB)")
+    parser.add_argument('--model-path', default='models/pulse_disease_model.pth', help="Where to save the checkpoint")
+    parser.add_argument('--data-dir', default='data/pulse_leaf_diseases', help="ImageFolder-style training data")
+    parser.add_argument('--cache-dir', help="Train from a memory-mapped uint8 cache in this directory "
+                                            "(built or refreshed from --data-dir when missing or stale)")
+    parser.add_argument('--batch-size', type=int, default=BATCH_SIZE, help="Samples per batch")
+    parser.add_argument('--workers', type=int, default=default_loader_workers(),
+                        help="DataLoader worker processes (default: cores - 1, at most 8; 0 loads in the main process)")
+    parser.add_argument('--prefetch-factor', type=int, default=PREFETCH_FACTOR,
+                        help="Batches each worker loads ahead (ignored with --workers 0)")
+    parser.add_argument('--persistent-workers', action=argparse.BooleanOptionalAction, default=True,
+                        help="Keep workers alive between epochs instead of restarting them (ignored with --workers 0)")
+    args = parser.parse_args()
+    if args.batch_size < 1 or args.workers < 0 or args.prefetch_factor < 1:
+        parser.error("--batch-size and --prefetch-factor must be positive and --workers non-negative")
+    return args
+
+def loader_options(workers=0, prefetch_factor=PREFETCH_FACTOR, persistent_workers=True, pin_memory=False):
+    """DataLoader keyword arguments; prefetching and persistence only apply with worker processes."""
+    options = {'num_workers': workers, 'pin_memory': pin_memory}
+    if workers > 0:
+        options.update(prefetch_factor=prefetch_factor, persistent_workers=persistent_workers)
+    return options
+
+def timed_batches(loader, timings):
+    """Yields the loader's batches, adding the time spent waiting for each one to timings['data_wait']."""
+    batches = iter(loader)
+    while True:
+        started = time.perf_counter()
+        try:
+            batch = next(batches)
+        except StopIteration:
+            return
+        timings['data_wait'] += time.perf_counter() - started
+        yield batch
+
+def load_datasets(data_dir, cache_dir=None, batch_size=BATCH_SIZE):
+    """Returns (classes, train_loader_kwargs, val_loader_kwargs) for an 80/20 split."""
+    if cache_dir:
+        from crop_disease_detector.models.dataset_cache import MemmapImageDataset, batch_loader_kwargs, ensure_dataset_cache
+
+        # Decoded and resized once; every epoch then reads uint8 pixels and normalizes whole batches
+        reason = ensure_dataset_cache(data_dir, cache_dir)
+        print(f"Dataset cache {cache_dir}: " + (f"rebuilt ({reason})" if reason else "up to date"))
+        dataset = MemmapImageDataset(cache_dir)
+        order = torch.randperm(len(dataset)).tolist()
+        train_size = int(0.8 * len(dataset))
+        train_dataset, val_dataset = dataset.subset(order[:train_size]), dataset.subset(order[train_size:])
+        train_kwargs = {'dataset': train_dataset, **batch_loader_kwargs(train_dataset, batch_size, shuffle=True)}
+        val_kwargs = {'dataset': val_dataset, **batch_loader_kwargs(val_dataset, batch_size, shuffle=False)}
+        return dataset.classes, train_kwargs, val_kwargs
 
-def train_model():
+    # Data Transforms
+    transform = transforms.Compose([
+        transforms.Resize((224, 224)),
+        transforms.ToTensor(),
+        transforms.Normalize(mean=[0.485, 0.456, 0.406], std=[0.229, 0.224, 0.225])
+    ])
+    dataset = datasets.ImageFolder(root=data_dir, transform=transform)
+    
+    # Split into train/val (80/20)
+    train_size = int(0.8 * len(dataset))
+    val_size = len(dataset) - train_size
+    train_dataset, val_dataset = torch.utils.data.random_split(dataset, [train_size, val_size])
+    return (dataset.classes,
+            {'dataset': train_dataset, 'batch_size': batch_size, 'shuffle': True},
+            {'dataset': val_dataset, 'batch_size': batch_size, 'shuffle': False})
+
+def train_model(head='flatten', model_path='models/pulse_disease_model.pth', data_dir='data/pulse_leaf_diseases',
+                cache_dir=None, batch_size=BATCH_SIZE, workers=0, prefetch_factor=PREFETCH_FACTOR,
+                persistent_workers=True):
     # Configuration
-    DATA_DIR = 'data/pulse_leaf_diseases'
-    MODEL_PATH = 'models/pulse_disease_model.pth'
+    DATA_DIR = data_dir
+    MODEL_PATH = model_path
     HISTORY_PATH = 'models/pulse_training_history.json'
-    BATCH_SIZE = 32
     EPOCHS = 15
     LEARNING_RATE = 0.001
 
@@ -26,52 +112,48 @@ def train_model():
     device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
     print(f"Using device: {device}")
 
-    # Data Transforms
-    transform = transforms.Compose([
-        transforms.Resize((224, 224)),
-        transforms.ToTensor(),
-        transforms.Normalize(mean=[0.485, 0.456, 0.406], std=[0.229, 0.224, 0.225])
-    ])
-
     # Load Data
     print("Loading data...")
     if not os.path.exists(DATA_DIR):
         print(f"Error: Data directory '{DATA_DIR}' not found.")
         return
 
-    dataset = datasets.ImageFolder(root=DATA_DIR, transform=transform)
-    
-    # Split into train/val (80/20)
-    train_size = int(0.8 * len(dataset))
-    val_size = len(dataset) - train_size
-    train_dataset, val_dataset = torch.utils.data.random_split(dataset, [train_size, val_size])
-
-    train_loader = DataLoader(train_dataset, batch_size=BATCH_SIZE, shuffle=True)
-    val_loader = DataLoader(val_dataset, batch_size=BATCH_SIZE, shuffle=False)
+    classes, train_kwargs, val_kwargs = load_datasets(DATA_DIR, cache_dir, batch_size)
+    train_dataset, val_dataset = train_kwargs['dataset'], val_kwargs['dataset']
+    # Pinned host memory lets the copies to the GPU run asynchronously
+    options = loader_options(workers, prefetch_factor, persistent_workers, pin_memory=device.type == 'cuda')
+    train_loader = DataLoader(**train_kwargs, **options)
+    val_loader = DataLoader(**val_kwargs, **options)
+    print(f"Batch size: {batch_size} | loader workers: {workers}"
+          + (f" (prefetch {prefetch_factor}, persistent: {persistent_workers})" if workers else ""))
 
-    print(f"Classes: {dataset.classes}")
+    print(f"Classes: {classes}")
     print(f"Training samples: {len(train_dataset)}")
     print(f"Validation samples: {len(val_dataset)}")
 
     # Initialize Model
-    model = CNNModel(num_classes=len(dataset.classes)).to(device)
+    model = CNNModel(num_classes=len(classes), head=head).to(device)
+    print(f"Classifier head: {head}")
     criterion = nn.CrossEntropyLoss()
     optimizer = optim.Adam(model.parameters(), lr=LEARNING_RATE)
 
     # Training Loop
-    history = {'train_loss': [], 'train_acc': [], 'val_loss': [], 'val_acc': []}
+    history = {'train_loss': [], 'train_acc': [], 'val_loss': [], 'val_acc': [], 'data_wait_s': [], 'compute_s': []}
     
     print("Starting training...")
     start_time = time.time()
 
     for epoch in range(EPOCHS):
+        # Time blocked on the loaders vs. everything else (forward, backward, metrics)
+        timings = {'data_wait': 0.0}
+        epoch_start = time.perf_counter()
         model.train()
         running_loss = 0.0
         correct = 0
         total = 0
 
-        for inputs, labels in train_loader:
-            inputs, labels = inputs.to(device), labels.to(device)
+        for inputs, labels in timed_batches(train_loader, timings):
+            inputs, labels = inputs.to(device, non_blocking=True), labels.to(device, non_blocking=True)
 
             optimizer.zero_grad()
             outputs = model(inputs)
@@ -94,8 +176,8 @@ def train_model():
         val_total = 0
         
         with torch.no_grad():
-            for inputs, labels in val_loader:
-                inputs, labels = inputs.to(device), labels.to(device)
+            for inputs, labels in timed_batches(val_loader, timings):
+                inputs, labels = inputs.to(device, non_blocking=True), labels.to(device, non_blocking=True)
                 outputs = model(inputs)
                 loss = criterion(outputs, labels)
                 val_loss += loss.item()
@@ -105,15 +187,21 @@ def train_model():
 
         val_epoch_loss = val_loss / len(val_loader)
         val_epoch_acc = val_correct / val_total
+        # loss.item() already synchronizes every step, so wall time here is complete
+        data_wait = timings['data_wait']
+        compute = time.perf_counter() - epoch_start - data_wait
 
         print(f"Epoch [{epoch+1}/{EPOCHS}] "
               f"Train Loss: {epoch_loss:.4f} Acc: {epoch_acc:.4f} "
-              f"Val Loss: {val_epoch_loss:.4f} Acc: {val_epoch_acc:.4f}")
+              f"Val Loss: {val_epoch_loss:.4f} Acc: {val_epoch_acc:.4f} "
+              f"| Data wait: {data_wait:.2f}s ({data_wait / (data_wait + compute):.0%}) Compute: {compute:.2f}s")
 
         history['train_loss'].append(epoch_loss)
         history['train_acc'].append(epoch_acc)
         history['val_loss'].append(val_epoch_loss)
         history['val_acc'].append(val_epoch_acc)
+        history['data_wait_s'].append(data_wait)
+        history['compute_s'].append(compute)
 
         # Early Stopping Condition: If Train Accuracy reaches 100%
         if epoch_acc >= 0.999: # Allowing for floating point slightly off 1.0
@@ -123,8 +211,8 @@ def train_model():
     total_time = time.time() - start_time
     print(f"Training finished in {total_time:.2f}s")
 
-    # Save Model
-    torch.save(model.state_dict(), MODEL_PATH)
+    # Save Model (weights + metadata so the handlers rebuild the same head)
+    torch.save(make_checkpoint(model.cpu(), classes), MODEL_PATH)
     print(f"Model saved to {MODEL_PATH}")
 
     # Save History
@@ -133,4 +221,7 @@ def train_model():
     print(f"History saved to {HISTORY_PATH}")
 
 if __name__ == "__main__":
-    train_model()
+    args = parse_args()
+    train_model(head=args.head, model_path=args.model_path, data_dir=args.data_dir, cache_dir=args.cache_dir,
+                batch_size=args.batch_size, workers=args.workers, prefetch_factor=args.prefetch_factor,
+                persistent_workers=args.persistent_workers)
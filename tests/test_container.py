@@ -32,3 +32,12 @@ def test_container_factory_invalid():
     container = DependencyContainer.get_instance()
     handler = container.get_handler("Unknown Crop")
     assert handler is None
+
+def test_container_import_does_not_load_torch():
+    """Verify the app's service imports stay light, so the login page renders without waiting for torch."""
+    import subprocess
+    import sys
+    code = ("import sys, crop_disease_detector.services.container; "
+            "print(','.join(m for m in ('torch', 'torchvision', 'reportlab') if m in sys.modules))")
+    output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True).stdout
+    assert output.strip() == ""
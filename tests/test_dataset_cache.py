@@ -0,0 +1,73 @@
+import os
+
+import numpy as np
+import torch
+from PIL import Image
+from torch.utils.data import DataLoader
+from torchvision import datasets, transforms
+from crop_disease_detector.models.dataset_cache import (
+    MemmapImageDataset, batch_loader_kwargs, build_dataset_cache, cache_is_stale, ensure_dataset_cache,
+)
+
+def _image_folder(tmp_path, per_class=6):
+    rng = np.random.default_rng(0)
+    for label in ("blight", "healthy"):
+        (tmp_path / "data" / label).mkdir(parents=True)
+        for i in range(per_class):
+            pixels = rng.integers(0, 256, (90 + i, 120, 3), dtype=np.uint8)
+            Image.fromarray(pixels).save(tmp_path / "data" / label / f"leaf{i}.jpg")
+    return str(tmp_path / "data")
+
+def test_cached_batches_match_image_folder_pipeline(tmp_path):
+    """Verify memmap batches equal ImageFolder + Resize/ToTensor/Normalize, labels included."""
+    data_dir, cache_dir = _image_folder(tmp_path), str(tmp_path / "cache")
+    build_dataset_cache(data_dir, cache_dir, workers=1)
+    dataset = MemmapImageDataset(cache_dir)
+    reference = datasets.ImageFolder(data_dir, transform=transforms.Compose([
+        transforms.Resize((224, 224)),
+        transforms.ToTensor(),
+        transforms.Normalize(mean=[0.485, 0.456, 0.406], std=[0.229, 0.224, 0.225]),
+    ]))
+    assert dataset.classes == reference.classes and len(dataset) == len(reference)
+
+    images, labels = dataset[[7, 0, 3]]  # unsorted on purpose: rows must come back in request order
+    for position, index in enumerate([7, 0, 3]):
+        expected, label = reference[index]
+        assert torch.allclose(images[position], expected, atol=1e-5)
+        assert labels[position].item() == label
+
+def test_loader_yields_whole_batches_from_subsets(tmp_path):
+    data_dir, cache_dir = _image_folder(tmp_path), str(tmp_path / "cache")
+    build_dataset_cache(data_dir, cache_dir, workers=1)
+    train = MemmapImageDataset(cache_dir).subset(range(0, 12, 2))
+    batches = list(DataLoader(train, **batch_loader_kwargs(train, batch_size=4, shuffle=True)))
+    assert [len(labels) for _, labels in batches] == [4, 2]
+    assert batches[0][0].shape == (4, 3, 224, 224) and batches[0][0].dtype == torch.float32
+
+def test_stale_caches_are_detected_and_rebuilt(tmp_path):
+    """Verify the manifest catches changed, touched-but-identical, added and removed files."""
+    data_dir, cache_dir = _image_folder(tmp_path), str(tmp_path / "cache")
+    assert ensure_dataset_cache(data_dir, cache_dir, workers=1) == "no cache"
+    assert cache_is_stale(data_dir, cache_dir) is None
+
+    touched = os.path.join(data_dir, "healthy", "leaf1.jpg")
+    os.utime(touched, ns=(1, 1))
+    assert cache_is_stale(data_dir, cache_dir) is None  # same bytes, re-hashed
+
+    Image.new('RGB', (50, 50), 'red').save(touched)
+    assert cache_is_stale(data_dir, cache_dir) == "healthy/leaf1.jpg changed"
+    assert ensure_dataset_cache(data_dir, cache_dir, workers=1) is not None
+    assert cache_is_stale(data_dir, cache_dir) is None
+
+    os.remove(os.path.join(data_dir, "blight", "leaf0.jpg"))
+    assert cache_is_stale(data_dir, cache_dir) == "files added, removed or relabeled"
+    assert cache_is_stale(data_dir, cache_dir, size=128) is not None
+
+def test_training_imports_stay_clear_of_the_app_layers():
+    """Verify models/ and the dataset cache import neither the services package nor Streamlit."""
+    import subprocess
+    import sys
+    code = ("import sys, crop_disease_detector.models.architecture, crop_disease_detector.models.dataset_cache; "
+            "print(','.join(m for m in ('streamlit', 'crop_disease_detector.services') if m in sys.modules))")
+    output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True).stdout
+    assert output.strip() == ""
@@ -0,0 +1,98 @@
+import os
+from concurrent.futures.process import BrokenProcessPool
+import pytest
+import torch
+import torch.nn as nn
+from PIL import Image
+from crop_disease_detector.models.architecture import CNNModel, make_checkpoint
+from crop_disease_detector.services.disease_handlers import RiceDiseaseHandler
+from crop_disease_detector.services.execution import CoreAllocator, InferencePool
+from crop_disease_detector.services.model_cache import ModelCache
+from crop_disease_detector.services.settings import InferenceSettings
+
+def _tiny_model():
+    torch.manual_seed(0)
+    return nn.Sequential(nn.AdaptiveAvgPool2d(1), nn.Flatten(), nn.Linear(3, 4)).eval()
+
+def test_allocator_keeps_pools_on_disjoint_cores():
+    """Verify pools started one after another get disjoint core sets until the host is full."""
+    allocator = CoreAllocator(range(8))
+    rice = allocator.allocate(2, 2)
+    pulse = allocator.allocate(2, 2)
+    assert rice == [[0, 1], [2, 3]] and pulse == [[4, 5], [6, 7]]
+    allocator.release(rice)
+    assert allocator.allocate(1, 2) == [[0, 1]]
+    # Fully booked: the least reserved cores are shared instead of leaving workers without one
+    assert allocator.allocate(1, 3) == [[0, 2, 3]]
+    assert allocator.allocate(1, 20) == [list(range(8))]
+
+def test_closed_pool_releases_its_cores():
+    allocator = CoreAllocator([0, 1])
+    pool = InferencePool(_tiny_model, workers=2, intra_op_threads=1, allocator=allocator)
+    assert pool.core_sets == [[0], [1]]
+    pool.close()
+    assert allocator.reserved() == {0: 0, 1: 0}
+
+@pytest.mark.parametrize("dispatch", ["round_robin", "least_loaded"])
+def test_pool_matches_in_process_model(dispatch):
+    """Verify worker processes return the same logits as the model run in-process."""
+    pool = InferencePool(_tiny_model, workers=2, intra_op_threads=1, dispatch=dispatch)
+    try:
+        batch = torch.randn(5, 3, 32, 32)
+        with torch.no_grad():
+            expected = _tiny_model()(batch)
+        for _ in range(3):
+            assert torch.allclose(pool(batch), expected, atol=1e-6)
+        assert pool.in_flight() == [0, 0]
+    finally:
+        pool.close()
+
+def test_dead_worker_is_restarted():
+    """Verify a worker process that dies is replaced and the batch still gets its logits."""
+    pool = InferencePool(_tiny_model, workers=1, intra_op_threads=1)
+    try:
+        batch = torch.randn(2, 3, 8, 8)
+        pool(batch)
+        with pytest.raises(BrokenProcessPool):
+            pool._workers[0].submit(os._exit, 1).result()
+        with torch.no_grad():
+            assert torch.allclose(pool(batch), _tiny_model()(batch), atol=1e-6)
+    finally:
+        pool.close()
+
+def test_unknown_dispatch_rejected():
+    with pytest.raises(ValueError):
+        InferenceSettings(dispatch="random")
+
+def test_handler_serves_from_worker_pool(tmp_path):
+    """Verify a handler configured with workers predicts like the in-process handler."""
+    handler = RiceDiseaseHandler(model_path=str(tmp_path / "rice.pth"), model_cache=ModelCache())
+    torch.save(make_checkpoint(CNNModel(num_classes=len(handler.classes), head="gap").eval(), handler.classes),
+               handler.model_path)
+    pooled = RiceDiseaseHandler(model_path=handler.model_path, model_cache=ModelCache(),
+                                settings=InferenceSettings(workers=1, intra_op_threads=1))
+    assert handler.load_model() == (True, None)
+    assert pooled.load_model() == (True, None)
+    try:
+        assert isinstance(pooled.model, InferencePool)
+        images = [Image.new('RGB', (64, 64), color) for color in ('red', 'green')]
+        for expected, actual in zip(handler.predict_batch(images), pooled.predict_batch(images)):
+            assert actual.predicted_class == expected.predicted_class
+            assert abs(actual.confidence_score - expected.confidence_score) < 1e-3
+    finally:
+        pooled.model.close()
+
+def test_pool_artifacts_are_built_once_before_the_workers_start(tmp_path, monkeypatch):
+    """Verify the parent builds a missing int8 artifact and skips the build once it is current."""
+    from crop_disease_detector.services.model_loader import quantized_artifact_is_current
+
+    handler = RiceDiseaseHandler(model_path=str(tmp_path / "rice.pth"), model_cache=ModelCache(),
+                                 settings=InferenceSettings(workers=2, precision="int8"))
+    torch.save(make_checkpoint(CNNModel(num_classes=len(handler.classes), head="gap").eval(), handler.classes),
+               handler.model_path)
+    assert not quantized_artifact_is_current(handler.model_path)
+    handler._prepare_worker_artifacts(handler.model_path, "int8")
+    assert quantized_artifact_is_current(handler.model_path)
+
+    monkeypatch.setattr(handler, "_build_eager_model", lambda *args: pytest.fail("rebuilt a current artifact"))
+    handler._prepare_worker_artifacts(handler.model_path, "int8")
@@ -0,0 +1,65 @@
+import csv
+import io
+import json
+
+import pytest
+from crop_disease_detector.score import ResultWriter, completed_files
+from crop_disease_detector.services.exporters import export_results, exporter_for, format_for_path
+from crop_disease_detector.services.interfaces import PredictionResult
+
+CLASSES = ['Blast', 'Healthy']
+INFO = {'Blast': {'severity': 'High', 'treatment': 'Apply <tricyclazole> & drain', 'prevention': ['Rotate', 'Dry']}}
+
+def _results():
+    return [
+        ("leaf1.jpg", PredictionResult('Blast', 91.5, {'Blast': 91.5, 'Healthy': 8.5})),
+        ("broken.png", PredictionResult.failed("cannot identify image file")),
+    ]
+
+def _info_for(predicted_class):
+    return INFO.get(predicted_class, {})
+
+def test_json_export_streams_a_valid_array():
+    """Verify records reach the stream as they are written and the finished file is one JSON array."""
+    stream = io.StringIO()
+    exporter = exporter_for('json', stream, CLASSES, _info_for, ['severity', 'prevention'])
+    exporter.write(*_results()[0])
+    assert 'leaf1.jpg' in stream.getvalue()  # written before finish()
+    exporter.write(*_results()[1])
+    exporter.finish()
+
+    records = json.loads(stream.getvalue())
+    assert records[0]['severity'] == 'High' and records[0]['prevention'] == ['Rotate', 'Dry']
+    assert records[0]['probabilities'] == {'Blast': 91.5, 'Healthy': 8.5}
+    assert records[1]['error'] and records[1]['severity'] is None
+
+def test_csv_export_has_info_and_probability_columns():
+    rows = list(csv.DictReader(io.StringIO(export_results(_results(), 'csv', CLASSES, _info_for, ['severity', 'prevention']))))
+    assert list(rows[0]) == ['file', 'predicted_class', 'confidence_score', 'error', 'severity', 'prevention', 'Blast', 'Healthy']
+    assert rows[0]['prevention'] == 'Rotate; Dry' and rows[0]['Blast'] == '91.5'
+
+def test_html_export_is_self_contained_and_escaped():
+    """Verify the page needs no external assets and escapes disease text and file names."""
+    page = export_results(_results(), 'html', CLASSES, _info_for)
+    assert page.startswith('<!DOCTYPE html>') and page.rstrip().endswith('</html>')
+    assert 'http' not in page and '<script' not in page
+    assert 'Apply &lt;tricyclazole&gt; &amp; drain' in page
+    assert 'cannot identify image file' in page and '<p>2 images</p>' in page
+
+def test_only_line_formats_can_be_appended():
+    assert format_for_path('out.JSON') == 'json' and format_for_path('out.ndjson') == 'jsonl'
+    with pytest.raises(ValueError):
+        exporter_for('html', io.StringIO(), CLASSES, append=True)
+
+def test_cli_writer_picks_format_by_extension(tmp_path):
+    """Verify the scoring CLI writes JSON and HTML exports, and rewrites instead of resuming them."""
+    for name in ("scores.json", "scores.html"):
+        output = tmp_path / name
+        output.write_text("stale")
+        writer = ResultWriter(str(output), CLASSES, _info_for)
+        for result in _results():
+            writer.write(*result)
+        writer.close()
+        assert "stale" not in output.read_text()
+        assert completed_files(str(output)) == set()
+    assert len(json.loads((tmp_path / "scores.json").read_text())) == 2
@@ -0,0 +1,72 @@
+import asyncio
+import io
+import json
+
+from PIL import Image
+from crop_disease_detector.services.inference_server import InferenceServer, MicroBatcher
+from crop_disease_detector.services.interfaces import PredictionResult
+
+class RecordingPredictor:
+    """Stand-in predictor that records the size of every batch it is given."""
+    def __init__(self):
+        self.batch_sizes = []
+
+    def predict_batch(self, images, batch_size=16):
+        self.batch_sizes.append(len(images))
+        return [PredictionResult(predicted_class="Healthy", confidence_score=99.0, probabilities={"Healthy": 99.0})
+                if image != b"bad" else PredictionResult.failed("Error preprocessing image: bad")
+                for image in images]
+
+def _jpeg():
+    buffer = io.BytesIO()
+    Image.new('RGB', (32, 32), 'green').save(buffer, format='JPEG')
+    return buffer.getvalue()
+
+def test_concurrent_requests_share_batches():
+    """Verify simultaneous requests are grouped, bounded by max_batch_size."""
+    predictor = RecordingPredictor()
+
+    async def scenario():
+        batcher = MicroBatcher(predictor, max_batch_size=4, max_wait_ms=50)
+        batcher.start()
+        results = await asyncio.gather(*(batcher.submit(b"img") for _ in range(10)))
+        await batcher.stop()
+        return results, batcher.stats()
+
+    results, stats = asyncio.run(scenario())
+    assert all(r.ok for r in results)
+    assert predictor.batch_sizes == [4, 4, 2]
+    assert (stats.requests, stats.batches, stats.largest_batch) == (10, 3, 4)
+
+def test_server_returns_prediction_result_json():
+    """Verify the HTTP endpoint mirrors PredictionResult and reports per-request errors."""
+    server = InferenceServer({"Rice": RecordingPredictor()}, max_wait_ms=1)
+
+    async def request(port, method, path, body=b""):
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.write(f"{method} {path} HTTP/1.1\r\nContent-Length: {len(body)}\r\n\r\n".encode() + body)
+        await writer.drain()
+        status_line = (await reader.readline()).decode()
+        response = await reader.read()
+        writer.close()
+        return int(status_line.split()[1]), json.loads(response.split(b"\r\n\r\n", 1)[1])
+
+    async def scenario():
+        listener = await server.start("127.0.0.1", 0)
+        port = listener.sockets[0].getsockname()[1]
+        try:
+            return [
+                await request(port, "POST", "/predict/rice", _jpeg()),
+                await request(port, "POST", "/predict/rice", b"bad"),
+                await request(port, "POST", "/predict/wheat", b"img"),
+                await request(port, "GET", "/health"),
+            ]
+        finally:
+            await server.stop()
+
+    ok, failed, unknown, health = asyncio.run(scenario())
+    assert ok[0] == 200
+    assert set(ok[1]) == {"predicted_class", "confidence_score", "probabilities", "error"}
+    assert failed[0] == 422 and "preprocessing" in failed[1]["error"]
+    assert unknown[0] == 404
+    assert health[1]["crops"]["rice"]["requests"] == 2
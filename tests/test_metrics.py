@@ -0,0 +1,49 @@
+import io
+import json
+
+from PIL import Image
+from crop_disease_detector.services.metrics import StageMetrics, StageHistogram
+from crop_disease_detector.services.preprocessing import ImagePreprocessor
+
+def test_histogram_buckets_and_quantiles():
+    histogram = StageHistogram(buckets=(0.01, 0.1, 1.0))
+    for seconds in (0.005, 0.005, 0.05, 0.5, 3.0):
+        histogram.observe(seconds)
+    assert histogram.counts == [2, 1, 1, 1]
+    assert histogram.quantile(0.5) == 0.1
+    assert histogram.quantile(1.0) == 3.0  # overflow bucket reports the observed max
+
+def test_disabled_metrics_record_nothing():
+    """Verify the disabled path is a shared no-op context."""
+    metrics = StageMetrics(enabled=False)
+    assert metrics.timer("forward") is metrics.timer("decode")
+    with metrics.timer("forward"):
+        pass
+    assert metrics.summary() == {}
+
+def test_exports_match_recorded_timings():
+    """Verify Prometheus buckets are cumulative and JSON carries the same counts."""
+    metrics = StageMetrics(enabled=True, buckets=(0.01, 0.1))
+    metrics.observe("forward", 0.005)
+    metrics.observe("forward", 0.05)
+    with metrics.timer("report"):
+        pass
+
+    text = metrics.to_prometheus()
+    assert '# TYPE crop_detector_stage_duration_seconds histogram' in text
+    assert 'crop_detector_stage_duration_seconds_bucket{stage="forward",le="0.1"} 2' in text
+    assert 'crop_detector_stage_duration_seconds_bucket{stage="forward",le="+Inf"} 2' in text
+    assert 'crop_detector_stage_duration_seconds_count{stage="report"} 1' in text
+
+    stages = json.loads(metrics.to_json())["stages"]
+    assert stages["forward"]["count"] == 2 and stages["forward"]["buckets"]["0.01"] == 1
+
+def test_pipeline_stages_are_timed(monkeypatch):
+    """Verify decoding and preprocessing report into the process-wide registry when enabled."""
+    metrics = StageMetrics(enabled=True)
+    monkeypatch.setattr(StageMetrics, "_instance", metrics)
+    buffer = io.BytesIO()
+    Image.new('RGB', (320, 240), 'green').save(buffer, format='JPEG')
+
+    ImagePreprocessor().to_array(buffer.getvalue())
+    assert set(metrics.summary()) == {"decode", "preprocess"}
@@ -0,0 +1,87 @@
+import os
+import threading
+import time
+import pytest
+from crop_disease_detector.services.model_cache import ModelCache
+
+@pytest.fixture
+def weights_file(tmp_path):
+    path = tmp_path / "model.pth"
+    path.write_bytes(b"weights")
+    return str(path)
+
+def test_model_cache_loads_once(weights_file):
+    """Verify repeated requests for the same model reuse the first load."""
+    cache = ModelCache()
+    calls = []
+    loader = lambda: calls.append(1) or object()
+
+    first = cache.get_or_load(weights_file, loader)
+    second = cache.get_or_load(weights_file, loader)
+
+    assert first is second
+    assert len(calls) == 1
+    stats = cache.stats()
+    assert (stats.hits, stats.misses, stats.entries) == (1, 1, 1)
+
+def test_model_cache_reloads_when_file_changes(weights_file):
+    """Verify a checkpoint replaced on disk is reloaded and the stale copy dropped."""
+    cache = ModelCache()
+    first = cache.get_or_load(weights_file, object)
+
+    stat = os.stat(weights_file)
+    os.utime(weights_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    second = cache.get_or_load(weights_file, object)
+
+    assert first is not second
+    assert cache.stats().entries == 1
+
+def test_model_cache_invalidate(weights_file):
+    """Verify explicit invalidation forces the next request to load again."""
+    cache = ModelCache()
+    first = cache.get_or_load(weights_file, object)
+    assert cache.invalidate(weights_file) == 1
+    assert cache.get_or_load(weights_file, object) is not first
+
+def test_evicted_entries_are_closed(weights_file):
+    """Verify replaced and invalidated entries release their resources (e.g. pool workers)."""
+    class Pool:
+        closed = False
+        def close(self):
+            self.closed = True
+
+    cache = ModelCache()
+    first = cache.get_or_load(weights_file, Pool)
+    stat = os.stat(weights_file)
+    os.utime(weights_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    second = cache.get_or_load(weights_file, Pool)
+    assert first.closed and not second.closed
+
+    cache.invalidate()
+    assert second.closed
+
+def test_model_cache_concurrent_requests_share_one_load(weights_file):
+    """Verify concurrent sessions wait on the load in progress instead of starting another."""
+    cache = ModelCache()
+    calls = []
+
+    def slow_loader():
+        calls.append(1)
+        time.sleep(0.05)
+        return object()
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get_or_load(weights_file, slow_loader)))
+               for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(calls) == 1
+    assert all(r is results[0] for r in results)
+
+def test_model_cache_missing_file_raises(tmp_path):
+    """Verify a missing checkpoint surfaces as an error the handler can report."""
+    with pytest.raises(FileNotFoundError):
+        ModelCache().get_or_load(str(tmp_path / "missing.pth"), object)
@@ -0,0 +1,113 @@
+import os
+import pytest
+import torch
+from crop_disease_detector.models.architecture import CNNModel, make_checkpoint, split_checkpoint
+from crop_disease_detector.services.model_loader import (
+    build_eager_model, build_mmap_model, build_quantized_model, convert_to_mmap, quantized_weights_path
+)
+
+CLASSES = ['a', 'b', 'c', 'd']
+
+@pytest.fixture
+def gap_checkpoint(tmp_path):
+    """Small GAP-head checkpoint in the training-script format."""
+    torch.manual_seed(0)
+    model = CNNModel(num_classes=len(CLASSES), head="gap").eval()
+    path = tmp_path / "gap_model.pth"
+    torch.save(make_checkpoint(model, CLASSES), path)
+    return str(path), model
+
+def test_gap_head_is_small_and_size_independent():
+    """Verify the GAP head drops the 51M-parameter fc1 and accepts any input size."""
+    model = CNNModel(num_classes=5, head="gap").eval()
+    assert sum(p.numel() for p in model.parameters()) < 1_000_000
+    with torch.no_grad():
+        assert model(torch.randn(2, 3, 160, 200)).shape == (2, 5)
+
+def test_unknown_head_rejected():
+    with pytest.raises(ValueError):
+        CNNModel(num_classes=4, head="transformer")
+
+def test_split_checkpoint_infers_head_for_bare_state_dicts():
+    """Verify checkpoints saved before metadata existed still load."""
+    _, metadata = split_checkpoint(CNNModel(num_classes=3, head="gap").state_dict())
+    assert metadata == {'head': 'gap', 'num_classes': 3}
+
+def test_loaders_agree(gap_checkpoint):
+    """Verify eager, mmap and int8 loading rebuild the checkpoint's head and predictions."""
+    path, reference = gap_checkpoint
+    x = torch.randn(3, 3, 224, 224)
+    with torch.no_grad():
+        expected = reference(x)
+        eager = build_eager_model(path, len(CLASSES))(x)
+        mapped = build_mmap_model(convert_to_mmap(path), len(CLASSES))(x)
+        quantized = build_quantized_model(path, len(CLASSES))(x)
+
+    assert torch.allclose(eager, expected)
+    assert torch.allclose(mapped, expected)
+    assert torch.equal(quantized.argmax(1), expected.argmax(1))
+
+def test_quantized_artifact_reused(gap_checkpoint, monkeypatch):
+    """Verify the int8 artifact is cached on disk and loaded instead of re-quantizing."""
+    import crop_disease_detector.services.model_loader as loader
+    path, reference = gap_checkpoint
+    build_quantized_model(path, len(CLASSES))
+    assert os.path.exists(quantized_weights_path(path))
+
+    monkeypatch.setattr(loader, "quantize_model", lambda model: pytest.fail("re-quantized a fresh artifact"))
+    monkeypatch.setattr(loader, "build_eager_model", lambda *args: pytest.fail("rebuilt the fp32 model"))
+    model = build_quantized_model(path, len(CLASSES))
+
+    x = torch.randn(3, 3, 224, 224)
+    with torch.no_grad():
+        assert torch.equal(model(x).argmax(1), reference(x).argmax(1))
+    assert model.head == "gap"
+
+def test_truncated_quantized_artifact_is_rebuilt(gap_checkpoint):
+    """Verify a partially written int8 artifact is re-quantized and replaced, with no temp files left."""
+    path, _ = gap_checkpoint
+    build_quantized_model(path, len(CLASSES))
+    artifact = quantized_weights_path(path)
+    with open(artifact, 'r+b') as f:
+        f.truncate(100)
+
+    model = build_quantized_model(path, len(CLASSES))
+    assert model.head == "gap"
+    assert 'state_dict' in torch.load(artifact, weights_only=True)
+    assert not [name for name in os.listdir(os.path.dirname(artifact)) if name.endswith('.tmp')]
+
+def test_unknown_precision_rejected():
+    from crop_disease_detector.services.settings import InferenceSettings
+    with pytest.raises(ValueError):
+        InferenceSettings(precision="fp8")
+
+def test_class_count_mismatch_rejected(gap_checkpoint):
+    path, _ = gap_checkpoint
+    with pytest.raises(ValueError):
+        build_eager_model(path, num_classes=5)
+
+def test_torchscript_artifact_compiled_once(gap_checkpoint, monkeypatch):
+    """Verify the compiled model matches eager output and later loads skip compilation."""
+    import crop_disease_detector.services.model_loader as loader
+    path, reference = gap_checkpoint
+    compiled = loader.load_or_compile_torchscript(path, "default", lambda: build_eager_model(path, len(CLASSES)))
+
+    x = torch.randn(4, 3, 224, 224)
+    with torch.no_grad():
+        assert torch.allclose(compiled(x), reference(x), atol=1e-5)
+
+    monkeypatch.setattr(loader, "compile_torchscript", lambda model: pytest.fail("recompiled a fresh artifact"))
+    reloaded = loader.load_or_compile_torchscript(path, "default", lambda: pytest.fail("rebuilt the eager model"))
+    assert isinstance(reloaded, torch.jit.ScriptModule)
+
+def test_torchscript_falls_back_to_eager(gap_checkpoint, monkeypatch):
+    """Verify a compilation failure still yields a working eager model."""
+    import crop_disease_detector.services.model_loader as loader
+
+    def broken(model):
+        raise RuntimeError("tracing not supported")
+
+    monkeypatch.setattr(loader, "compile_torchscript", broken)
+    path, _ = gap_checkpoint
+    model = loader.load_or_compile_torchscript(path, "default", lambda: build_eager_model(path, len(CLASSES)))
+    assert isinstance(model, CNNModel)
@@ -0,0 +1,54 @@
+import pytest
+import torch
+from PIL import Image
+from crop_disease_detector.models.architecture import CNNModel, make_checkpoint
+from crop_disease_detector.services.interfaces import IDiseasePredictor, IDiseaseInfoProvider
+from crop_disease_detector.services.disease_handlers import RiceDiseaseHandler
+from crop_disease_detector.services.onnx_backend import OnnxDiseaseHandler, export_to_onnx, verify_onnx_export
+
+pytest.importorskip("onnx")
+pytest.importorskip("onnxruntime")
+
+@pytest.fixture
+def exported(tmp_path):
+    """GAP-head rice checkpoint and its ONNX export."""
+    handler = RiceDiseaseHandler()
+    torch.manual_seed(0)
+    model_path = str(tmp_path / "rice.pth")
+    torch.save(make_checkpoint(CNNModel(num_classes=len(handler.classes), head="gap"), handler.classes), model_path)
+    return model_path, export_to_onnx(model_path, len(handler.classes))
+
+def test_onnx_handler_implements_interfaces():
+    handler = OnnxDiseaseHandler("Pulse")
+    assert isinstance(handler, IDiseasePredictor)
+    assert isinstance(handler, IDiseaseInfoProvider)
+    assert handler.get_disease_info("Angular-Leaf-Spot")
+
+def test_onnx_export_matches_torch(exported):
+    """Verify the exported graph reproduces torch logits for several batch sizes."""
+    model_path, onnx_path = exported
+    assert verify_onnx_export(model_path, onnx_path, num_classes=4, batch_sizes=(1, 3)) < 1e-4
+
+def test_onnx_handler_matches_torch_handler(exported):
+    """Verify the ONNX handler is a drop-in replacement for the torch handler (LSP)."""
+    model_path, onnx_path = exported
+    torch_handler = RiceDiseaseHandler(model_path=model_path)
+    onnx_handler = OnnxDiseaseHandler("Rice", model_path=onnx_path, intra_op_threads=1)
+    assert torch_handler.load_model() == (True, None)
+    assert onnx_handler.load_model() == (True, None)
+
+    images = [Image.new('RGB', (300, 200), color) for color in ('red', 'green', 'blue')] + [None]
+    expected = torch_handler.predict_batch(images, batch_size=2)
+    actual = onnx_handler.predict_batch(images, batch_size=2)
+
+    assert [r.ok for r in actual] == [True, True, True, False]
+    for a, e in zip(actual[:3], expected[:3]):
+        assert a.predicted_class == e.predicted_class
+        assert abs(a.confidence_score - e.confidence_score) < 1e-2
+    assert onnx_handler.predict(images[0]).predicted_class == expected[0].predicted_class
+
+def test_onnx_handler_missing_model(tmp_path):
+    handler = OnnxDiseaseHandler("Rice", model_path=str(tmp_path / "missing.onnx"))
+    success, error = handler.load_model()
+    assert not success and error
+    assert handler.predict(None) is None
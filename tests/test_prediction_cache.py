@@ -0,0 +1,136 @@
+import io
+
+from PIL import Image
+from crop_disease_detector.services.interfaces import PredictionResult
+from crop_disease_detector.services.prediction_cache import PredictionCache
+from crop_disease_detector.services.preprocessing import ImagePreprocessor
+from crop_disease_detector.services.settings import InferenceSettings
+
+def _result(name="Blast"):
+    return PredictionResult(predicted_class=name, confidence_score=90.0, probabilities={name: 90.0})
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+def _png_bytes(image):
+    buffer = io.BytesIO()
+    image.save(buffer, format='PNG')
+    return buffer.getvalue()
+
+def test_lru_eviction_and_hit_rate():
+    """Verify the least recently used entry is evicted and hits/misses are counted."""
+    cache = PredictionCache(max_entries=2)
+    cache.put("a", _result("A"))
+    cache.put("b", _result("B"))
+    assert cache.get("a").predicted_class == "A"
+    cache.put("c", _result("C"))
+
+    assert cache.get("b") is None
+    assert cache.get("c").predicted_class == "C"
+    stats = cache.stats()
+    assert (stats.hits, stats.misses, stats.evictions, stats.entries) == (2, 1, 1, 2)
+    assert abs(stats.hit_rate - 2 / 3) < 1e-9
+
+def test_entries_expire_after_ttl():
+    clock = FakeClock()
+    cache = PredictionCache(ttl_seconds=60, clock=clock)
+    cache.put("a", _result())
+    clock.now += 61
+    assert cache.get("a") is None
+    assert cache.stats().expirations == 1
+
+def test_failed_results_are_not_cached():
+    cache = PredictionCache()
+    cache.put("a", PredictionResult.failed("boom"))
+    assert cache.get("a") is None
+
+def test_cached_results_are_copies():
+    """Verify callers cannot mutate what later hits receive."""
+    cache = PredictionCache()
+    cache.put("a", _result())
+    cache.get("a").predicted_class = "changed"
+    cache.get("a").probabilities["Blast"] = 0.0
+    assert cache.get("a") == _result()
+
+    stored = _result()
+    cache.put("b", stored)
+    stored.probabilities["Blast"] = 0.0
+    assert cache.get("b") == _result()
+
+def test_disk_tier_survives_restart(tmp_path):
+    """Verify a new cache over the same SQLite file serves earlier predictions."""
+    path = str(tmp_path / "predictions.db")
+    PredictionCache(disk_path=path).put("a", _result())
+
+    restarted = PredictionCache(disk_path=path)
+    assert restarted.get("a") == _result()
+    assert restarted.stats().disk_hits == 1
+
+def test_disk_tier_works_without_memory_tier(tmp_path):
+    """Verify max_entries=0 disables only the memory tier."""
+    cache = PredictionCache(max_entries=0, disk_path=str(tmp_path / "predictions.db"))
+    cache.put("a", _result())
+    assert cache.get("a") == _result()
+    stats = cache.stats()
+    assert (stats.disk_hits, stats.entries, stats.evictions) == (1, 0, 0)
+
+class CommitCounter:
+    """Stands in for the SQLite connection and counts transactions."""
+    def __init__(self, connection):
+        self.connection, self.commits = connection, 0
+
+    def commit(self):
+        self.commits += 1
+        self.connection.commit()
+
+    def __getattr__(self, name):
+        return getattr(self.connection, name)
+
+def test_disk_tier_is_written_once_per_chunk_and_bounded(tmp_path):
+    """Verify a scored chunk is one disk transaction and the file keeps only the newest rows."""
+    clock = FakeClock()
+    cache = PredictionCache(disk_path=str(tmp_path / "predictions.db"), clock=clock, max_disk_entries=3)
+    cache._db = CommitCounter(cache._db)
+    images = [Image.new('RGB', (8, 8), (shade, 0, 0)) for shade in range(5)]
+    cache.predict_batch(images, "rice:v1", ImagePreprocessor(), lambda batch: [_result()] * len(batch),
+                        batch_size=8)
+    assert cache._db.commits == 2  # the chunk's rows, then pruning to the bound
+
+    clock.now += 1
+    cache.put("newest", _result())
+    keys = [key for key, in cache._db.execute("SELECT key FROM predictions ORDER BY created").fetchall()]
+    assert len(keys) == 3 and keys[-1] == "newest"
+
+def test_predict_batch_scores_only_misses():
+    """Verify re-uploads (same pixels, different encoding) and repeats skip the model."""
+    image = Image.new('RGB', (64, 48), 'green')
+    other = Image.new('RGB', (64, 48), 'red')
+    scored = []
+
+    def score(images):
+        scored.extend(images)
+        return [_result() for _ in images]
+
+    cache = PredictionCache()
+    preprocessor = ImagePreprocessor()
+    cache.predict_batch([image, other], "rice:v1", preprocessor, score)
+    results = cache.predict_batch([_png_bytes(image), None, other], "rice:v1", preprocessor, score)
+
+    assert len(scored) == 2
+    assert [r.ok for r in results] == [True, False, True]
+
+    # A different model version never reuses the old answers
+    cache.predict_batch([image], "rice:v2", preprocessor, score)
+    assert len(scored) == 3
+
+def test_settings_keep_cache_path_case():
+    settings = InferenceSettings.from_env({
+        "CROP_DETECTOR_PREDICTION_CACHE_PATH": "/Data/Predictions.db",
+        "CROP_DETECTOR_PREDICTION_CACHE_SIZE": "10",
+    })
+    assert settings.prediction_cache_path == "/Data/Predictions.db"
+    assert settings.prediction_cache_size == 10
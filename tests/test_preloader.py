@@ -0,0 +1,73 @@
+import time
+
+from crop_disease_detector.services.model_cache import ModelCache
+from crop_disease_detector.services.preloader import ModelPreloader
+
+class FakeHandler:
+    """Loads a placeholder 'model' through a shared ModelCache, slowly."""
+    crop_name = "Rice"
+    loads = 0
+
+    def __init__(self, cache, path, fail=False):
+        self.cache, self.path, self.fail = cache, path, fail
+        self.warmed = False
+
+    def _slow_load(self):
+        time.sleep(0.2)
+        FakeHandler.loads += 1
+        return object()
+
+    def load_model(self):
+        if self.fail:
+            return False, "weights missing"
+        self.model = self.cache.get_or_load(self.path, self._slow_load)
+        return True, None
+
+    def warm_up(self):
+        self.warmed = True
+
+class FakeContainer:
+    def __init__(self, cache, path):
+        pulse = type("PulseHandler", (FakeHandler,), {"crop_name": "Pulse"})
+        self._handlers = {"🌾 Rice": FakeHandler, "🫘 Pulse": pulse}
+        self.cache, self.path = cache, path
+        self.handlers = []
+
+    def get_handler(self, key):
+        handler_class = self._handlers[key]
+        handler = handler_class(self.cache, self.path, fail=handler_class.crop_name == "Pulse")
+        self.handlers.append(handler)
+        return handler
+
+def test_preloader_loads_in_background_and_reports_status(tmp_path):
+    """Verify preloading runs in the background and statuses end ready (with timings) or failed."""
+    weights = tmp_path / "rice.pth"
+    weights.write_bytes(b"weights")
+    container = FakeContainer(ModelCache(), str(weights))
+    preloader = ModelPreloader(container)
+
+    preloader.start().start()
+
+    assert preloader.wait("Rice", timeout=5) and preloader.wait("Pulse", timeout=5)
+    rice, pulse = preloader.statuses()
+    assert rice.ready and rice.load_seconds >= 0.2 and rice.warmup_seconds is not None
+    assert pulse.state == "failed" and pulse.error == "weights missing"
+    # The two preload threads may create their handlers in either order
+    assert next(h for h in container.handlers if h.crop_name == "Rice").warmed
+    assert len(container.handlers) == 2  # second start() did not preload again
+
+def test_early_request_waits_for_the_running_load(tmp_path):
+    """Verify a session asking for the model mid-preload reuses that load instead of loading twice."""
+    weights = tmp_path / "rice.pth"
+    weights.write_bytes(b"weights")
+    cache = ModelCache()
+    container = FakeContainer(cache, str(weights))
+    FakeHandler.loads = 0
+
+    ModelPreloader(container).start()
+    time.sleep(0.05)
+    session_handler = FakeHandler(cache, str(weights))
+    assert session_handler.load_model() == (True, None)
+
+    assert FakeHandler.loads == 1
+    assert cache.stats().hits >= 1
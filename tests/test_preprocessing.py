@@ -0,0 +1,57 @@
+from io import BytesIO
+import numpy as np
+import pytest
+from PIL import Image
+from crop_disease_detector.services.preprocessing import ImagePreprocessor
+
+def _noise_image(width, height):
+    rng = np.random.default_rng(0)
+    return Image.fromarray(rng.integers(0, 256, (height, width, 3), dtype=np.uint8))
+
+def _encoded(image, fmt):
+    buffer = BytesIO()
+    image.save(buffer, format=fmt)
+    return buffer.getvalue()
+
+def test_matches_torchvision_pipeline():
+    """Verify the fast path reproduces Resize + ToTensor + Normalize exactly."""
+    transforms = pytest.importorskip("torchvision.transforms")
+    image = _noise_image(640, 480)
+    reference = transforms.Compose([
+        transforms.Resize((224, 224)),
+        transforms.ToTensor(),
+        transforms.Normalize(mean=[0.485, 0.456, 0.406], std=[0.229, 0.224, 0.225])
+    ])(image).numpy()
+
+    fast = ImagePreprocessor().to_array(image)
+
+    assert fast.dtype == np.float32 and fast.shape == (3, 224, 224)
+    assert np.allclose(fast, reference, atol=1e-5)
+
+def test_accepts_bytes_paths_and_files(tmp_path):
+    """Verify encoded sources decode to the same input as the in-memory image."""
+    image = _noise_image(300, 200)
+    data = _encoded(image, 'PNG')
+    path = tmp_path / "leaf.png"
+    path.write_bytes(data)
+
+    preprocessor = ImagePreprocessor()
+    expected = preprocessor.to_array(image)
+    for source in (data, str(path), BytesIO(data)):
+        assert np.array_equal(preprocessor.to_array(source), expected)
+
+def test_large_jpeg_decoded_at_reduced_size():
+    """Verify draft mode skips full-resolution decoding but never goes below the input size."""
+    data = _encoded(_noise_image(4000, 3000), 'JPEG')
+    decoded = ImagePreprocessor().load(data)
+    assert decoded.mode == 'RGB'
+    assert 224 <= min(decoded.size) < 3000
+
+def test_batch_shape():
+    images = [_noise_image(100, 80), _noise_image(50, 60).convert('L')]
+    batch = ImagePreprocessor().to_batch(images)
+    assert batch.shape == (2, 3, 224, 224)
+
+def test_invalid_input_raises():
+    with pytest.raises(Exception):
+        ImagePreprocessor().to_array(b"not an image")
@@ -0,0 +1,63 @@
+import io
+
+from PIL import Image
+from crop_disease_detector.services.interfaces import PredictionResult
+from crop_disease_detector.services.report_cache import ReportCache
+from crop_disease_detector.services.session_store import StoredImage
+
+def _result(predicted_class="Brown spot", confidence=91.0):
+    return PredictionResult(predicted_class=predicted_class, confidence_score=confidence,
+                            probabilities={predicted_class: confidence, "_Healthy": 100 - confidence})
+
+def _stored(color):
+    buffer = io.BytesIO()
+    Image.new('RGB', (64, 64), color).save(buffer, format='PNG')
+    return StoredImage.from_bytes(buffer.getvalue())
+
+class CountingGenerator:
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, result, disease_info, crop_name, image):
+        self.calls.append(image)
+        return f"%PDF {result.predicted_class} {crop_name} {len(self.calls)}".encode()
+
+def test_reports_are_built_once_per_key():
+    """Verify repeated requests reuse the PDF and only a changed input rebuilds it."""
+    generate = CountingGenerator()
+    cache = ReportCache(generate=generate)
+    image = _stored('green')
+
+    first = cache.get_or_generate(_result(), {}, "Rice", image)
+    assert cache.get_or_generate(_result(), {}, "Rice", image) == first
+    assert generate.calls == [image]
+
+    cache.get_or_generate(_result(), {}, "Pulse", image)
+    cache.get_or_generate(_result(confidence=80.0), {}, "Rice", image)
+    cache.get_or_generate(_result(), {}, "Rice", _stored('red'))
+    assert len(generate.calls) == 4
+    assert cache.stats().hits == 1
+
+def test_peek_reports_readiness_without_building():
+    """Verify peek() neither builds a report nor counts as a lookup."""
+    generate = CountingGenerator()
+    cache = ReportCache(generate=generate)
+    key = cache.key_for(_result(), "Rice", _stored('green'))
+    assert cache.peek(key) is None and not generate.calls
+    cache.get_or_generate(_result(), {}, "Rice", _stored('green'))
+    assert cache.peek(key) is not None
+    assert cache.stats().hits == 0
+
+def test_cache_is_bounded_by_bytes():
+    cache = ReportCache(max_bytes=10)
+    cache.put("a", b"12345")
+    cache.put("b", b"12345")
+    cache.put("c", b"12345")
+    assert cache.peek("a") is None and cache.peek("c") is not None
+    assert cache.stats().bytes == 10 and cache.stats().evictions == 1
+
+def test_default_generator_builds_a_pdf():
+    """Verify the default generator (ReportGenerator, imported on first miss) builds a real PDF."""
+    cache = ReportCache()
+    pdf = cache.get_or_generate(_result(), {"severity": "High"}, "Rice", _stored('green'))
+    assert pdf.startswith(b"%PDF")
@@ -0,0 +1,107 @@
+import io
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from PIL import Image
+from crop_disease_detector.services.disease_data import RICE_DISEASE_INFO
+from crop_disease_detector.services.interfaces import PredictionResult
+from crop_disease_detector.services.report_templates import disease_sections
+from crop_disease_detector.services.report_generator import ReportGenerator, REPORT_IMAGE_DPI
+from crop_disease_detector.services.session_store import StoredImage
+
+def _stored(size):
+    buffer = io.BytesIO()
+    Image.new('RGB', size, 'green').save(buffer, format='JPEG')
+    return StoredImage.from_bytes(buffer.getvalue())
+
+def test_report_image_is_sampled_to_print_resolution():
+    """Verify a large photo is embedded at the print DPI of its 4x3 inch box, not at full size."""
+    ReportGenerator.clear_image_cache()
+    jpeg, (width, height) = ReportGenerator.encode_report_image(_stored((4000, 3000)))
+    assert (width, height) == pytest.approx((4 * 72, 3 * 72))
+    assert Image.open(io.BytesIO(jpeg)).size == (4 * REPORT_IMAGE_DPI, 3 * REPORT_IMAGE_DPI)
+
+def test_small_images_are_not_upscaled():
+    ReportGenerator.clear_image_cache()
+    jpeg, _ = ReportGenerator.encode_report_image(Image.new('RGB', (200, 100), 'red'))
+    assert Image.open(io.BytesIO(jpeg)).size == (200, 100)
+
+def test_encoded_image_is_reused_across_reports():
+    """Verify the same image content hits the JPEG cache, for StoredImages and PIL images alike."""
+    ReportGenerator.clear_image_cache()
+    stored = _stored((1200, 900))
+    first = ReportGenerator.encode_report_image(stored)
+    assert ReportGenerator.encode_report_image(_stored((1200, 900))) is first
+
+    pil_image = Image.new('RGB', (300, 300), 'blue')
+    assert ReportGenerator.encode_report_image(pil_image) is ReportGenerator.encode_report_image(pil_image.copy())
+
+def test_disease_sections_are_parsed_once_and_copied_per_report():
+    """Verify cached sections hand out fresh flowables that share the parsed text."""
+    info = RICE_DISEASE_INFO["Brown spot"]
+    first, second = disease_sections(info), disease_sections(dict(info))
+    assert len(first) == len(second)
+    assert all(a is not b for a, b in zip(first, second))
+    assert first[2].frags is second[2].frags  # overview paragraph parsed once
+
+def test_reports_built_concurrently_from_shared_templates_are_identical():
+    """Verify shared styles and cached sections survive concurrent builds."""
+    result = PredictionResult("Brown spot", 90.0, {"Brown spot": 90.0})
+    info = RICE_DISEASE_INFO["Brown spot"]
+    reference = ReportGenerator.generate_pdf_report(result, info, "Rice")
+    with ThreadPoolExecutor(4) as pool:
+        pdfs = list(pool.map(lambda _: ReportGenerator.generate_pdf_report(result, info, "Rice"), range(8)))
+    # Only the timestamp and document ID differ between runs
+    pages = reference.count(b"/Type /Page\n")
+    assert pages >= 1
+    assert all(pdf.count(b"/Type /Page\n") == pages for pdf in pdfs)
+    assert all(abs(len(pdf) - len(reference)) < 64 for pdf in pdfs)
+
+def test_field_report_pages_and_appendix(monkeypatch, tmp_path):
+    """Verify the consolidated report reads file uploads, skips failures and adds each disease once."""
+    import crop_disease_detector.services.report_generator as report_generator
+    appended = []
+    monkeypatch.setattr(report_generator, "disease_sections",
+                        lambda info: appended.append(info) or disease_sections(info))
+
+    buffer = io.BytesIO()
+    Image.new('RGB', (400, 300), 'green').save(buffer, format='JPEG')
+    entries = [(f"leaf{i}.jpg", PredictionResult(predicted_class, 90.0, {}), io.BytesIO(buffer.getvalue()))
+               for i, predicted_class in enumerate(["Brown spot", "Brown spot", "Leaf smut", "_Healthy"])]
+    entries.append(("broken.jpg", PredictionResult.failed("cannot identify image file"), None))
+
+    scratch = tmp_path / "scratch"
+    scratch.mkdir()
+    monkeypatch.setattr(report_generator.tempfile, "tempdir", str(scratch))
+    path = ReportGenerator.generate_field_report(entries, "🌾 Rice", RICE_DISEASE_INFO.get,
+                                                 output_path=str(tmp_path / "field.pdf"), workers=0)
+    pdf = open(path, 'rb').read()
+    # Summary page + 4 image pages + an appendix for the two diseases (healthy has none)
+    assert pdf.startswith(b"%PDF") and pdf.count(b"/Type /Page\n") >= 6
+    assert appended == [RICE_DISEASE_INFO["Brown spot"], RICE_DISEASE_INFO["Leaf smut"]]
+    assert not list(scratch.iterdir())  # the page images were cleaned up
+
+def test_field_report_prepares_images_in_worker_processes(tmp_path):
+    """Verify the process-pool path produces the same pages as the in-process one."""
+    buffer = io.BytesIO()
+    Image.new('RGB', (400, 300), 'green').save(buffer, format='JPEG')
+    entries = [(f"leaf{i}.jpg", PredictionResult("Brown spot", 90.0, {}), buffer.getvalue()) for i in range(8)]
+    serial = ReportGenerator.generate_field_report(entries, "Rice", RICE_DISEASE_INFO.get,
+                                                   output_path=str(tmp_path / "serial.pdf"), workers=0)
+    parallel = ReportGenerator.generate_field_report(entries, "Rice", RICE_DISEASE_INFO.get,
+                                                     output_path=str(tmp_path / "parallel.pdf"), workers=2)
+    serial_pdf, parallel_pdf = open(serial, 'rb').read(), open(parallel, 'rb').read()
+    assert parallel_pdf.count(b"/Type /Page\n") == serial_pdf.count(b"/Type /Page\n") == 10
+
+def test_field_report_refuses_batches_over_the_limit(tmp_path):
+    """Verify an oversized batch is rejected up front instead of building a huge report in memory."""
+    entries = [(f"leaf{i}.jpg", PredictionResult("Brown spot", 90.0, {}), None) for i in range(3)]
+    entries.append(("broken.jpg", PredictionResult.failed("cannot identify image file"), None))
+    output = tmp_path / "field.pdf"
+    with pytest.raises(ValueError):
+        ReportGenerator.generate_field_report(entries, "Rice", RICE_DISEASE_INFO.get,
+                                              output_path=str(output), workers=0, max_images=2)
+    assert not output.exists()
+    # Unreadable files add no page, so they do not count towards the limit
+    ReportGenerator.generate_field_report(entries, "Rice", RICE_DISEASE_INFO.get,
+                                          output_path=str(output), workers=0, max_images=3)
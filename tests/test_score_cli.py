@@ -0,0 +1,93 @@
+import csv
+import json
+import zipfile
+
+import pytest
+from PIL import Image
+from crop_disease_detector.score import ResultWriter, _truncate_partial_line, completed_files, iter_sources, score_sources
+from crop_disease_detector.services.interfaces import PredictionResult
+from crop_disease_detector.services.preprocessing import ImagePreprocessor
+
+class FakeHandler:
+    classes = ['Healthy', 'Blast']
+    preprocessor = ImagePreprocessor()
+
+    def __init__(self):
+        self.batch_sizes = []
+
+    def predict_batch(self, images, batch_size=16):
+        self.batch_sizes.append(len(images))
+        return [PredictionResult(predicted_class='Healthy', confidence_score=80.0,
+                                 probabilities={'Healthy': 80.0, 'Blast': 20.0}) for _ in images]
+
+def _photo_dir(tmp_path, count=5):
+    folder = tmp_path / "photos"
+    (folder / "nested").mkdir(parents=True)
+    for i in range(count):
+        Image.new('RGB', (40, 30), 'green').save(folder / ("nested" if i % 2 else "") / f"leaf{i}.jpg")
+    (folder / "notes.txt").write_text("not an image")
+    (folder / "broken.png").write_bytes(b"not a png")
+    return folder
+
+def test_directory_scored_to_jsonl_in_batches(tmp_path):
+    """Verify every image gets one record, undecodable files get an error, and inference is batched."""
+    handler = FakeHandler()
+    output = tmp_path / "scores.jsonl"
+    writer = ResultWriter(str(output), handler.classes)
+    count = score_sources(handler, iter_sources(str(_photo_dir(tmp_path))), writer, batch_size=4, workers=2)
+    writer.close()
+
+    records = [json.loads(line) for line in output.read_text().splitlines()]
+    assert count == len(records) == 6
+    assert sum(1 for r in records if r['error']) == 1
+    assert handler.batch_sizes == [3, 2]  # the broken file never reaches the model
+
+def test_resume_skips_completed_and_drops_partial_line(tmp_path):
+    output = tmp_path / "scores.jsonl"
+    output.write_text(json.dumps({'file': 'leaf0.jpg'}) + '\n{"file": "leaf1.j')
+    assert completed_files(str(output)) == {'leaf0.jpg'}
+    assert output.read_text().endswith('\n')
+
+def test_partial_line_found_across_blocks(tmp_path):
+    """Verify the backward scan finds the last newline when the partial line spans several blocks."""
+    output = tmp_path / "scores.jsonl"
+    output.write_bytes(b'{"file": "a"}\n{"file": "b"}\n{"file": "a-long-half-written-na')
+    _truncate_partial_line(str(output), block_size=4)
+    assert output.read_bytes() == b'{"file": "a"}\n{"file": "b"}\n'
+
+    _truncate_partial_line(str(output), block_size=4)  # complete files are left alone
+    assert output.read_bytes() == b'{"file": "a"}\n{"file": "b"}\n'
+
+    output.write_bytes(b'{"file": "only-partial')
+    _truncate_partial_line(str(output), block_size=4)
+    assert output.read_bytes() == b''
+
+def test_zip_archive_scored_to_csv(tmp_path):
+    """Verify zip archives are read in place and CSV output has one column per class."""
+    archive = tmp_path / "field.zip"
+    with zipfile.ZipFile(archive, 'w') as zf:
+        for path in sorted(_photo_dir(tmp_path).rglob("*.jpg")):
+            zf.write(path, path.name)
+
+    handler = FakeHandler()
+    output = tmp_path / "scores.csv"
+    writer = ResultWriter(str(output), handler.classes)
+    score_sources(handler, iter_sources(str(archive)), writer, batch_size=2)
+    writer.close()
+
+    rows = list(csv.DictReader(output.open()))
+    assert [r['file'] for r in rows] == [f"leaf{i}.jpg" for i in range(5)]
+    assert rows[0]['Blast'] == '20.0'
+    assert completed_files(str(output)) == {r['file'] for r in rows}
+
+def test_csv_resume_with_other_columns_is_refused(tmp_path):
+    """Verify a CSV run started without info fields is not resumed with them (or vice versa)."""
+    output = tmp_path / "scores.csv"
+    writer = ResultWriter(str(output), FakeHandler.classes)
+    writer.write("leaf0.jpg", PredictionResult('Healthy', 80.0, {'Healthy': 80.0, 'Blast': 20.0}))
+    writer.close()
+
+    with pytest.raises(ValueError, match="--info-fields"):
+        ResultWriter(str(output), FakeHandler.classes, lambda name: {'severity': 'None'}, ['severity'])
+    ResultWriter(str(output), FakeHandler.classes).close()  # same columns still resume
+    assert output.read_text().count('file,') == 1
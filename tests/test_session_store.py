@@ -0,0 +1,92 @@
+import io
+
+import numpy as np
+from PIL import Image
+from crop_disease_detector.services.metrics import StageMetrics
+from crop_disease_detector.services.session_store import FOOTPRINT_GAUGE, SessionImageStore, StoredImage
+
+def _jpeg(size, noisy=False):
+    buffer = io.BytesIO()
+    if noisy:
+        pixels = np.random.default_rng(0).integers(0, 256, (size[1], size[0], 3), dtype=np.uint8)
+        Image.fromarray(pixels).save(buffer, format='JPEG', quality=95)
+    else:
+        Image.new('RGB', size, 'green').save(buffer, format='JPEG')
+    return buffer.getvalue()
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+def test_small_upload_is_kept_verbatim():
+    """Verify small uploads are stored as-is and decoded only on demand."""
+    data = _jpeg((320, 240))
+    stored = StoredImage.from_bytes(data)
+    assert stored.data == data and not stored.is_thumbnail
+    assert stored.original_size == (320, 240)
+    assert stored.decode().size == (320, 240)
+
+def test_large_upload_becomes_bounded_thumbnail():
+    """Verify oversized uploads are replaced by a thumbnail but keep the original's digest."""
+    data = _jpeg((2400, 1800), noisy=True)
+    stored = StoredImage.from_bytes(data, max_bytes=100_000, thumbnail_size=800)
+    assert stored.is_thumbnail and stored.nbytes < len(data)
+    assert max(stored.decode().size) <= 800
+    assert stored.original_size == (2400, 1800)
+    assert stored.digest == StoredImage.from_bytes(data).digest
+
+def test_idle_sessions_are_evicted():
+    """Verify sessions idle past the limit are dropped while active ones survive."""
+    clock = FakeClock()
+    store = SessionImageStore(max_idle_seconds=60, clock=clock, metrics=StageMetrics())
+    image = StoredImage.from_bytes(_jpeg((64, 64)))
+    store.put("idle", image)
+    store.put("active", image)
+
+    clock.now = 50
+    assert store.get("active") is image  # touching refreshes the session
+    clock.now = 100
+    assert store.evict_idle() == ["idle"]
+    assert store.get("idle") is None
+    assert store.get("active") is image
+
+def test_footprint_gauge_tracks_stored_bytes():
+    """Verify the footprint gauge follows puts, replacements and discards."""
+    metrics = StageMetrics(enabled=False)
+    store = SessionImageStore(metrics=metrics)
+    first, second = StoredImage.from_bytes(_jpeg((64, 64))), StoredImage.from_bytes(_jpeg((128, 128)))
+
+    store.put("a", first)
+    store.put("b", first)
+    store.put("a", second)  # one image per session
+    assert store.footprint().sessions == 2
+    assert metrics.gauges()[FOOTPRINT_GAUGE] == first.nbytes + second.nbytes
+    assert f"crop_detector_{FOOTPRINT_GAUGE} {first.nbytes + second.nbytes}" in metrics.to_prometheus()
+
+    store.discard("a")
+    store.discard("b")
+    assert store.footprint().bytes == 0 and metrics.gauges()[FOOTPRINT_GAUGE] == 0
+
+def test_session_files_are_deleted_with_the_session(tmp_path):
+    """Verify temp files are deleted when replaced, discarded, or when their session goes idle."""
+    clock = FakeClock()
+    store = SessionImageStore(max_idle_seconds=60, clock=clock, metrics=StageMetrics())
+    paths = []
+    for index in range(3):
+        paths.append(tmp_path / f"report{index}.pdf")
+        paths[-1].write_bytes(b"%PDF")
+
+    store.put_file("batch", "field_report", str(paths[0]))
+    store.put_file("batch", "field_report", str(paths[1]))  # replaces (and deletes) the first report
+    store.put_file("other", "field_report", str(paths[2]))
+    assert not paths[0].exists() and store.file("batch", "field_report") == str(paths[1])
+
+    store.discard_file("other", "field_report")
+    assert not paths[2].exists() and store.file("other", "field_report") is None
+
+    clock.now = 100  # the batch session was abandoned
+    store.put("active", StoredImage.from_bytes(_jpeg((64, 64))))
+    assert not paths[1].exists() and store.file("batch", "field_report") is None
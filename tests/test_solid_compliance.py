@@ -44,3 +44,55 @@ def test_interface_segregation_info_only():
     # We should be able to get info WITHOUT calling load_model()
     info = handler.get_disease_info("Bacterial leaf blight")
     assert info['severity'] == "High"
+
+def _handler_with_tiny_model():
+    """Rice handler with a small stand-in network, so no checkpoint is needed."""
+    import torch.nn as nn
+    handler = RiceDiseaseHandler()
+    handler.model = nn.Sequential(nn.AdaptiveAvgPool2d(1), nn.Flatten(), nn.Linear(3, len(handler.classes))).eval()
+    return handler
+
+def test_predict_batch_matches_single_predictions():
+    """Verify batched scoring returns the same results as one-by-one calls, in input order."""
+    from PIL import Image
+    handler = _handler_with_tiny_model()
+    images = [Image.new('RGB', (320, 240), color) for color in ('red', 'green', 'blue', 'white', 'black')]
+
+    batch = handler.predict_batch(images, batch_size=2)
+
+    assert len(batch) == len(images)
+    for image, result in zip(images, batch):
+        single = handler.predict(image)
+        assert result.ok
+        assert result.predicted_class == single.predicted_class
+        assert abs(result.confidence_score - single.confidence_score) < 1e-4
+
+def test_predict_batch_reports_errors_per_item():
+    """Verify one bad input does not fail the whole batch (LSP: still a PredictionResult)."""
+    from PIL import Image
+    handler = _handler_with_tiny_model()
+    results = handler.predict_batch([Image.new('RGB', (64, 64)), None, Image.new('RGB', (64, 64))])
+
+    assert [r.ok for r in results] == [True, False, True]
+    assert all(isinstance(r, PredictionResult) for r in results)
+    assert "preprocessing" in results[1].error
+
+def test_predict_batch_without_model():
+    """Verify an unloaded handler returns failed results instead of crashing."""
+    results = PulseDiseaseHandler().predict_batch([None, None])
+    assert len(results) == 2 and not any(r.ok for r in results)
+
+def test_predict_batch_uses_prediction_cache():
+    """Verify a loaded handler answers repeated images from the injected PredictionCache."""
+    from PIL import Image
+    from crop_disease_detector.services.prediction_cache import PredictionCache
+    handler = _handler_with_tiny_model()
+    handler.prediction_cache = PredictionCache()
+    handler.fingerprint = "Rice:test:default"
+    image = Image.new('RGB', (64, 64), 'green')
+
+    first = handler.predict(image)
+    second = handler.predict(image)
+
+    assert second == first
+    assert handler.prediction_cache.stats().hits == 1